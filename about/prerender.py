@@ -0,0 +1,50 @@
+"""Статические части страниц, отрисованные один раз за время жизни процесса.
+
+Шаблоны меняются только при выкладке, поэтому подвал, шапка для
+анонимного читателя и страницы about отрисовываются при первом обращении
+и дальше отдаются готовыми: фрагменты — строкой, страницы — байтами
+ответа. Год в подвале входит в ключ, остальное от запроса не зависит.
+При DEBUG отрисовка идёт каждый раз, чтобы правки шаблонов были видны
+без перезапуска.
+"""
+import threading
+
+from django.conf import settings
+from django.template.loader import render_to_string
+
+_rendered = {}
+_lock = threading.Lock()
+
+
+def once(key, render):
+    if settings.DEBUG:
+        return render()
+    value = _rendered.get(key)
+    if value is None:
+        value = render()
+        with _lock:
+            value = _rendered.setdefault(key, value)
+    return value
+
+
+def prerendered(template_name, **context):
+    """HTML шаблона с контекстом `context` без контекстных процессоров."""
+    return once(
+        ('fragment', template_name, *sorted(context.items())),
+        lambda: render_to_string(template_name, context))
+
+
+def page(template_name, request, year):
+    """Байты страницы для анонимного читателя.
+
+    Контекстные процессоры применяются к первому запросу, поэтому
+    страница не должна зависеть ни от чего, кроме года и анонимности.
+    """
+    return once(
+        ('page', template_name, year),
+        lambda: render_to_string(template_name, {}, request).encode())
+
+
+def clear():
+    with _lock:
+        _rendered.clear()
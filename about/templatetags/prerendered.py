@@ -0,0 +1,12 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from about.prerender import prerendered as render_once
+
+register = template.Library()
+
+
+@register.simple_tag
+def prerendered(template_name, **context):
+    """Фрагмент без данных запроса: `{% prerendered 'x.html' year=year %}`."""
+    return mark_safe(render_once(template_name, **context))
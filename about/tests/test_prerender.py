@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from about import prerender
+
+User = get_user_model()
+
+
+class PrerenderTest(TestCase):
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.user = User.objects.create_user(username='reader')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        prerender.clear()
+
+    def test_guest_page_rendered_once(self):
+        """Повторный запрос анонима отдаёт готовую страницу."""
+        first = self.guest_client.get(reverse('about:author'))
+        second = self.guest_client.get(reverse('about:author'))
+        self.assertTemplateUsed(first, 'author.html')
+        self.assertTemplateNotUsed(second, 'author.html')
+        self.assertEqual(second.content, first.content)
+
+    def test_authorized_page_rendered_for_user(self):
+        """Авторизованному пользователю страница отрисовывается с шапкой."""
+        self.guest_client.get(reverse('about:tech'))
+        response = self.authorized_client.get(reverse('about:tech'))
+        self.assertTemplateUsed(response, 'tech.html')
+        self.assertContains(response, 'reader')
+        self.assertNotContains(response, reverse('signup'))
+
+    def test_fragments_keyed_by_context(self):
+        """Подвал отрисовывается один раз на каждый год."""
+        footer = prerender.prerendered('include/footer.html', year=2020)
+        self.assertIn('2020', footer)
+        self.assertIs(
+            prerender.prerendered('include/footer.html', year=2020), footer)
+        self.assertIn(
+            '2021', prerender.prerendered('include/footer.html', year=2021))
+
+    @override_settings(DEBUG=True)
+    def test_debug_renders_every_time(self):
+        """При DEBUG правки шаблонов видны без перезапуска."""
+        self.guest_client.get(reverse('about:author'))
+        response = self.guest_client.get(reverse('about:author'))
+        self.assertTemplateUsed(response, 'author.html')
@@ -1,10 +1,15 @@
 from django.test import TestCase, Client
 
+from about import prerender
+
 
 class AboutUrlsTests(TestCase):
 
     def setUp(self):
         self.guest_client = Client()
+        # Страницы отрисованы один раз за процесс; шаблон виден
+        # только при первой отрисовке.
+        prerender.clear()
 
     def test_about_url_exists_at_desired_location(self):
         """Проверка доступности адресов приложения about."""
@@ -1,11 +1,16 @@
 from django.test import Client, TestCase
 from django.urls import reverse
 
+from about import prerender
+
 
 class AboutViewsTest(TestCase):
 
     def setUp(self):
         self.guest_client = Client()
+        # Страницы отрисованы один раз за процесс; шаблон виден
+        # только при первой отрисовке.
+        prerender.clear()
 
     def test_about_page_accessible_by_name(self):
         """URL, генерируемый при помощи имени about:<name>, доступен."""
@@ -1,9 +1,24 @@
+from django.http import HttpResponse
 from django.views.generic.base import TemplateView
 
+from yatube.context_processor import year
 
-class AboutAuthorView(TemplateView):
+from .prerender import page
+
+
+class PrerenderedView(TemplateView):
+    """Страница без данных: анонимному читателю отдаётся готовой."""
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        return HttpResponse(
+            page(self.template_name, request, year(request)['year']))
+
+
+class AboutAuthorView(PrerenderedView):
     template_name = 'author.html'
 
 
-class AboutTechView(TemplateView):
+class AboutTechView(PrerenderedView):
     template_name = 'tech.html'
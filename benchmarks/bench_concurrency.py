@@ -0,0 +1,224 @@
+"""Пропускная способность записи при смешанной нагрузке на SQLite.
+
+Запуск из корня проекта::
+
+    python -m benchmarks.bench_concurrency --workers 4 --duration 10 \\
+        --profiles default production
+
+База наполняется `benchmarks.seed` один раз и копируется для каждого
+профиля настроек: `default` — yatube.settings, `production` —
+yatube.settings_production (WAL, synchronous=NORMAL, mmap, busy_timeout,
+постоянные соединения; кроме того, DEBUG=False). Нагрузку дают
+`--workers` процессов, как воркеры WSGI-сервера: каждый одновременно
+с остальными в течение `--duration` секунд читает ленты и посты
+и с вероятностью `--write-ratio` пишет комментарий или пост. После
+каждого запроса соединения обрабатываются как в конце запроса на
+сервере: без CONN_MAX_AGE соединение закрывается. Результат — JSON в stdout.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_views import environment, percentile
+
+PROFILES = {
+    'default': 'yatube.settings',
+    'production': 'yatube.settings_production',
+}
+READS = ('index', 'group_posts', 'post_view')
+WRITES = ('add_comment', 'new_post')
+# Время на запуск воркеров до общего старта нагрузки, секунды
+STARTUP_SECONDS = 3
+
+
+def setup():
+    import django
+    django.setup()
+
+
+def prepare(posts, random_seed):
+    """Создать и наполнить базу по пути из DB_NAME (дочерний процесс)."""
+    setup()
+    from django.core.management import call_command
+
+    from benchmarks.seed import seed
+
+    call_command('migrate', verbosity=0)
+    return seed(posts, random_seed)
+
+
+def request(client, rng, data, write):
+    from django.urls import reverse
+
+    post_id, post_author = rng.choice(data['posts'])
+    post_kwargs = {'username': post_author, 'post_id': post_id}
+    view = rng.choice(WRITES if write else READS)
+    if view == 'add_comment':
+        return client.post(reverse('add_comment', kwargs=post_kwargs),
+                           {'text': 'benchmark comment'})
+    if view == 'new_post':
+        return client.post(reverse('new_post'), {'text': 'benchmark post'})
+    if view == 'index':
+        return client.get(reverse('index'))
+    if view == 'group_posts':
+        slug = rng.choice(data['groups'])
+        return client.get(reverse('group', kwargs={'slug': slug}))
+    return client.get(reverse('post', kwargs=post_kwargs))
+
+
+def work(index, start_at, args):
+    """Нагрузка от одного воркера (дочерний процесс)."""
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.db import OperationalError, close_old_connections
+    from django.test import Client
+
+    from posts.models import Group, Post
+
+    User = get_user_model()
+    users = list(User.objects.order_by('pk'))
+    data = {
+        'groups': list(Group.objects.values_list('slug', flat=True)),
+        'posts': list(Post.objects.values_list('pk', 'author__username')),
+    }
+    client = Client()
+    client.force_login(users[index % len(users)])
+    close_old_connections()
+    rng = random.Random(args.seed + index)
+
+    timings = {'reads': [], 'writes': []}
+    errors = {'reads': 0, 'writes': 0}
+    time.sleep(max(0, start_at - time.time()))
+    deadline = start_at + args.duration
+    while time.time() < deadline:
+        kind = 'writes' if rng.random() < args.write_ratio else 'reads'
+        started = time.perf_counter()
+        try:
+            response = request(client, rng, data, kind == 'writes')
+            assert response.status_code in (200, 302), response.status_code
+            timings[kind].append(time.perf_counter() - started)
+        except OperationalError:
+            # «database is locked»: запрос не выполнен.
+            errors[kind] += 1
+        finally:
+            # Тестовый клиент не закрывает соединения по окончании
+            # запроса; на сервере это делает сигнал request_finished.
+            close_old_connections()
+    return {'timings': timings, 'errors': errors}
+
+
+def summarize(workers, duration):
+    result = {}
+    for kind in ('reads', 'writes'):
+        timings = sorted(
+            seconds * 1000
+            for worker in workers for seconds in worker['timings'][kind])
+        result[kind] = {
+            'requests': len(timings),
+            'per_second': round(len(timings) / duration, 1),
+            'errors': sum(worker['errors'][kind] for worker in workers),
+        }
+        if timings:
+            result[kind].update({
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p99_ms': round(percentile(timings, 99), 3),
+                'max_ms': round(timings[-1], 3),
+            })
+    return result
+
+
+def child(args, settings_module, db_name, *options):
+    env = dict(
+        os.environ, DJANGO_SETTINGS_MODULE=settings_module,
+        DB_ENGINE='sqlite3', DB_NAME=db_name,
+        CACHE_LOCATION=f'{db_name}.cache', DJANGO_ALLOWED_HOSTS='testserver')
+    env.pop('DB_CONN_MAX_AGE', None)
+    return subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.bench_concurrency',
+         *options] + sys.argv[1:],
+        env=env, stdout=subprocess.PIPE, universal_newlines=True)
+
+
+def result(process):
+    output, _ = process.communicate()
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, process.args)
+    return json.loads(output.splitlines()[-1])
+
+
+def run_profile(profile, template, workdir, args):
+    db_name = os.path.join(workdir, f'{profile}.sqlite3')
+    shutil.copyfile(template, db_name)
+    start_at = time.time() + STARTUP_SECONDS
+    processes = [
+        child(args, PROFILES[profile], db_name,
+              '--worker', str(index), str(start_at))
+        for index in range(args.workers)
+    ]
+    return summarize([result(process) for process in processes],
+                     args.duration)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=1000,
+                        help='размер набора данных, в постах')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10,
+                        help='длительность нагрузки на профиль, секунды')
+    parser.add_argument('--write-ratio', type=float, default=0.2,
+                        help='доля записывающих запросов')
+    parser.add_argument('--profiles', nargs='+', default=list(PROFILES),
+                        choices=PROFILES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--prepare', action='store_true',
+                        help=argparse.SUPPRESS)
+    parser.add_argument('--worker', nargs=2, type=float,
+                        help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.prepare:
+        print(json.dumps(prepare(args.posts, args.seed)))
+        return
+    if args.worker:
+        index, start_at = args.worker
+        print(json.dumps(work(int(index), start_at, args)))
+        return
+
+    workdir = tempfile.mkdtemp()
+    try:
+        template = os.path.join(workdir, 'template.sqlite3')
+        sizes = result(child(
+            args, PROFILES['default'], template, '--prepare'))
+        profiles = {
+            profile: run_profile(profile, template, workdir, args)
+            for profile in args.profiles
+        }
+    finally:
+        shutil.rmtree(workdir)
+
+    print(json.dumps({
+        'benchmark': 'concurrency',
+        'environment': environment(),
+        'options': {
+            'workers': args.workers,
+            'duration': args.duration,
+            'write_ratio': args.write_ratio,
+            'seed': args.seed,
+        },
+        'dataset': sizes,
+        'profiles': profiles,
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
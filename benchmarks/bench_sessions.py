@@ -0,0 +1,173 @@
+"""Запросы к базе на сессию и пользователя при авторизованном просмотре.
+
+Запуск из корня проекта::
+
+    python -m benchmarks.bench_sessions --posts 1000 --requests 200
+
+На чистой тестовой базе, наполненной `benchmarks.seed`, авторизованный
+читатель открывает ленты, профили и посты при трёх настройках:
+
+- `db` — сессии в базе и стандартный AuthenticationMiddleware
+  (SELECT сессии и SELECT пользователя на каждый запрос);
+- `cached_db` — сессии в общем ярусе кеша с записью в базу
+  и пользователь из кеша (users/auth.py), как в settings_production;
+- `signed_cookies` — сессия в подписанной cookie и пользователь из кеша.
+
+Для каждой настройки считаются все запросы к базе, запросы к таблице
+сессий и загрузки пользователя по id; `saved_per_request` — на сколько
+запросов в среднем меньше, чем у `db`. Результат — JSON в stdout.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import time
+
+from benchmarks.bench_views import environment, percentile
+
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+STOCK_AUTH = 'django.contrib.auth.middleware.AuthenticationMiddleware'
+CACHED_AUTH = 'users.auth.CachedAuthenticationMiddleware'
+VIEWS = ('index', 'profile', 'post_view', 'follow_index')
+SESSION_QUERY = re.compile(r'"django_session"')
+USER_QUERY = re.compile(r'FROM "auth_user" WHERE "auth_user"\."id" =')
+
+
+def profile_settings(profile):
+    from django.conf import settings
+
+    middleware = list(settings.MIDDLEWARE)
+    auth = STOCK_AUTH if profile == 'db' else CACHED_AUTH
+    middleware[middleware.index(CACHED_AUTH)] = auth
+    return {
+        'SESSION_ENGINE': SESSION_ENGINES[profile],
+        'SESSION_CACHE_ALIAS': 'shared',
+        'MIDDLEWARE': middleware,
+    }
+
+
+def url_for(view, rng, data):
+    from django.urls import reverse
+
+    post_id, author = rng.choice(data['posts'])
+    if view == 'index':
+        return reverse('index')
+    if view == 'profile':
+        return reverse('profile', kwargs={'username': author})
+    if view == 'post_view':
+        return reverse('post', kwargs={
+            'username': author, 'post_id': post_id})
+    return reverse('follow_index')
+
+
+def measure(profile, reader, data, args):
+    from django.core.cache import cache
+    from django.db import close_old_connections, connection
+    from django.test import Client, override_settings
+
+    executed = []
+
+    def count_query(execute, sql, params, many, context):
+        executed.append(sql)
+        return execute(sql, params, many, context)
+
+    cache.clear()
+    with override_settings(**profile_settings(profile)):
+        client = Client()
+        client.force_login(reader)
+        rng = random.Random(args.seed)
+        for _ in range(args.warmup):
+            client.get(url_for(rng.choice(VIEWS), rng, data))
+        timings, queries, sessions, users = [], [], [], []
+        for _ in range(args.requests):
+            url = url_for(rng.choice(VIEWS), rng, data)
+            executed.clear()
+            with connection.execute_wrapper(count_query):
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.status_code
+            queries.append(len(executed))
+            sessions.append(sum(
+                1 for sql in executed if SESSION_QUERY.search(sql)))
+            users.append(sum(1 for sql in executed if USER_QUERY.search(sql)))
+            close_old_connections()
+
+    timings = sorted(seconds * 1000 for seconds in timings)
+    return {
+        'requests': len(timings),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p90_ms': round(percentile(timings, 90), 3),
+        'queries_mean': round(sum(queries) / len(queries), 2),
+        'session_queries_mean': round(sum(sessions) / len(sessions), 2),
+        'user_queries_mean': round(sum(users) / len(users), 2),
+    }
+
+
+def run(args):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    import django
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    from benchmarks.seed import seed
+    from posts.models import Post
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    sizes = seed(args.posts, args.seed)
+    User = get_user_model()
+    reader = User.objects.filter(following__isnull=False).first()
+    data = {'posts': list(Post.objects.values_list('pk', 'author__username'))}
+
+    profiles = {
+        profile: measure(profile, reader, data, args)
+        for profile in args.profiles
+    }
+    baseline = profiles.get('db')
+    if baseline:
+        for metrics in profiles.values():
+            metrics['saved_per_request'] = round(
+                baseline['queries_mean'] - metrics['queries_mean'], 2)
+    return sizes, profiles
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=1000,
+                        help='размер набора данных, в постах')
+    parser.add_argument('--requests', type=int, default=200,
+                        help='замеряемых запросов на настройку')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--profiles', nargs='+', default=list(SESSION_ENGINES),
+                        choices=SESSION_ENGINES)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    sizes, profiles = run(args)
+    print(json.dumps({
+        'benchmark': 'sessions',
+        'environment': environment(),
+        'options': {
+            'requests': args.requests,
+            'warmup': args.warmup,
+            'seed': args.seed,
+        },
+        'dataset': sizes,
+        'profiles': profiles,
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""Время отрисовки ленты при разных настройках загрузки шаблонов.
+
+Запуск из корня проекта::
+
+    python -m benchmarks.bench_templates --posts 1000 --renders 200 \\
+        --profiles default production
+
+Каждый профиль замеряется в отдельном процессе на чистой тестовой базе,
+наполненной `benchmarks.seed`: `default` — yatube.settings (шаблоны ищутся
+и разбираются заново при каждом `{% include %}`, отладочная информация
+включена), `production` — yatube.settings_production (кешируемый
+загрузчик, debug выключен). Замеряются две отрисовки первой страницы
+главной ленты: `feed` — блок постов include/feed.html, `page` — страница
+index.html целиком с готовым блоком. Записи страницы читаются из базы
+до замера. Фрагменты постов по умолчанию берутся из кеша, как на
+работающем сайте; с `--cold-cache` кеш очищается перед каждой
+отрисовкой. Результат — JSON в stdout.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_views import environment, percentile
+
+PROFILES = {
+    'default': 'yatube.settings',
+    'production': 'yatube.settings_production',
+}
+RENDERS = ('feed', 'page')
+
+
+def summarize(timings, queries):
+    timings = sorted(seconds * 1000 for seconds in timings)
+    return {
+        'renders': len(timings),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p90_ms': round(percentile(timings, 90), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'max_ms': round(timings[-1], 3),
+        'queries_mean': round(sum(queries) / len(queries), 2),
+    }
+
+
+def measure(render, args):
+    from django.core.cache import cache
+    from django.db import connection
+
+    executed = []
+
+    def count_query(execute, sql, params, many, context):
+        executed.append(sql)
+        return execute(sql, params, many, context)
+
+    for _ in range(args.warmup):
+        render()
+    timings, queries = [], []
+    for _ in range(args.renders):
+        if args.cold_cache:
+            cache.clear()
+        executed.clear()
+        with connection.execute_wrapper(count_query):
+            started = time.perf_counter()
+            render()
+            timings.append(time.perf_counter() - started)
+        queries.append(len(executed))
+    return summarize(timings, queries)
+
+
+def run_profile(args):
+    """Замер отрисовок в настройках из окружения (дочерний процесс)."""
+    import django
+    django.setup()
+
+    from django.contrib.auth.models import AnonymousUser
+    from django.db import connection
+    from django.template.loader import render_to_string
+    from django.test import RequestFactory
+    from django.test.utils import setup_test_environment
+    from django.utils.safestring import mark_safe
+
+    from benchmarks.seed import seed
+    from posts.models import Post
+    from posts.paginator import paginate
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    sizes = seed(args.posts, args.seed)
+
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    page = paginate(request, Post.objects.feed())
+    page.object_list = list(page.object_list)
+
+    def feed():
+        return render_to_string('include/feed.html', {'page': page}, request)
+
+    html = mark_safe(feed())
+
+    def index():
+        return render_to_string(
+            'index.html', {'page': page, 'feed': html}, request)
+
+    renders = {'feed': feed, 'page': index}
+    return {
+        'dataset': sizes,
+        'renders': {
+            name: measure(renders[name], args) for name in RENDERS},
+    }
+
+
+def child(args, settings_module, workdir):
+    env = dict(
+        os.environ, DJANGO_SETTINGS_MODULE=settings_module,
+        DB_ENGINE='sqlite3', DB_NAME=os.path.join(workdir, 'db.sqlite3'),
+        CACHE_LOCATION=os.path.join(workdir, 'cache'),
+        DJANGO_ALLOWED_HOSTS='testserver')
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_templates', '--child']
+        + sys.argv[1:],
+        env=env, check=True, stdout=subprocess.PIPE,
+        universal_newlines=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=1000,
+                        help='размер набора данных, в постах')
+    parser.add_argument('--renders', type=int, default=200,
+                        help='замеряемых отрисовок каждого вида')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--profiles', nargs='+', default=list(PROFILES),
+                        choices=PROFILES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cold-cache', action='store_true',
+                        help='очищать кеш перед каждой отрисовкой')
+    parser.add_argument('--child', action='store_true',
+                        help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.child:
+        print(json.dumps(run_profile(args)))
+        return
+
+    profiles = {}
+    for profile in args.profiles:
+        workdir = tempfile.mkdtemp()
+        try:
+            profiles[profile] = child(args, PROFILES[profile], workdir)
+        finally:
+            shutil.rmtree(workdir)
+
+    print(json.dumps({
+        'benchmark': 'templates',
+        'environment': environment(),
+        'options': {
+            'renders': args.renders,
+            'warmup': args.warmup,
+            'seed': args.seed,
+            'cold_cache': args.cold_cache,
+        },
+        'profiles': profiles,
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""Пиковая память процесса при загрузке больших изображений в new_post.
+
+Запуск из корня проекта::
+
+    python -m benchmarks.bench_upload --size-mb 24 --formats png jpeg
+
+Тело multipart-запроса готовится на диске заранее и подаётся обработчику
+WSGI как поток, как его отдал бы веб-сервер, поэтому сам замер не держит
+файл в памяти. Каждая загрузка выполняется в отдельном процессе: пиковая
+память растёт монотонно и иначе показывала бы максимум предыдущих замеров.
+Пик читается из VmHWM (Linux) или `ru_maxrss`. Результат печатается
+в stdout в формате JSON.
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BOUNDARY = 'BenchUploadBoundary'
+CHUNK_SIZE = 1024 * 1024
+
+
+def peak_rss_kb():
+    # ru_maxrss в Linux наследуется через fork/exec от родителя,
+    # VmHWM считается для адресного пространства самого процесса.
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # В macOS ru_maxrss в байтах.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def make_image(path, image_format, size_mb):
+    """Изображение из шума: почти не сжимается, размер файла ~ size_mb."""
+    from PIL import Image
+
+    # PNG шума занимает ~3 байта на пиксель, JPEG высокого качества ~1.
+    bytes_per_pixel = 3 if image_format == 'png' else 1
+    pixels = size_mb * 1024 * 1024 // bytes_per_pixel
+    width = int((pixels * 4 / 3) ** 0.5)
+    height = pixels // width
+    image = Image.frombytes('RGB', (width, height),
+                            os.urandom(width * height * 3))
+    options = {'quality': 95} if image_format == 'jpeg' else {}
+    image.save(path, image_format.upper(), **options)
+    return width, height
+
+
+def make_body(path, image_path, image_format):
+    """Тело multipart/form-data с текстом поста и изображением."""
+    with open(path, 'wb') as body, open(image_path, 'rb') as image:
+        body.write(
+            f'--{BOUNDARY}\r\n'
+            'Content-Disposition: form-data; name="text"\r\n\r\n'
+            'benchmark\r\n'
+            f'--{BOUNDARY}\r\n'
+            'Content-Disposition: form-data; name="image"; '
+            f'filename="upload.{image_format}"\r\n'
+            f'Content-Type: image/{image_format}\r\n\r\n'.encode())
+        shutil.copyfileobj(image, body, CHUNK_SIZE)
+        body.write(f'\r\n--{BOUNDARY}--\r\n'.encode())
+    return os.path.getsize(path)
+
+
+def upload(body_path, media_root):
+    """Выполнить один POST в new_post и вернуть замер (в дочернем процессе)."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.test.client import ClientHandler
+    from django.test.utils import setup_test_environment
+    from django.urls import reverse
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    user = get_user_model().objects.create(username='bench')
+    client = Client()
+    client.force_login(user)
+    cookie = client.cookies[settings.SESSION_COOKIE_NAME].value
+
+    with override_settings(MEDIA_ROOT=media_root, THUMBNAIL_WORKERS=0), \
+            open(body_path, 'rb') as body:
+        environ = {
+            'REQUEST_METHOD': 'POST',
+            'PATH_INFO': reverse('new_post'),
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'CONTENT_TYPE': f'multipart/form-data; boundary={BOUNDARY}',
+            'CONTENT_LENGTH': str(os.path.getsize(body_path)),
+            'HTTP_COOKIE': f'{settings.SESSION_COOKIE_NAME}={cookie}',
+            'wsgi.input': body,
+            'wsgi.url_scheme': 'http',
+            'wsgi.errors': sys.stderr,
+        }
+        rss_before = peak_rss_kb()
+        started = time.perf_counter()
+        response = ClientHandler(enforce_csrf_checks=False)(environ)
+        elapsed = time.perf_counter() - started
+    return {
+        'status': response.status_code,
+        'seconds': round(elapsed, 3),
+        'rss_before_kb': rss_before,
+        'rss_peak_kb': peak_rss_kb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=24)
+    parser.add_argument('--formats', nargs='+', default=['png', 'jpeg'],
+                        choices=['png', 'jpeg'])
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(upload(*args.child)))
+        return
+
+    results = []
+    workdir = tempfile.mkdtemp()
+    try:
+        for image_format in args.formats:
+            image_path = os.path.join(workdir, f'source.{image_format}')
+            body_path = os.path.join(workdir, 'body')
+            width, height = make_image(image_path, image_format, args.size_mb)
+            body_size = make_body(body_path, image_path, image_format)
+            media_root = os.path.join(workdir, 'media')
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_upload',
+                 '--child', body_path, media_root],
+                check=True, stdout=subprocess.PIPE, universal_newlines=True,
+            ).stdout
+            result = json.loads(output.splitlines()[-1])
+            result.update(
+                format=image_format,
+                upload_bytes=body_size,
+                pixels=[width, height],
+                rss_delta_kb=result['rss_peak_kb'] - result['rss_before_kb'],
+            )
+            results.append(result)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    json.dump({'benchmark': 'upload', 'results': results},
+              sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+"""Задержка, число запросов к БД и пропускная способность представлений posts.
+
+Запуск из корня проекта::
+
+    python -m benchmarks.bench_views --sizes 1000 10000 --requests 200 \\
+        --output results.json --compare baseline.json
+
+Для каждого размера набора данных в отдельном процессе создаётся чистая
+тестовая база, наполняется `benchmarks.seed` и обстреливается тестовым
+клиентом Django последовательно, без сети. Данные и последовательность
+запросов зависят только от `--seed`, поэтому результаты разных запусков
+сопоставимы. Результат — JSON; с `--compare` в stderr выводятся метрики,
+ухудшившиеся относительно прошлого запуска больше чем на `--threshold`.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+# Записывающие представления идут последними: они сбрасывают кеш лент.
+VIEWS = (
+    'index', 'group_posts', 'profile', 'post_view', 'follow_index',
+    'add_comment', 'new_post',
+)
+# Метрики, рост которых считается регрессией.
+COMPARED = ('p50_ms', 'p90_ms', 'p99_ms', 'queries_mean')
+
+
+def percentile(values, percent):
+    """Процентиль по ближайшему рангу; values отсортированы."""
+    rank = max(1, round(percent / 100 * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+
+def summarize(timings, queries, statuses, elapsed):
+    timings = sorted(seconds * 1000 for seconds in timings)
+    return {
+        'requests': len(timings),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p90_ms': round(percentile(timings, 90), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'max_ms': round(timings[-1], 3),
+        'rps': round(len(timings) / elapsed, 1),
+        'queries_mean': round(sum(queries) / len(queries), 2),
+        'queries_max': max(queries),
+        'statuses': sorted(set(statuses)),
+    }
+
+
+def requests_for(view, rng, data):
+    """Метод, адрес и тело очередного запроса к представлению."""
+    from django.urls import reverse
+
+    author = rng.choice(data['authors'])
+    post_id, post_author = rng.choice(data['posts'])
+    post_kwargs = {'username': post_author, 'post_id': post_id}
+    if view == 'index':
+        return 'get', reverse('index'), None
+    if view == 'group_posts':
+        slug = rng.choice(data['groups'])
+        return 'get', reverse('group', kwargs={'slug': slug}), None
+    if view == 'profile':
+        return 'get', reverse('profile', kwargs={'username': author}), None
+    if view == 'post_view':
+        return 'get', reverse('post', kwargs=post_kwargs), None
+    if view == 'follow_index':
+        return 'get', reverse('follow_index'), None
+    if view == 'add_comment':
+        return ('post', reverse('add_comment', kwargs=post_kwargs),
+                {'text': 'benchmark comment'})
+    return 'post', reverse('new_post'), {'text': 'benchmark post'}
+
+
+def measure(view, client, data, args):
+    from django.core.cache import cache
+    from django.db import connection
+
+    executed = []
+
+    def count_query(execute, sql, params, many, context):
+        executed.append(sql)
+        return execute(sql, params, many, context)
+
+    rng = random.Random(args.seed)
+    for _ in range(args.warmup):
+        method, url, body = requests_for(view, rng, data)
+        getattr(client, method)(url, body)
+
+    timings, queries, statuses = [], [], []
+    started = time.perf_counter()
+    for _ in range(args.requests):
+        method, url, body = requests_for(view, rng, data)
+        if args.cold_cache:
+            cache.clear()
+        executed.clear()
+        with connection.execute_wrapper(count_query):
+            request_started = time.perf_counter()
+            response = getattr(client, method)(url, body)
+            timings.append(time.perf_counter() - request_started)
+        queries.append(len(executed))
+        statuses.append(response.status_code)
+    elapsed = time.perf_counter() - started
+    return summarize(timings, queries, statuses, elapsed)
+
+
+def run_size(posts, args):
+    """Замер всех представлений на одном наборе данных (дочерний процесс)."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    import django
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+
+    from benchmarks.seed import seed
+    from posts.models import Group, Post
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    started = time.perf_counter()
+    sizes = seed(posts, args.seed)
+    seed_seconds = time.perf_counter() - started
+
+    User = get_user_model()
+    data = {
+        'authors': list(User.objects.filter(
+            posts__isnull=False).distinct().values_list(
+                'username', flat=True)),
+        'groups': list(Group.objects.values_list('slug', flat=True)),
+        'posts': list(Post.objects.values_list('pk', 'author__username')),
+    }
+    reader = User.objects.filter(following__isnull=False).first()
+    client = Client()
+    client.force_login(reader)
+
+    views = {}
+    for view in args.views:
+        views[view] = measure(view, client, data, args)
+    return {
+        'dataset': sizes,
+        'seed_seconds': round(seed_seconds, 2),
+        'views': views,
+    }
+
+
+def environment():
+    from django import get_version
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], check=True,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            universal_newlines=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'django': get_version(),
+        'platform': platform.platform(),
+    }
+
+
+def compare(baseline, results, threshold):
+    """Строки о метриках, выросших больше чем в (1 + threshold) раз."""
+    previous = {
+        (run['dataset']['posts'], view): metrics
+        for run in baseline['results']
+        for view, metrics in run['views'].items()
+    }
+    for run in results:
+        for view, metrics in run['views'].items():
+            old = previous.get((run['dataset']['posts'], view))
+            if old is None:
+                continue
+            for name in COMPARED:
+                if old[name] and metrics[name] > old[name] * (1 + threshold):
+                    yield (f"{run['dataset']['posts']} постов, {view}: "
+                           f'{name} {old[name]} -> {metrics[name]}')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000],
+                        help='размеры наборов данных, в постах')
+    parser.add_argument('--requests', type=int, default=100,
+                        help='замеряемых запросов на представление')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--views', nargs='+', default=VIEWS, choices=VIEWS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cold-cache', action='store_true',
+                        help='очищать кеш перед каждым запросом')
+    parser.add_argument('--output', help='файл для JSON вместо stdout')
+    parser.add_argument('--compare', help='JSON прошлого запуска')
+    parser.add_argument('--threshold', type=float, default=0.1)
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.child is not None:
+        print(json.dumps(run_size(args.child, args)))
+        return
+
+    results = []
+    for posts in args.sizes:
+        command = [sys.executable, '-m', 'benchmarks.bench_views',
+                   '--child', str(posts)] + sys.argv[1:]
+        output = subprocess.run(
+            command, check=True, stdout=subprocess.PIPE,
+            universal_newlines=True).stdout
+        results.append(json.loads(output.splitlines()[-1]))
+
+    report = {
+        'benchmark': 'views',
+        'environment': environment(),
+        'options': {
+            'requests': args.requests,
+            'warmup': args.warmup,
+            'seed': args.seed,
+            'cold_cache': args.cold_cache,
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            regressions = list(compare(
+                json.load(baseline), results, args.threshold))
+        for line in regressions:
+            print(f'Регрессия: {line}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Генератор данных для бенчмарков и нагрузочного тестирования.
+
+Значения полей генерирует mixer, записи сохраняются пачками через
+bulk_create, после чего счётчики, ленты подписок и поисковый индекс
+собираются штатными командами. Наполнение базы из настроек проекта::
+
+    python -m benchmarks.seed --posts 10000 --seed 1
+"""
+import argparse
+import io
+import os
+import random
+import time
+
+# Больше 500 строк в одном INSERT SQLite не принимает.
+BATCH_SIZE = 500
+FOLLOWS_PER_USER = 10
+TEXTS_COUNT = 500
+# Поля, которые заполняет приложение, а не пользователь.
+POST_BLANKS = {
+    'comments_count': 0,
+    'thumbnail': '',
+    'thumbnail_width': None,
+    'thumbnail_height': None,
+    'thumbnail_srcset': '',
+    'thumbnail_webp_srcset': '',
+}
+
+
+def dataset(posts):
+    """Размеры таблиц для набора из `posts` постов."""
+    return {
+        'users': max(10, posts // 20),
+        'groups': max(3, posts // 500),
+        'posts': posts,
+        'comments': posts * 2,
+        'follows_per_user': FOLLOWS_PER_USER,
+    }
+
+
+def seed(posts, random_seed=0):
+    """Наполнить базу набором данных и вернуть его размеры.
+
+    Один и тот же `random_seed` даёт одинаковые данные, так что
+    результаты запусков можно сравнивать между собой.
+    """
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import transaction
+    from mixer.backend.django import Mixer
+
+    from posts.models import Comment, Follow, Group, Post
+
+    User = get_user_model()
+    sizes = dataset(posts)
+    random.seed(random_seed)
+    mixer = Mixer(commit=False)
+    mixer.faker.seed_instance(random_seed)
+
+    def build(model, count, **values):
+        return model.objects.bulk_create(
+            mixer.cycle(count).blend(model, **values), BATCH_SIZE)
+
+    with transaction.atomic():
+        build(User, sizes['users'],
+              username=mixer.sequence('user{0}'), password='!')
+        build(Group, sizes['groups'], slug=mixer.sequence('group{0}'))
+        # Связи передаются объектами, иначе mixer создаёт их сам.
+        users = list(User.objects.only('pk'))
+        groups = list(Group.objects.only('pk'))
+        # Faker медленный, поэтому тексты берутся из заранее собранного
+        # набора, а mixer заполняет остальные поля.
+        texts = [mixer.faker.text() for _ in range(TEXTS_COUNT)]
+        build(Post, sizes['posts'], image='',
+              text=lambda: random.choice(texts),
+              author=lambda: random.choice(users),
+              group=lambda: random.choice(groups + [None]),
+              **POST_BLANKS)
+        post_list = list(Post.objects.only('pk'))
+        build(Comment, sizes['comments'],
+              text=lambda: random.choice(texts),
+              author=lambda: random.choice(users),
+              post=lambda: random.choice(post_list))
+        Follow.objects.bulk_create([
+            Follow(user=user, author=author)
+            for user in users
+            for author in random.sample(
+                users, min(FOLLOWS_PER_USER, len(users)))
+            if author != user
+        ], BATCH_SIZE, ignore_conflicts=True)
+
+    quiet = io.StringIO()
+    call_command('recount', stdout=quiet)
+    if settings.FOLLOW_TIMELINE:
+        call_command('rebuild_timeline', stdout=quiet)
+    call_command('rebuild_search_index', stdout=quiet)
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    import django
+    django.setup()
+
+    started = time.perf_counter()
+    sizes = seed(args.posts, args.seed)
+    print(f'{sizes} за {time.perf_counter() - started:.1f} с')
+
+
+if __name__ == '__main__':
+    main()
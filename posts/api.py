@@ -0,0 +1,158 @@
+"""JSON API лент только для чтения.
+
+Ленты строятся теми же выборками, что и HTML-страницы, и листаются
+курсором (`after`/`before`). ETag ленты складывается из версии её кеша
+и параметров страницы, поэтому на `If-None-Match` ответ 304 даётся без
+запроса к базе. Last-Modified не отдаётся: правка поста или новый
+комментарий не меняют дат публикации. Ответ 304 отдаётся до
+сериализации. Комментарии поста отдаются
+порциями по COMMENT_PAGE_ITEMS, ссылка на следующую — `comments_next`.
+Адреса `.../new/` главной ленты, группы и подписок отвечают, сколько
+в ленте постов новее курсора `since` (см. live.py).
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import OuterRef, Subquery
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from . import live
+from .cache import (
+    FEED_FOLLOW, FEED_GROUP, FEED_INDEX, FEED_PROFILE, cached_groups,
+    feed_version,
+)
+from .conditional import make_etag, not_modified, set_validators
+from .models import Comment, Group, Post
+from .paginator import CursorPaginator, paginate_comments
+from .timeline import follow_feed
+
+User = get_user_model()
+
+
+def post_data(post):
+    group = post.group
+    return {
+        'id': post.pk,
+        'url': reverse('api_post', kwargs={
+            'username': post.author.username, 'post_id': post.pk}),
+        'author': post.author.username,
+        'group': group and {'slug': group.slug, 'title': group.title},
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'image': post.image.url if post.image else None,
+        'thumbnail': post.thumbnail or None,
+        'comments_count': post.comments_count,
+    }
+
+
+def comment_data(comment):
+    return {
+        'id': comment.pk,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+    }
+
+
+def page_link(request, **params):
+    query = request.GET.copy()
+    query.pop('after', None)
+    query.pop('before', None)
+    query.update(params)
+    return f'{request.path}?{query.urlencode()}'
+
+
+def feed_response(request, posts, feed, pk=None):
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    etag = make_etag(feed, pk, feed_version(feed, pk), after, before)
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+
+    page = CursorPaginator(posts, settings.PAGE_ITEMS).get_page(
+        after=after, before=before)
+
+    response = JsonResponse({
+        'results': [post_data(post) for post in page],
+        'next': page.has_next() and page_link(
+            request, after=page.next_cursor()) or None,
+        'previous': page.has_previous() and page_link(
+            request, before=page.previous_cursor()) or None,
+    })
+    return set_validators(response, etag)
+
+
+def index(request):
+    return feed_response(request, Post.objects.feed(), FEED_INDEX)
+
+
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(request, group.posts.feed(), FEED_GROUP, group.pk)
+
+
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    return feed_response(
+        request, author.posts.feed(), FEED_PROFILE, author.pk)
+
+
+def follow_index(request):
+    user = request.user
+    if not user.is_authenticated:
+        return JsonResponse(
+            {'detail': 'Требуется авторизация'}, status=401)
+    response = feed_response(request, follow_feed(user), FEED_FOLLOW, user.pk)
+    patch_vary_headers(response, ('Cookie',))
+    patch_cache_control(response, private=True)
+    return response
+
+
+def index_new(request):
+    return live.feed_updates(request, Post.objects.feed(), FEED_INDEX)
+
+
+def group_new(request, slug):
+    # Группа ищется в списке из кеша: опрос без новых записей
+    # не должен обращаться к базе.
+    group = next(
+        (group for group in cached_groups() if group.slug == slug), None)
+    if group is None:
+        raise Http404('Группа не найдена')
+    return live.feed_updates(
+        request, Post.objects.filter(group=group.pk), FEED_GROUP, group.pk)
+
+
+def follow_new(request):
+    user = request.user
+    if not user.is_authenticated:
+        return JsonResponse(
+            {'detail': 'Требуется авторизация'}, status=401)
+    return live.feed_updates(
+        request, follow_feed(user), FEED_FOLLOW, user.pk, private=True)
+
+
+def post_view(request, username, post_id):
+    latest_comment = Comment.objects.filter(
+        post=OuterRef('pk')).order_by('-created').values('created')[:1]
+    post = get_object_or_404(
+        Post.objects.feed().annotate(
+            latest_comment=Subquery(latest_comment)),
+        id=post_id, author__username=username)
+    # Правка поста не меняет дат, поэтому ответ проверяется только по ETag.
+    etag = make_etag(
+        post.pk, post.text, post.group_id, post.image.name, post.thumbnail,
+        post.comments_count, post.latest_comment, request.GET.get('after'))
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+
+    comments = paginate_comments(request, post)
+    data = post_data(post)
+    data['comments'] = [comment_data(comment) for comment in comments]
+    data['comments_next'] = comments.has_next() and page_link(
+        request, after=comments.next_cursor()) or None
+    return set_validators(JsonResponse(data), etag)
@@ -0,0 +1,154 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .models import Follow, Group
+from .paginator import paginate, restore_page
+
+FEED_INDEX = 'index'
+FEED_GROUP = 'group'
+FEED_PROFILE = 'profile'
+FEED_FOLLOW = 'follow'
+
+GROUPS_VERSION_KEY = 'groups:version'
+
+# Список групп текущего процесса: (версия, группы).
+_groups = (None, ())
+
+
+def shared_cache():
+    """Общий для процессов ярус кеша (см. yatube/cache.py).
+
+    Версии читаются и сбрасываются только в нём: в памяти процесса
+    они устаревали бы, а записи под версиями неизменны и кешируются
+    в обоих ярусах.
+    """
+    return getattr(cache, 'shared', cache)
+
+
+def feed_version_key(feed, pk=None):
+    return f'feed:{feed}:{pk or 0}:version'
+
+
+def post_version_key(pk):
+    return f'post:{pk}:version'
+
+
+def get_version(key):
+    """Текущая версия по ключу; сброс версии делает старые записи недоступными.
+
+    Версия создаётся заново, если ключ вытеснен из кеша, поэтому старые
+    записи не могут случайно снова стать актуальными.
+    """
+    versions = shared_cache()
+    version = versions.get(key)
+    if version is None:
+        version = uuid.uuid4().hex[:12]
+        if not versions.add(key, version, None):
+            version = versions.get(key, version)
+    return version
+
+
+def feed_version(feed, pk=None):
+    return get_version(feed_version_key(feed, pk))
+
+
+def post_version(pk):
+    """Версия фрагмента `post_item.html` поста."""
+    return get_version(post_version_key(pk))
+
+
+def page_params(request):
+    """Параметры запроса, от которых зависит страница ленты."""
+    return (
+        settings.FEED_PAGINATION,
+        request.GET.get('page', ''),
+        request.GET.get('after', ''),
+        request.GET.get('before', ''),
+    )
+
+
+def feed_page_key(request, feed, pk=None):
+    """Ключ страницы ленты: лента, версия, читатель, страница или курсор."""
+    params = ':'.join(page_params(request))
+    params = hashlib.md5(params.encode()).hexdigest()
+    version = feed_version(feed, pk)
+    viewer = request.user.pk or 0
+    return f'feed:{feed}:{pk or 0}:{version}:{viewer}:{params}'
+
+
+def render_feed(request, posts, feed, pk=None):
+    """Вернуть страницу ленты и её отрисованный HTML.
+
+    Готовый HTML (посты и навигация) берётся из кеша; при попадании
+    в кеш страница в контексте восстанавливается лениво и обращается
+    к базе только если её читают за пределами закешированного блока.
+    """
+    key = feed_page_key(request, feed, pk)
+    cached = cache.get(key)
+    if cached is not None:
+        number, html = cached
+        return restore_page(request, posts, number), mark_safe(html)
+    page = paginate(request, posts)
+    html = render_to_string('include/feed.html', {'page': page}, request)
+    number = getattr(page, 'number', None)
+    cache.set(key, (number, html), settings.FEED_CACHE_TIMEOUT)
+    return page, html
+
+
+def invalidate_feeds(index=False, groups=(), authors=(), followers=()):
+    """Сбросить версии затронутых лент, не трогая остальной кеш."""
+    keys = [feed_version_key(FEED_GROUP, pk) for pk in groups if pk]
+    keys += [feed_version_key(FEED_PROFILE, pk) for pk in authors]
+    keys += [feed_version_key(FEED_FOLLOW, pk) for pk in followers]
+    if index:
+        keys.append(feed_version_key(FEED_INDEX))
+    shared_cache().delete_many(keys)
+
+
+def invalidate_authors(author_ids, groups=()):
+    """Сбросить ленты, где показываются посты указанных авторов."""
+    author_ids = set(author_ids)
+    followers = Follow.objects.filter(
+        author__in=author_ids).values_list('user', flat=True)
+    invalidate_feeds(
+        index=True,
+        groups=groups,
+        authors=author_ids,
+        followers=set(followers),
+    )
+
+
+def invalidate_posts(post_ids):
+    """Сбросить версии фрагментов `post_item.html` постов."""
+    shared_cache().delete_many([post_version_key(pk) for pk in post_ids])
+
+
+def cached_groups():
+    """Список групп для боковой панели без запроса к базе.
+
+    Группы хранятся в общем кеше под версией и дополнительно в памяти
+    процесса; на запрос приходится одно чтение версии из кеша.
+    """
+    global _groups
+    version = get_version(GROUPS_VERSION_KEY)
+    memo_version, groups = _groups
+    if memo_version == version:
+        return groups
+    key = f'groups:{version}'
+    groups = cache.get(key)
+    if groups is None:
+        groups = tuple(Group.objects.all())
+        cache.set(key, groups, None)
+    _groups = (version, groups)
+    return groups
+
+
+def invalidate_groups():
+    global _groups
+    _groups = (None, ())
+    shared_cache().delete(GROUPS_VERSION_KEY)
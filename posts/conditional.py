@@ -0,0 +1,91 @@
+"""Условные ответы (ETag / Last-Modified) без отрисовки содержимого
+и заголовки кеширования HTML-страниц."""
+import hashlib
+from calendar import timegm
+
+from django.conf import settings
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+
+from .cache import GROUPS_VERSION_KEY, get_version, page_params
+
+
+def make_etag(*parts):
+    """ETag из значений, от которых зависит содержимое ответа."""
+    value = ':'.join(map(str, parts))
+    return quote_etag(hashlib.md5(value.encode()).hexdigest())
+
+
+def timestamp(value):
+    return value and timegm(value.utctimetuple())
+
+
+def not_modified(request, etag, last_modified=None):
+    """Ответ 304 (или 412), если у клиента актуальная версия, иначе None.
+
+    `last_modified` — datetime или None.
+    """
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp(last_modified))
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(timestamp(last_modified))
+    return response
+
+
+def latest_date(queryset, field='pub_date'):
+    """Самая поздняя дата выборки; читается по индексу, без агрегации."""
+    return queryset.order_by(f'-{field}').values_list(field, flat=True).first()
+
+
+def stats_key(user):
+    """Счётчики пользователя или None, если записи UserStats нет."""
+    stats = getattr(user, 'stats', None)
+    if stats is None:
+        return None
+    return stats.posts_count, stats.followers_count, stats.following_count
+
+
+def viewer_key(user):
+    """Данные читателя в шапке страницы.
+
+    Счётчики из user_card.html сюда не входят: их добавляют в ETag
+    только страницы, которые эту карточку показывают.
+    """
+    if not user.is_authenticated:
+        return None
+    return user.pk, user.username
+
+
+def page_etag(request, *parts):
+    """ETag HTML-страницы: её содержимое, параметры страницы ленты,
+    список групп боковой панели и данные читателя."""
+    return make_etag(
+        *parts, *page_params(request), get_version(GROUPS_VERSION_KEY),
+        viewer_key(request.user))
+
+
+def cacheable(request, response, etag, last_modified=None):
+    """Проставить валидаторы и заголовки кеширования HTML-страницы.
+
+    Анонимные страницы одинаковы для всех и могут храниться общим
+    кешем (обратным прокси) `PAGE_CACHE_MAX_AGE` секунд. Страницы
+    пользователя содержат его данные, поэтому хранятся только в его
+    браузере и каждый раз перепроверяются по ETag.
+    """
+    set_validators(response, etag, last_modified)
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.PAGE_CACHE_MAX_AGE)
+    patch_vary_headers(response, ('Cookie',))
+    return response
@@ -0,0 +1,215 @@
+"""Граф подписок: подписка и отписка, пакетные операции, набор авторов.
+
+Подписка — один `INSERT ... ON CONFLICT DO NOTHING` (в SQLite
+`INSERT OR IGNORE`), отписка — один `DELETE`: повтор и гонка двух
+запросов решаются уникальным ограничением `unique_following`, а не
+предварительной проверкой. Записи меняются в обход сигналов модели,
+поэтому счётчики, ленты подписок и кеш обновляются здесь же, как это
+делают обработчики в signals.py при сохранении через ORM.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from . import timeline
+from .cache import FEED_FOLLOW, feed_version, invalidate_feeds
+from .models import Follow, UserStats
+from .signals import change_counter
+
+
+def columns():
+    ops = connection.ops
+    return (
+        ops.quote_name(Follow._meta.db_table),
+        ops.quote_name(Follow._meta.get_field('user').column),
+        ops.quote_name(Follow._meta.get_field('author').column),
+    )
+
+
+def execute(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def insert(pairs):
+    """Вставить пары (user_id, author_id), пропуская существующие.
+
+    Возвращает число действительно вставленных строк.
+    """
+    ops = connection.ops
+    table, user, author = columns()
+    values = ', '.join(['(%s, %s)'] * len(pairs))
+    sql = (f'{ops.insert_statement(ignore_conflicts=True)} {table} '
+           f'({user}, {author}) VALUES {values} '
+           f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}')
+    return execute(sql, [pk for pair in pairs for pk in pair])
+
+
+def batches(pairs):
+    """Пары без самоподписок и повторов, пачками под лимит параметров."""
+    pairs = sorted({
+        (user_id, author_id) for user_id, author_id in pairs
+        if user_id != author_id})
+    size = connection.ops.bulk_batch_size(('user', 'author'), pairs) or 1
+    for start in range(0, len(pairs), size):
+        yield pairs[start:start + size]
+
+
+def existing(pairs):
+    condition = Q()
+    for user_id, author_id in pairs:
+        condition |= Q(user=user_id, author=author_id)
+    return Follow.objects.filter(condition).values_list('pk', 'user', 'author')
+
+
+def count_of(field):
+    rows = Follow.objects.filter(**{field: OuterRef('user')}).order_by()
+    rows = rows.values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def recount(pairs):
+    """Пересчитать счётчики подписок затронутых пользователей по таблице."""
+    UserStats.objects.filter(user__in={user for user, _ in pairs}).update(
+        following_count=count_of('user'))
+    UserStats.objects.filter(user__in={author for _, author in pairs}).update(
+        followers_count=count_of('author'))
+
+
+def changed(user_ids):
+    """Сбросить ленты подписок и наборы авторов читателей."""
+    invalidate_feeds(followers=user_ids)
+
+
+def follow(user, author):
+    """Подписать `user` на `author`; True, если подписки ещё не было."""
+    if user.pk == author.pk:
+        return False
+    with transaction.atomic():
+        created = insert([(user.pk, author.pk)])
+        if created:
+            change_counter(UserStats.objects.filter(user=user.pk),
+                           'following_count', 1)
+            change_counter(UserStats.objects.filter(user=author.pk),
+                           'followers_count', 1)
+            if settings.FOLLOW_TIMELINE:
+                timeline.backfill(user.pk, author.pk)
+    if created:
+        changed([user.pk])
+        forget(user)
+    return bool(created)
+
+
+def unfollow(user, author):
+    """Отписать `user` от `author`; True, если подписка была."""
+    table, user_column, author_column = columns()
+    with transaction.atomic():
+        deleted = execute(
+            f'DELETE FROM {table} '
+            f'WHERE {user_column} = %s AND {author_column} = %s',
+            [user.pk, author.pk])
+        if deleted:
+            change_counter(UserStats.objects.filter(user=user.pk),
+                           'following_count', -1)
+            change_counter(UserStats.objects.filter(user=author.pk),
+                           'followers_count', -1)
+            if settings.FOLLOW_TIMELINE:
+                timeline.unfollowed(
+                    user.pk, author.pk,
+                    Follow.objects.filter(author=author.pk).count())
+    if deleted:
+        changed([user.pk])
+        forget(user)
+    return bool(deleted)
+
+
+def follow_many(pairs):
+    """Создать подписки по парам (user_id, author_id) для импорта.
+
+    Существующие пары пропускаются; счётчики затронутых пользователей
+    пересчитываются по таблице. Возвращает число новых подписок.
+    """
+    total = 0
+    for batch in batches(pairs):
+        with transaction.atomic():
+            known = {(user, author) for _, user, author in existing(batch)}
+            fresh = [pair for pair in batch if pair not in known]
+            if not fresh:
+                continue
+            total += insert(fresh)
+            recount(fresh)
+            if settings.FOLLOW_TIMELINE:
+                for user_id, author_id in fresh:
+                    timeline.backfill(user_id, author_id)
+        changed({user for user, _ in fresh})
+    return total
+
+
+def unfollow_many(pairs):
+    """Удалить подписки по парам (user_id, author_id); вернуть их число."""
+    table, *_ = columns()
+    pk = connection.ops.quote_name(Follow._meta.pk.column)
+    total = 0
+    for batch in batches(pairs):
+        with transaction.atomic():
+            rows = list(existing(batch))
+            if not rows:
+                continue
+            placeholders = ', '.join(['%s'] * len(rows))
+            total += execute(
+                f'DELETE FROM {table} WHERE {pk} IN ({placeholders})',
+                [row[0] for row in rows])
+            gone = [(user, author) for _, user, author in rows]
+            authors = {author for _, author in gone}
+            if settings.FOLLOW_TIMELINE:
+                celebrities = timeline.celebrities(authors)
+            recount(gone)
+            if settings.FOLLOW_TIMELINE:
+                for user_id, author_id in gone:
+                    timeline.drop(user_id, author_id)
+                for author_id in celebrities - timeline.celebrities(authors):
+                    timeline.schedule_catch_up(author_id)
+        changed({user for user, _ in gone})
+    return total
+
+
+def authors_key(user_id):
+    # Версия ленты подписок сбрасывается при каждой смене подписок
+    # читателя, вместе с ней устаревает и набор.
+    return f'follow:{user_id}:{feed_version(FEED_FOLLOW, user_id)}:authors'
+
+
+def followed_authors(user):
+    """Множество id авторов, на которых подписан пользователь.
+
+    Хранится в кеше под версией ленты подписок и запоминается на
+    объекте пользователя, так что проверки в пределах запроса
+    не обращаются ни к базе, ни к кешу.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    authors = getattr(user, '_followed_authors', None)
+    if authors is not None:
+        return authors
+    key = authors_key(user.pk)
+    authors = cache.get(key)
+    if authors is None:
+        authors = frozenset(Follow.objects.filter(user=user).values_list(
+            'author', flat=True))
+        cache.set(key, authors, settings.FEED_CACHE_TIMEOUT)
+    user._followed_authors = authors
+    return authors
+
+
+def forget(user):
+    try:
+        del user._followed_authors
+    except AttributeError:
+        pass
+
+
+def is_following(user, author):
+    return author.pk in followed_authors(user)
@@ -1,7 +1,11 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.forms import ModelForm
+from django.template.defaultfilters import filesizeformat
 from django.utils.translation import gettext_lazy as _
 
 from .models import Comment, Post
+from .uploads import normalize
 
 
 class PostForm(ModelForm):
@@ -17,6 +21,40 @@ class PostForm(ModelForm):
             'group': _('Выберите группу для поста')
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Обрезанный LimitedUploadHandler файл не передаётся в поле,
+        # иначе вместо ошибки размера форма сообщит о битом изображении.
+        image = self.files.get('image')
+        self.image_too_large = bool(image) and (
+            getattr(image, 'too_large', False)
+            or image.size > settings.POST_IMAGE_MAX_BYTES)
+        if self.image_too_large:
+            self.files = self.files.copy()
+            del self.files['image']
+
+    def clean_image(self):
+        if self.image_too_large:
+            raise ValidationError(
+                _('Файл больше %(limit)s.'), code='too_large',
+                params={'limit': filesizeformat(
+                    settings.POST_IMAGE_MAX_BYTES)})
+        image = self.cleaned_data['image']
+        if not hasattr(image, 'image'):
+            # Изображение не загружалось, осталось прежнее.
+            return image
+        # Размер известен из заголовка, растр ещё не декодирован.
+        width, height = image.image.size
+        if width * height > settings.POST_IMAGE_MAX_PIXELS:
+            raise ValidationError(
+                _('Изображение больше %(limit)s мегапикселей.'),
+                code='too_many_pixels',
+                params={'limit': settings.POST_IMAGE_MAX_PIXELS // 10**6})
+        # Перекодированный файл попадает в модель через cleaned_data;
+        # загрузки запроса (self.files) не подменяются. Временный файл
+        # удаляется, когда форма с ним больше не нужна.
+        return normalize(image)
+
 
 class CommentForm(ModelForm):
     class Meta():
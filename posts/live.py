@@ -0,0 +1,121 @@
+"""Сигнал «в ленте есть новые записи» без отрисовки ленты.
+
+Клиент передаёт курсор самого нового из показанных постов (`since`) и
+получает число более новых, но не больше NEW_POSTS_LIMIT: они
+отсчитываются по тому же индексу, что и страницы ленты, и чтение
+ограничено этим числом. ETag ответа складывается из версии кеша ленты
+и курсора. Версия сбрасывается при каждом изменении ленты, поэтому
+клиенту, который опрашивает ленту с If-None-Match, пока в ней ничего
+не изменилось, отвечают 304 по одному чтению версии из кеша, без
+обращения к базе.
+
+Поток Server-Sent Events (`?stream=1` или `Accept: text/event-stream`)
+каждые NEW_POSTS_POLL_SECONDS сверяет ту же версию и, когда она
+изменилась, присылает событие `new-posts` с тем же JSON, что и опрос;
+в промежутках идут комментарии-пульс. Между проверками соединение
+с базой закрывается. Поток закрывается через NEW_POSTS_STREAM_SECONDS,
+и EventSource переподключается сам, продолжая с курсора из
+Last-Event-ID. Каждый поток занимает поток воркера WSGI, поэтому для
+тысяч открытых лент дешевле опрос, а поток — для асинхронного сервера
+или небольшого числа клиентов.
+"""
+import json
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from .cache import feed_version
+from .conditional import make_etag, not_modified, set_validators
+from .paginator import CursorPaginator
+
+# Через сколько миллисекунд EventSource переподключается после закрытия.
+STREAM_RETRY_MS = 1000
+
+
+def new_posts(posts, since):
+    """Число постов новее курсора и курсор самого нового из них.
+
+    Без курсора (или с испорченным) возвращается только курсор самого
+    нового поста ленты, с которого клиент начнёт отсчёт.
+    """
+    limit = settings.NEW_POSTS_LIMIT
+    paginator = CursorPaginator(posts, limit)
+    key = since and paginator.decode_cursor(since)
+    count = 0
+    if key:
+        newer = paginator.newer(key).values_list(*paginator.keys)
+        rows = list(newer[:limit + 1])
+        count = len(rows)
+        if not rows:
+            return {'count': 0, 'more': False, 'cursor': since}
+    newest = paginator.older(None).values_list(*paginator.keys).first()
+    return {
+        'count': min(count, limit),
+        'more': count > limit,
+        'cursor': newest and paginator.encode_key(*newest) or since,
+    }
+
+
+def release_connection():
+    # Внутри транзакции (в тестах) соединение закрывать нельзя.
+    if not connection.in_atomic_block:
+        connection.close()
+
+
+def event(data, since):
+    payload = json.dumps(data)
+    return f'id: {since}\nevent: new-posts\ndata: {payload}\n\n'
+
+
+def events(posts, feed, pk, since):
+    """События потока: первое сразу, затем при каждой смене версии."""
+    yield f'retry: {STREAM_RETRY_MS}\n\n'
+    deadline = time.monotonic() + settings.NEW_POSTS_STREAM_SECONDS
+    version = None
+    while True:
+        current = feed_version(feed, pk)
+        if current != version:
+            version = current
+            yield event(new_posts(posts, since), since)
+            release_connection()
+        if time.monotonic() >= deadline:
+            return
+        time.sleep(settings.NEW_POSTS_POLL_SECONDS)
+        yield ':\n\n'
+
+
+def wants_stream(request):
+    return (request.GET.get('stream') == '1'
+            or 'text/event-stream' in request.META.get('HTTP_ACCEPT', ''))
+
+
+def feed_updates(request, posts, feed, pk=None, private=False):
+    """Ответ на опрос новых записей ленты или поток событий."""
+    since = (request.GET.get('since')
+             or request.META.get('HTTP_LAST_EVENT_ID', ''))
+    if wants_stream(request):
+        response = StreamingHttpResponse(
+            events(posts, feed, pk, since), content_type='text/event-stream')
+        # Не буферизовать поток в nginx.
+        response['X-Accel-Buffering'] = 'no'
+        patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ('Accept', 'Last-Event-ID'))
+        return response
+
+    etag = make_etag('new', feed, pk, feed_version(feed, pk), since)
+    response = not_modified(request, etag)
+    if response is None:
+        response = set_validators(
+            JsonResponse(new_posts(posts, since)), etag)
+    # По тому же адресу отдаётся и поток событий, выбор — по заголовкам.
+    patch_vary_headers(response, ('Accept', 'Last-Event-ID'))
+    if private:
+        patch_vary_headers(response, ('Cookie',))
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.NEW_POSTS_MAX_AGE)
+    return response
@@ -0,0 +1,105 @@
+import posixpath
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import ImageBlob, Post
+
+BATCH_SIZE = 500
+
+
+def batches(names):
+    names = list(names)
+    for start in range(0, len(names), BATCH_SIZE):
+        yield names[start:start + BATCH_SIZE]
+
+
+class Command(BaseCommand):
+    help = ('Удаляет файлы изображений и миниатюры, на которые '
+            'не ссылается ни один пост')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет удалено',
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=None,
+            help='Не трогать файлы моложе стольких секунд; '
+                 'по умолчанию IMAGE_GC_MIN_AGE',
+        )
+
+    def handle(self, *args, dry_run=False, min_age=None, **options):
+        if min_age is None:
+            min_age = settings.IMAGE_GC_MIN_AGE
+        self.dry_run = dry_run
+        self.deadline = time.time() - min_age
+        self.removed = self.freed = 0
+        self.collect_blobs()
+        self.collect_thumbnails()
+        verb = 'Будет удалено' if dry_run else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} файлов: {self.removed}, '
+            f'освобождено байт: {self.freed}'))
+
+    def expired(self, storage, name):
+        return storage.get_modified_time(name).timestamp() <= self.deadline
+
+    def report(self, name, size):
+        self.stdout.write(f'{name}: {size} байт')
+        self.removed += 1
+        self.freed += size
+
+    def collect_blobs(self):
+        storage = Post._meta.get_field('image').storage
+        directory = Post._meta.get_field('image').upload_to.rstrip('/')
+        known = set(ImageBlob.objects.values_list('name', flat=True))
+        candidates = set(ImageBlob.objects.filter(
+            references=0).values_list('name', flat=True))
+        candidates.update(
+            name for name in storage.blobs(directory) if name not in known)
+
+        # Счётчик мог разойтись с постами; ссылку проверяем по ним.
+        for names in batches(candidates.copy()):
+            candidates.difference_update(Post.objects.filter(
+                image__in=names).values_list('image', flat=True))
+
+        for name in sorted(candidates):
+            exists = storage.exists(name)
+            if exists and not self.expired(storage, name):
+                continue
+            if not self.dry_run:
+                deleted, _ = ImageBlob.objects.filter(
+                    name=name, references=0).delete()
+                # Пост сослался на файл после проверки выше.
+                if name in known and not deleted:
+                    continue
+            size = storage.size(name) if exists else 0
+            if exists and not self.dry_run:
+                storage.delete(name)
+            self.report(name, size)
+
+    def collect_thumbnails(self):
+        """Миниатюры изображений, на которые не ссылается ни один пост.
+
+        Миниатюры лежат в хранилище по умолчанию и называются по
+        исходнику: `thumbs/<основа>_<ширина>.jpg`.
+        """
+        directory = thumbnails.THUMBNAILS_DIR
+        if not default_storage.exists(directory):
+            return
+        images = Post.objects.exclude(image='').exclude(image__isnull=True)
+        used = {thumbnails.stem(name) for name in images.values_list(
+            'image', flat=True).iterator()}
+        for name in sorted(default_storage.listdir(directory)[1]):
+            name = posixpath.join(directory, name)
+            if (thumbnails.source_stem(name) in used
+                    or not self.expired(default_storage, name)):
+                continue
+            size = default_storage.size(name)
+            if not self.dry_run:
+                default_storage.delete(name)
+            self.report(name, size)
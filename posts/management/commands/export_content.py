@@ -0,0 +1,36 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import FORMATS, MODELS, Checkpoint, export_model
+
+
+class Command(BaseCommand):
+    help = ('Выгружает группы, посты, комментарии и подписки в каталог '
+            'в формате JSON Lines или CSV')
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Каталог для файлов выгрузки')
+        parser.add_argument(
+            '--models', nargs='+', choices=MODELS, default=list(MODELS))
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Строк на чтение из базы и на контрольную точку',
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить прерванную выгрузку с контрольной точки',
+        )
+
+    def handle(self, directory, models, format, chunk_size, resume,
+               **options):
+        os.makedirs(directory, exist_ok=True)
+        checkpoint = Checkpoint(directory, resume)
+        total = 0
+        for name in MODELS:
+            if name in models:
+                total += export_model(name, directory, format, checkpoint,
+                                      chunk_size, self.stdout)
+        checkpoint.remove()
+        self.stdout.write(self.style.SUCCESS(f'Выгружено строк: {total}'))
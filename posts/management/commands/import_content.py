@@ -0,0 +1,58 @@
+import io
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import (
+    FORMATS, MODELS, Checkpoint, import_model, path, reset_sequences,
+)
+
+
+class Command(BaseCommand):
+    help = ('Загружает группы, посты, комментарии и подписки из каталога, '
+            'созданного export_content')
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Каталог с файлами выгрузки')
+        parser.add_argument(
+            '--models', nargs='+', choices=MODELS, default=list(MODELS))
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Строк на пачку bulk_create и на контрольную точку',
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить прерванную загрузку с контрольной точки',
+        )
+
+    def handle(self, directory, models, format, batch_size, resume,
+               **options):
+        names = [name for name in MODELS
+                 if name in models
+                 and os.path.exists(path(directory, name, format))]
+        if not names:
+            raise CommandError(f'В каталоге {directory} нет файлов {format}')
+        checkpoint = Checkpoint(directory, resume)
+        total = 0
+        for name in names:
+            total += import_model(name, directory, format, checkpoint,
+                                  batch_size, self.stdout)
+        self.rebuild(names)
+        checkpoint.remove()
+        self.stdout.write(self.style.SUCCESS(f'Загружено строк: {total}'))
+
+    def rebuild(self, names):
+        """Производные данные, которые bulk_create не обновляет."""
+        reset_sequences(names)
+        quiet = io.StringIO()
+        call_command('recount', stdout=quiet)
+        if 'post' in names:
+            call_command('rebuild_search_index', stdout=quiet)
+            if settings.FOLLOW_TIMELINE:
+                call_command('rebuild_timeline', stdout=quiet)
+        # Версии лент и фрагментов не знают о загруженных записях.
+        cache.clear()
@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from posts.timeline import rebuild
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Заново собирает материализованные ленты подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames', nargs='*',
+            help='Чьи ленты собрать; по умолчанию все',
+        )
+
+    def handle(self, *args, usernames=(), **options):
+        users = User.objects.filter(follower__isnull=False).distinct()
+        if usernames:
+            users = User.objects.filter(username__in=usernames)
+        total = 0
+        for user_id in users.values_list('pk', flat=True).iterator():
+            rebuild(user_id)
+            total += 1
+        self.stdout.write(self.style.SUCCESS(f'Собрано лент: {total}'))
@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.cache import invalidate_posts
+from posts.models import Comment, Follow, ImageBlob, Post, UserStats
+
+User = get_user_model()
+
+# (модель со счётчиком, поле счётчика, что считаем, ссылка на владельца,
+#  поле владельца, на которое она указывает)
+COUNTERS = (
+    (Post, 'comments_count', Comment, 'post', 'pk'),
+    (UserStats, 'posts_count', Post, 'author', 'pk'),
+    (UserStats, 'followers_count', Follow, 'author', 'pk'),
+    (UserStats, 'following_count', Follow, 'user', 'pk'),
+    (ImageBlob, 'references', Post, 'image', 'name'),
+)
+
+
+def count_of(model, field, key='pk'):
+    rows = model.objects.filter(**{field: OuterRef(key)}).order_by()
+    rows = rows.values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики постов, комментариев, подписок '
+            'и ссылок на изображения')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать расхождения, ничего не исправляя',
+        )
+
+    def handle(self, *args, dry_run=False, **options):
+        missing = User.objects.filter(stats__isnull=True)
+        self.stdout.write(f'Нет счётчиков у пользователей: {missing.count()}')
+        if not dry_run:
+            UserStats.objects.bulk_create(
+                [UserStats(user_id=pk)
+                 for pk in missing.values_list('pk', flat=True)],
+                batch_size=1000,
+            )
+
+        images = Post.objects.exclude(image='').exclude(image__isnull=True)
+        unknown = images.exclude(
+            image__in=ImageBlob.objects.values('name')).order_by()
+        unknown = unknown.values_list('image', flat=True).distinct()
+        self.stdout.write(f'Нет записей о файлах: {unknown.count()}')
+        if not dry_run:
+            ImageBlob.objects.bulk_create(
+                [ImageBlob(name=name) for name in list(unknown)],
+                batch_size=1000, ignore_conflicts=True,
+            )
+
+        for model, field, counted, owner, key in COUNTERS:
+            actual = count_of(counted, owner, key)
+            drifted = model.objects.annotate(actual=actual).exclude(
+                **{field: F('actual')})
+            total = drifted.count()
+            self.stdout.write(f'{model.__name__}.{field}: '
+                              f'расхождений {total}')
+            if dry_run or not total:
+                continue
+            if model is Post:
+                invalidate_posts(drifted.values_list('pk', flat=True))
+            with transaction.atomic():
+                model.objects.filter(pk__in=drifted.values('pk')).update(
+                    **{field: actual})
+        if not dry_run:
+            self.stdout.write(self.style.SUCCESS('Счётчики пересчитаны'))
@@ -0,0 +1,40 @@
+# Generated by Django 2.2.6 on 2026-10-18 03:10
+
+from django.conf import settings
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    # Индекс зависит от базы, поэтому создаётся здесь, а не в модели.
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE posts_post_fts USING fts5("
+            "text, tokenize = 'unicode61 remove_diacritics 2', "
+            "prefix = '2 3')")
+        schema_editor.execute(
+            'INSERT INTO posts_post_fts (rowid, text) '
+            'SELECT id, text FROM posts_post')
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX post_text_search_idx ON posts_post USING GIN '
+            f"(to_tsvector('{settings.SEARCH_CONFIG}', text))")
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE posts_post_fts')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX post_text_search_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_post_thumbnail'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 2.2.6 on 2026-10-18 03:40
+
+from django.db import migrations, models
+from django.db.models import Count
+
+import posts.storage
+
+
+def count_references(apps, schema_editor):
+    # Ссылки на уже загруженные изображения, в том числе старые,
+    # сохранённые не по содержимому.
+    Post = apps.get_model('posts', 'Post')
+    ImageBlob = apps.get_model('posts', 'ImageBlob')
+    images = Post.objects.exclude(image='').exclude(image__isnull=True)
+    images = images.order_by().values('image').annotate(total=Count('pk'))
+    ImageBlob.objects.bulk_create(
+        [ImageBlob(name=row['image'], references=row['total'])
+         for row in images.iterator()],
+        batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_post_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Файл')),
+                ('references', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=posts.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Изображение'),
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
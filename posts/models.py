@@ -3,6 +3,8 @@ from django.db import models
 from django.db.models.constraints import UniqueConstraint
 from pytils.translit import slugify
 
+from .storage import ContentAddressedStorage
+
 User = get_user_model()
 
 
@@ -23,6 +25,13 @@ class Group(models.Model):
         super().save(*args, **kwargs)
 
 
+class PostQuerySet(models.QuerySet):
+
+    def feed(self):
+        """Посты для ленты вместе с автором и группой одним запросом."""
+        return self.select_related('author', 'group')
+
+
 class Post(models.Model):
 
     text = models.TextField(verbose_name='Сообщение', help_text='Текст поста')
@@ -35,14 +44,39 @@ class Post(models.Model):
                               verbose_name='Группа',
                               related_name='posts')
     image = models.ImageField('Изображение', upload_to='posts/',
+                              storage=ContentAddressedStorage(),
                               blank=True, null=True)
+    comments_count = models.PositiveIntegerField('Комментариев', default=0,
+                                                 editable=False)
+    thumbnail = models.CharField('Миниатюра', max_length=255, blank=True,
+                                 editable=False)
+    thumbnail_width = models.PositiveIntegerField(null=True, editable=False)
+    thumbnail_height = models.PositiveIntegerField(null=True, editable=False)
+    thumbnail_srcset = models.TextField(blank=True, editable=False)
+    thumbnail_webp_srcset = models.TextField(blank=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
+        indexes = (
+            models.Index(fields=('-pub_date', '-id'),
+                         name='post_pub_date_idx'),
+            models.Index(fields=('author', '-pub_date', '-id'),
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=('group', '-pub_date', '-id'),
+                         name='post_group_pub_date_idx'),
+        )
 
     def __str__(self):
         return self.text[:15]
 
+    def reset_thumbnail(self):
+        """Забыть миниатюры прежнего изображения до построения новых."""
+        self.thumbnail = ''
+        self.thumbnail_width = self.thumbnail_height = None
+        self.thumbnail_srcset = self.thumbnail_webp_srcset = ''
+
 
 class Comment(models.Model):
 
@@ -56,6 +90,10 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = (
+            models.Index(fields=('post', '-created'),
+                         name='comment_post_created_idx'),
+        )
 
     def __str__(self):
         date = self.created.strftime('%d.%m.%Y %H:%M:%S')
@@ -75,4 +113,80 @@ class Follow(models.Model):
         return f'{self.user}-{self.author}'
 
     class Meta:
-        UniqueConstraint(fields=('user', 'author'), name='unique_following')
+        constraints = (
+            UniqueConstraint(fields=('user', 'author'),
+                             name='unique_following'),
+        )
+        indexes = (
+            models.Index(fields=('author', 'user'),
+                         name='follow_author_user_idx'),
+        )
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, обновляемые сигналами вместо COUNT-запросов.
+
+    Расхождения исправляет команда `manage.py recount`.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                primary_key=True,
+                                verbose_name='Пользователь',
+                                related_name='stats')
+    posts_count = models.PositiveIntegerField('Записей', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписан', default=0)
+
+    def __str__(self):
+        return str(self.user_id)
+
+
+class ImageBlob(models.Model):
+    """Файл изображения в хранилище по содержимому и число постов с ним.
+
+    Счётчик обновляется сигналами, расхождения исправляет
+    `manage.py recount`; файлы без ссылок удаляет `manage.py collect_images`.
+    """
+
+    name = models.CharField('Файл', max_length=255, unique=True)
+    references = models.PositiveIntegerField('Постов', default=0)
+
+    def __str__(self):
+        return self.name
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок читателя.
+
+    Заполняется при публикации поста (fan-out on write), поэтому лента
+    `/follow/` читается одним диапазоном индекса по читателю.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             verbose_name='Читатель',
+                             related_name='timeline',
+                             db_index=False)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             verbose_name='Пост',
+                             related_name='timeline')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               verbose_name='Автор',
+                               related_name='+',
+                               db_index=False)
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date', '-post')
+        constraints = (
+            UniqueConstraint(fields=('user', 'post'),
+                             name='unique_timeline_entry'),
+        )
+        indexes = (
+            models.Index(fields=('user', '-pub_date', '-post'),
+                         name='timeline_user_pub_date_idx'),
+            models.Index(fields=('user', 'author'),
+                         name='timeline_user_author_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.user_id}-{self.post_id}'
@@ -0,0 +1,209 @@
+import base64
+import binascii
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import SimpleLazyObject
+
+
+class CursorPage:
+    """Страница ленты, полученная по курсору (pub_date, id)."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self.object_list)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def next_cursor(self):
+        """Курсор для перехода к более старым записям."""
+        # Без отрицательного индекса: записи могут быть QuerySet.
+        last = self.object_list[len(self.object_list) - 1]
+        return self.paginator.encode_cursor(last)
+
+    def previous_cursor(self):
+        """Курсор для перехода к более новым записям."""
+        return self.paginator.encode_cursor(self.object_list[0])
+
+
+class CursorPaginator:
+    """Постраничный вывод по ключу (pub_date, id) без COUNT и OFFSET.
+
+    Записи отдаются от новых к старым. Более старые записи выбираются
+    условием `(pub_date, id) < курсор`, более новые — `(pub_date, id) >
+    курсор`, поэтому стоимость не зависит от глубины листания.
+
+    Если выборка явно упорядочена по двум полям (например, лента
+    подписок по полям `TimelineEntry`), курсор строится по ним: их
+    значения должны совпадать с `pub_date` и `id` поста.
+    """
+
+    default_keys = ('pub_date', 'pk')
+    # Поле даты объекта страницы, из которого строится курсор.
+    cursor_field = 'pub_date'
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        ordering = object_list.query.order_by
+        if len(ordering) == 2:
+            self.keys = tuple(map(self.ordering_key, ordering))
+        else:
+            self.keys = self.default_keys
+
+    @staticmethod
+    def ordering_key(item):
+        if isinstance(item, str):
+            return item.lstrip('-')
+        return item.expression.name
+
+    @classmethod
+    def encode_cursor(cls, obj):
+        return cls.encode_key(getattr(obj, cls.cursor_field), obj.pk)
+
+    @staticmethod
+    def encode_key(pub_date, pk):
+        value = f'{pub_date.isoformat()}|{pk}'
+        return base64.urlsafe_b64encode(value.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Вернуть (pub_date, id) или None для испорченного курсора."""
+        try:
+            value = base64.urlsafe_b64decode(cursor.encode()).decode()
+            pub_date, pk = value.rsplit('|', 1)
+            pub_date = parse_datetime(pub_date)
+            pk = int(pk)
+        except (binascii.Error, UnicodeError, ValueError):
+            return None
+        if pub_date is None:
+            return None
+        return pub_date, pk
+
+    def get_page(self, after=None, before=None):
+        """Страница старше курсора `after` или новее курсора `before`.
+
+        Как и `Paginator.get_page`, на некорректный курсор или пустую
+        страницу новых записей отвечает первой страницей.
+        """
+        limit = self.per_page + 1
+        key = before and self.decode_cursor(before)
+        if key:
+            rows = list(self.newer(key)[:limit])
+            if rows:
+                has_previous = len(rows) > self.per_page
+                rows = rows[:self.per_page][::-1]
+                return CursorPage(rows, self, True, has_previous)
+
+        key = after and self.decode_cursor(after)
+        queryset = self.older(key)
+        rows = list(queryset[:limit])
+        has_next = len(rows) > self.per_page
+        return CursorPage(rows[:self.per_page], self, has_next, bool(key))
+
+    def newer(self, key):
+        """Записи новее ключа (pub_date, id), от старых к новым."""
+        date_key, pk_key = self.keys
+        pub_date, pk = key
+        return self.object_list.filter(
+            Q(**{f'{date_key}__gt': pub_date})
+            | Q(**{date_key: pub_date, f'{pk_key}__gt': pk})
+        ).order_by(F(date_key).asc(), F(pk_key).asc())
+
+    def older(self, key):
+        """Записи старше ключа (pub_date, id), от новых к старым."""
+        date_key, pk_key = self.keys
+        queryset = self.object_list.order_by(
+            F(date_key).desc(), F(pk_key).desc())
+        if not key:
+            return queryset
+        pub_date, pk = key
+        return queryset.filter(
+            Q(**{f'{date_key}__lt': pub_date})
+            | Q(**{date_key: pub_date, f'{pk_key}__lt': pk}))
+
+
+class CommentPaginator(CursorPaginator):
+    """Комментарии поста от новых к старым по ключу (created, id).
+
+    Ключ совпадает с индексом `comment_post_created_idx`, поэтому
+    каждая порция читается по индексу, сколько бы комментариев ни было.
+    Записи страницы остаются QuerySet (шаблоны и код получают выборку,
+    а не список), поэтому наличие следующей порции проверяется отдельным
+    EXISTS, и только если порция заполнена целиком.
+    """
+
+    default_keys = ('created', 'pk')
+    cursor_field = 'created'
+
+    def get_page(self, after=None):
+        key = after and self.decode_cursor(after)
+        comments = self.older(key)[:self.per_page]
+        has_next = len(comments) == self.per_page
+        if has_next:
+            last = comments[self.per_page - 1]
+            has_next = self.older((last.created, last.pk)).exists()
+        return CursorPage(comments, self, has_next, bool(key))
+
+
+def paginate(request, object_list):
+    """Страница ленты в режиме номеров страниц или курсора.
+
+    Курсорный режим включается параметрами `after`/`before` в запросе или
+    настройкой `FEED_PAGINATION = 'cursor'`; иначе работает обычный
+    `Paginator`, удобный для небольших выборок.
+    """
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    if after or before or settings.FEED_PAGINATION == 'cursor':
+        paginator = CursorPaginator(object_list, settings.PAGE_ITEMS)
+        return paginator.get_page(after=after, before=before)
+    paginator = Paginator(object_list, settings.PAGE_ITEMS)
+    return paginator.get_page(request.GET.get('page'))
+
+
+def paginate_comments(request, post):
+    """Порция комментариев поста с авторами, старше курсора `after`."""
+    paginator = CommentPaginator(
+        post.comments.select_related('author'),
+        settings.COMMENT_PAGE_ITEMS)
+    return paginator.get_page(after=request.GET.get('after'))
+
+
+def restore_page(request, object_list, number):
+    """Страница без обращения к базе для уже отрисованной ленты.
+
+    `number` — номер страницы, сохранённый при отрисовке; для курсорного
+    режима он равен None, и страница вычисляется только при чтении.
+    """
+    if number is None:
+        return SimpleLazyObject(lambda: paginate(request, object_list))
+    paginator = Paginator(object_list, settings.PAGE_ITEMS)
+    bottom = (number - 1) * paginator.per_page
+    top = bottom + paginator.per_page
+    return paginator._get_page(object_list[bottom:top], number, paginator)
@@ -0,0 +1,87 @@
+"""Полнотекстовый поиск по тексту постов.
+
+В SQLite посты индексирует виртуальная таблица FTS5 (rowid = id поста),
+её синхронизируют сигналы. В PostgreSQL используется GIN-индекс по
+`to_tsvector(text)`, который база поддерживает сама. На остальных базах
+поиск сводится к `icontains`.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+WORD_RE = re.compile(r'\w+')
+
+
+def match_expression(words):
+    """Запрос FTS5: каждое слово как префикс, операторы FTS5 недоступны."""
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def tsquery_expression(words):
+    """Запрос to_tsquery: все слова как префиксы."""
+    return ' & '.join(f'{word}:*' for word in words)
+
+
+def search(queryset, query):
+    """Посты queryset, в тексте которых есть все слова запроса.
+
+    Порядок queryset сохраняется, так что результат можно выводить
+    и листать как обычную ленту.
+    """
+    words = WORD_RE.findall(query.lower())
+    if not words:
+        return queryset.none()
+    column = f'"{Post._meta.db_table}"."id"'
+    if connection.vendor == 'sqlite':
+        return queryset.extra(
+            where=[f'{column} IN (SELECT rowid FROM {FTS_TABLE} '
+                   f'WHERE {FTS_TABLE} MATCH %s)'],
+            params=[match_expression(words)],
+        )
+    if connection.vendor == 'postgresql':
+        # Выражение должно совпадать с выражением индекса post_text_search_idx.
+        config = settings.SEARCH_CONFIG
+        return queryset.extra(
+            where=[f"to_tsvector('{config}', \"{Post._meta.db_table}\"."
+                   f"\"text\") @@ to_tsquery('{config}', %s)"],
+            params=[tsquery_expression(words)],
+        )
+    for word in words:
+        queryset = queryset.filter(text__icontains=word)
+    return queryset
+
+
+def index_post(post):
+    """Записать текст поста в индекс FTS5 (только SQLite)."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+            [post.pk, post.text])
+
+
+def unindex_post(pk):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pk])
+
+
+def rebuild():
+    """Переиндексировать все посты, например после bulk_create."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) '
+            f'SELECT id, text FROM {Post._meta.db_table}')
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
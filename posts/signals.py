@@ -0,0 +1,187 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+
+from . import search, timeline
+from .cache import (
+    invalidate_authors, invalidate_feeds, invalidate_groups, invalidate_posts,
+)
+from .models import Comment, Follow, Group, ImageBlob, Post, UserStats
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, **kwargs):
+    # При смене группы нужно сбросить и ленту прежней группы,
+    # при смене изображения — освободить прежний файл.
+    if instance.pk:
+        instance._previous_group_id, instance._previous_image = (
+            Post.objects.filter(pk=instance.pk).values_list(
+                'group', 'image').first() or (None, None))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    groups = {instance.group_id, getattr(instance, '_previous_group_id', None)}
+    invalidate_authors([instance.author_id], groups=groups)
+    invalidate_posts([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    post = Post.objects.filter(pk=instance.post_id).values(
+        'author', 'group').first()
+    if post is None:
+        # Комментарий удаляется вместе с постом.
+        return
+    invalidate_authors([post['author']], groups=[post['group']])
+    invalidate_posts([instance.post_id])
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    posts = list(instance.posts.values_list('pk', 'author'))
+    invalidate_authors({author for _, author in posts}, groups=[instance.pk])
+    invalidate_posts([pk for pk, _ in posts])
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_list_changed(sender, **kwargs):
+    invalidate_groups()
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    invalidate_feeds(followers=[instance.user_id])
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate_feeds(authors=[instance.pk], followers=[instance.pk])
+
+
+def change_counter(queryset, field, delta):
+    """Атомарно сдвинуть счётчик одним UPDATE, не опуская его ниже нуля."""
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def counter_delta(signal, created=False, raw=False, **kwargs):
+    """+1 для новой записи, -1 для удалённой, 0 для правки."""
+    if signal is post_delete:
+        return -1
+    return 1 if created and not raw else 0
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def count_posts(sender, instance, **kwargs):
+    delta = counter_delta(**kwargs)
+    if not delta:
+        return
+    with transaction.atomic():
+        change_counter(
+            UserStats.objects.filter(user=instance.author_id),
+            'posts_count', delta)
+
+
+def change_references(name, delta):
+    """Сдвинуть счётчик ссылок на файл изображения."""
+    if not name:
+        return
+    if delta > 0:
+        ImageBlob.objects.bulk_create(
+            [ImageBlob(name=name)], ignore_conflicts=True)
+    change_counter(ImageBlob.objects.filter(name=name), 'references', delta)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def count_image_references(sender, instance, signal, raw=False, **kwargs):
+    if raw:
+        return
+    image = instance.image.name or None
+    if signal is post_delete:
+        change_references(image, -1)
+        return
+    previous = getattr(instance, '_previous_image', None) or None
+    if previous != image:
+        with transaction.atomic():
+            change_references(previous, -1)
+            change_references(image, 1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def count_comments(sender, instance, **kwargs):
+    delta = counter_delta(**kwargs)
+    if not delta:
+        return
+    with transaction.atomic():
+        change_counter(
+            Post.objects.filter(pk=instance.post_id), 'comments_count', delta)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def count_follows(sender, instance, **kwargs):
+    delta = counter_delta(**kwargs)
+    if not delta:
+        return
+    with transaction.atomic():
+        change_counter(
+            UserStats.objects.filter(user=instance.user_id),
+            'following_count', delta)
+        change_counter(
+            UserStats.objects.filter(user=instance.author_id),
+            'followers_count', delta)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and settings.FOLLOW_TIMELINE:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def sync_timeline(sender, instance, **kwargs):
+    if not settings.FOLLOW_TIMELINE:
+        return
+    delta = counter_delta(**kwargs)
+    if delta > 0:
+        timeline.backfill(instance.user_id, instance.author_id)
+    elif delta < 0:
+        # По таблице, а не по счётчику: его обновляет другой обработчик.
+        timeline.unfollowed(
+            instance.user_id, instance.author_id,
+            Follow.objects.filter(author=instance.author_id).count())
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'text' in update_fields:
+        search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.unindex_post(instance.pk)
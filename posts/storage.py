@@ -0,0 +1,88 @@
+"""Хранилище изображений постов по содержимому.
+
+Файл сохраняется под SHA-256 своего содержимого в каталогах по первым
+символам хеша: `posts/3f/a2/3fa2…e9.jpg`. Хеш считается по ходу записи
+загрузки во временный файл рядом, без второго чтения; если такой файл
+уже есть, временный удаляется, и посты ссылаются на одну копию. В одном
+каталоге оказывается не больше нескольких сотен файлов при любом их
+числе.
+
+Сколько постов ссылается на файл, хранит `ImageBlob.references`
+(обновляется сигналами, сверяется `manage.py recount`). Файлы не
+удаляются вместе с постами: это делает `manage.py collect_images`,
+пропуская свежие файлы, на которые пост мог ещё не успеть сослаться.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+# Временные файлы незавершённых загрузок.
+PARTIAL_SUFFIX = '.part'
+BLOB_NAME_RE = re.compile(r'^[0-9a-f]{64}\.\w+$')
+SHARD_RE = re.compile(r'^[0-9a-f]{2}$')
+
+
+def blob_name(directory, digest, extension):
+    return posixpath.join(
+        directory, digest[:2], digest[2:4], digest + extension)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage, где имя файла — хеш содержимого."""
+
+    def get_available_name(self, name, max_length=None):
+        # Имя выбирает _save по содержимому; совпадение имён — это
+        # совпадение содержимого, а не конфликт.
+        return name
+
+    def _save(self, name, content):
+        directory = posixpath.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        location = self.path(directory)
+        os.makedirs(location, exist_ok=True)
+        digest = hashlib.sha256()
+        descriptor, temporary = tempfile.mkstemp(
+            dir=location, suffix=PARTIAL_SUFFIX)
+        try:
+            with os.fdopen(descriptor, 'wb') as output:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    output.write(chunk)
+            name = blob_name(directory, digest.hexdigest(), extension)
+            path = self.path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if os.path.exists(path):
+                # Сборщик мусора не трогает свежие файлы: копия, на
+                # которую вот-вот сошлётся новый пост, должна остаться.
+                os.utime(path)
+                os.remove(temporary)
+            else:
+                os.chmod(temporary, self.file_permissions_mode or 0o644)
+                os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        return name
+
+    def blobs(self, directory):
+        """Имена файлов по содержимому и незавершённых загрузок."""
+        if not self.exists(directory):
+            return
+        shards, files = self.listdir(directory)
+        for name in files:
+            if name.endswith(PARTIAL_SUFFIX):
+                yield posixpath.join(directory, name)
+        for first in filter(SHARD_RE.match, shards):
+            parent = posixpath.join(directory, first)
+            for second in filter(SHARD_RE.match, self.listdir(parent)[0]):
+                shard = posixpath.join(parent, second)
+                for name in self.listdir(shard)[1]:
+                    if BLOB_NAME_RE.match(name):
+                        yield posixpath.join(shard, name)
@@ -0,0 +1,20 @@
+from django import template
+
+from posts.cache import post_version
+from posts.paginator import CursorPaginator
+
+register = template.Library()
+
+
+@register.filter
+def cache_version(post):
+    """Версия поста для ключа `{% cache %}`: сбрасывается при его изменении."""
+    return post_version(post.pk)
+
+
+@register.filter
+def feed_cursor(page):
+    """Курсор самого нового поста первой страницы ленты или ''."""
+    if page.has_previous() or not page:
+        return ''
+    return CursorPaginator.encode_cursor(page[0])
@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(PAGE_ITEMS=2)
+class FeedApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='apiAuthor')
+        cls.group = Group.objects.create(title='API', slug='api-group')
+        for i in range(3):
+            Post.objects.create(
+                author=cls.author, text=f'post {i}', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def texts(self, response):
+        return [post['text'] for post in response.json()['results']]
+
+    def test_feeds_use_cursor_pages(self):
+        for url in (reverse('api_index'),
+                    reverse('api_group', kwargs={'slug': 'api-group'}),
+                    reverse('api_profile', kwargs={'username': 'apiAuthor'})):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(self.texts(response), ['post 2', 'post 1'])
+                data = response.json()
+                self.assertIsNone(data['previous'])
+                older = self.client.get(data['next'])
+                self.assertEqual(self.texts(older), ['post 0'])
+                self.assertIsNone(older.json()['next'])
+
+    def test_if_none_match_skips_database(self):
+        response = self.client.get(reverse('api_index'))
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                reverse('api_index'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        Post.objects.create(author=FeedApiTest.author, text='new')
+        response = self.client.get(
+            reverse('api_index'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_edits_are_not_hidden_by_if_modified_since(self):
+        post = Post.objects.order_by('-pub_date', '-pk').first()
+        urls = (reverse('api_index'), reverse('api_post', kwargs={
+            'username': 'apiAuthor', 'post_id': post.pk}))
+        since = http_date()
+        for url in urls:
+            response = self.client.get(url)
+            self.assertNotIn('Last-Modified', response)
+        post.text = 'edited'
+        post.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'edited')
+
+    def test_post_detail_changes_with_comments(self):
+        post = Post.objects.get(text='post 0')
+        url = reverse('api_post', kwargs={
+            'username': 'apiAuthor', 'post_id': post.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.json()['comments'], [])
+        etag = response['ETag']
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Comment.objects.create(
+            author=FeedApiTest.author, post=post, text='comment')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [comment['text'] for comment in response.json()['comments']],
+            ['comment'])
+
+    def test_follow_feed_is_private(self):
+        url = reverse('api_follow_index')
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+        reader = User.objects.create(username='apiReader')
+        Follow.objects.create(user=reader, author=FeedApiTest.author)
+        self.client.force_login(reader)
+        response = self.client.get(url)
+        self.assertEqual(self.texts(response), ['post 2', 'post 1'])
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
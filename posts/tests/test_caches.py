@@ -1,13 +1,26 @@
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from posts.models import Post
+from posts.models import Comment, Follow, Group, Post
 
 User = get_user_model()
 
 PAGE_INDEX = 'index'
+PAGE_GROUP = 'group'
+PAGE_PROFILE = 'profile'
+PAGE_FOLLOW = 'follow_index'
+
+TEST_GROUP_SLUG = 'cache_group'
+
+
+def fetches_posts(context):
+    """Были ли среди запросов выборки самих постов ленты."""
+    return any('"posts_post"."text"' in query['sql']
+               for query in context.captured_queries)
 
 
 class CacheTest(TestCase):
@@ -21,18 +34,17 @@ class CacheTest(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.client = Client()
         self.client.force_login(self.user)
 
     def test_cache_index_page(self):
-
+        """Правка в обход сигналов не видна до очистки кеша."""
         response = self.client.get(reverse(PAGE_INDEX))
         content_befor = response.content
 
-        Post.objects.create(
-            author=CacheTest.user,
-            text='New test Text post'
-        )
+        Post.objects.filter(pk=CacheTest.post.pk).update(
+            text='Updated test text post')
 
         response = self.client.get(reverse(PAGE_INDEX))
         content_after = response.content
@@ -43,3 +55,135 @@ class CacheTest(TestCase):
         response = self.client.get(reverse(PAGE_INDEX))
         content_after = response.content
         self.assertNotEqual(content_befor, content_after, 'Кеши равны')
+
+    def test_cached_page_skips_posts_queries(self):
+        """Закешированная лента отдаётся без запросов к постам."""
+        self.client.get(reverse(PAGE_INDEX))
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse(PAGE_INDEX))
+        self.assertContains(response, CacheTest.post.text)
+        self.assertFalse(fetches_posts(context))
+
+    def test_new_post_invalidates_index(self):
+        """Новый пост виден в ленте уже на следующем запросе."""
+        self.client.get(reverse(PAGE_INDEX))
+        Post.objects.create(author=CacheTest.user, text='New test Text post')
+        response = self.client.get(reverse(PAGE_INDEX))
+        self.assertContains(response, 'New test Text post')
+
+
+class CacheInvalidationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='CacheAuthor')
+        cls.other = User.objects.create(username='CacheOther')
+        cls.reader = User.objects.create(username='CacheReader')
+        cls.group = Group.objects.create(
+            title='Cache Group',
+            slug=TEST_GROUP_SLUG,
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            group=cls.group,
+            text='cached group post',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.urls = {
+            PAGE_INDEX: reverse(PAGE_INDEX),
+            PAGE_GROUP: reverse(PAGE_GROUP, kwargs={'slug': TEST_GROUP_SLUG}),
+            PAGE_PROFILE: reverse(
+                PAGE_PROFILE, kwargs={'username': 'CacheAuthor'}),
+            PAGE_FOLLOW: reverse(PAGE_FOLLOW),
+        }
+
+    def warm_up(self):
+        for url in self.urls.values():
+            self.client.get(url)
+
+    def test_post_invalidates_all_feeds_showing_it(self):
+        self.warm_up()
+        Post.objects.create(
+            author=CacheInvalidationTest.author,
+            group=CacheInvalidationTest.group,
+            text='fresh post',
+        )
+        for name, url in self.urls.items():
+            with self.subTest(feed=name):
+                self.assertContains(self.client.get(url), 'fresh post')
+
+    def test_other_author_post_keeps_unrelated_feeds(self):
+        """Пост другого автора без группы не сбрасывает чужие ленты."""
+        self.warm_up()
+        Post.objects.create(author=CacheInvalidationTest.other, text='other')
+        for name in (PAGE_GROUP, PAGE_PROFILE, PAGE_FOLLOW):
+            with self.subTest(feed=name):
+                with CaptureQueriesContext(connection) as context:
+                    self.client.get(self.urls[name])
+                self.assertFalse(fetches_posts(context))
+        self.assertContains(self.client.get(self.urls[PAGE_INDEX]), 'other')
+
+    def test_comment_updates_post_fragment(self):
+        self.warm_up()
+        Comment.objects.create(
+            author=CacheInvalidationTest.reader,
+            post=CacheInvalidationTest.post,
+            text='comment',
+        )
+        for name, url in self.urls.items():
+            with self.subTest(feed=name):
+                self.assertContains(self.client.get(url), 'Комментариев: 1')
+
+    def test_group_rename_updates_feeds(self):
+        self.warm_up()
+        group = CacheInvalidationTest.group
+        group.slug = 'renamed_group'
+        group.save()
+        response = self.client.get(self.urls[PAGE_INDEX])
+        self.assertContains(response, '#renamed_group')
+
+    def test_follow_invalidates_follow_feed(self):
+        """Подписка сбрасывает ленту подписок читателя."""
+        # bulk_create не отправляет сигналы, ленты остаются прежними.
+        Post.objects.bulk_create([
+            Post(author=CacheInvalidationTest.other, text='bulk post')])
+        self.warm_up()
+        Follow.objects.create(
+            user=CacheInvalidationTest.reader,
+            author=CacheInvalidationTest.other,
+        )
+        response = self.client.get(self.urls[PAGE_FOLLOW])
+        self.assertContains(response, 'bulk post')
+
+
+class GroupsCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(title='Sidebar', slug='sidebar')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_groups_served_from_cache(self):
+        """Боковая панель групп не обращается к базе на каждом запросе."""
+        self.client.get(reverse(PAGE_INDEX))
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse(PAGE_INDEX))
+        self.assertContains(response, '#sidebar')
+        self.assertFalse(any('posts_group' in query['sql']
+                             for query in context.captured_queries))
+
+    def test_group_changes_invalidate_list(self):
+        self.client.get(reverse(PAGE_INDEX))
+        group = Group.objects.create(title='Fresh', slug='fresh')
+        self.assertContains(self.client.get(reverse(PAGE_INDEX)), '#fresh')
+        group.delete()
+        self.assertNotContains(
+            self.client.get(reverse(PAGE_INDEX)), '#fresh')
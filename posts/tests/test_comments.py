@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+PAGE_SIZE = 5
+
+
+@override_settings(COMMENT_PAGE_ITEMS=PAGE_SIZE)
+class CommentPagesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='threadAuthor')
+        cls.post = Post.objects.create(author=cls.author, text='thread')
+        kwargs = {'username': 'threadAuthor', 'post_id': cls.post.pk}
+        cls.post_url = reverse('post', kwargs=kwargs)
+        cls.more_url = reverse('post_comments', kwargs=kwargs)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def add_comments(self, count):
+        start = Comment.objects.count()
+        for i in range(start, start + count):
+            user = User.objects.create(username=f'commenter{i}')
+            Comment.objects.create(
+                author=user, post=CommentPagesTest.post, text=f'comment {i}')
+
+    def texts(self, response):
+        return [comment.text for comment in response.context['comments']]
+
+    def test_post_page_shows_newest_comments(self):
+        self.add_comments(PAGE_SIZE + 2)
+        response = self.client.get(self.post_url)
+        self.assertEqual(self.texts(response), [
+            f'comment {i}' for i in range(PAGE_SIZE + 1, 1, -1)])
+        self.assertContains(response, f'{self.more_url}?after=')
+
+    def test_load_more_returns_fragment(self):
+        self.add_comments(PAGE_SIZE + 2)
+        page = self.client.get(self.post_url).context['comment_page']
+        response = self.client.get(
+            self.more_url, {'after': page.next_cursor()})
+        self.assertTemplateUsed(response, 'include/comment_list.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(self.texts(response), ['comment 1', 'comment 0'])
+        self.assertNotContains(response, 'data-load-more')
+
+    def test_queries_do_not_grow_with_comments(self):
+        self.add_comments(2)
+        with self.assertNumQueries(2):
+            self.client.get(self.more_url)
+        self.add_comments(PAGE_SIZE * 3)
+        # Третий запрос проверяет, есть ли следующая порция.
+        with self.assertNumQueries(3):
+            response = self.client.get(self.more_url)
+        self.assertEqual(len(response.context['comments']), PAGE_SIZE)
+
+    def test_api_pages_comments(self):
+        self.add_comments(PAGE_SIZE + 1)
+        url = reverse('api_post', kwargs={
+            'username': 'threadAuthor', 'post_id': CommentPagesTest.post.pk})
+        data = self.client.get(url).json()
+        self.assertEqual(len(data['comments']), PAGE_SIZE)
+        data = self.client.get(data['comments_next']).json()
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']], ['comment 0'])
+        self.assertIsNone(data['comments_next'])
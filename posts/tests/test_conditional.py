@@ -0,0 +1,125 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(PAGE_CACHE_MAX_AGE=60)
+class ConditionalPagesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='condAuthor')
+        cls.group = Group.objects.create(title='Cond', slug='cond')
+        cls.post = Post.objects.create(
+            author=cls.author, text='text', group=cls.group)
+        cls.urls = {
+            'group': reverse('group', kwargs={'slug': 'cond'}),
+            'profile': reverse('profile', kwargs={'username': 'condAuthor'}),
+            'post': reverse('post', kwargs={
+                'username': 'condAuthor', 'post_id': cls.post.pk}),
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def revalidate(self, url, response, client=None):
+        return (client or self.client).get(
+            url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_pages_are_not_rendered(self):
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                response = self.client.get(url)
+                response = self.revalidate(url, response)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.templates, [])
+
+    def test_anonymous_pages_are_public(self):
+        response = self.client.get(self.urls['group'])
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=60', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+        self.assertNotIn('csrftoken', response.cookies)
+
+    def test_user_pages_are_private_and_per_user(self):
+        anonymous = self.client.get(self.urls['group'])
+        first, second = Client(), Client()
+        first.force_login(ConditionalPagesTest.author)
+        second.force_login(User.objects.create(username='condReader'))
+        response = first.get(self.urls['group'])
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotEqual(response['ETag'], anonymous['ETag'])
+        # ETag одного читателя не подходит другому.
+        response = self.revalidate(self.urls['group'], response, second)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '@condReader')
+
+    def test_new_post_changes_group_page(self):
+        response = self.client.get(self.urls['group'])
+        Post.objects.create(author=ConditionalPagesTest.author,
+                            text='new', group=ConditionalPagesTest.group)
+        response = self.revalidate(self.urls['group'], response)
+        self.assertContains(response, 'new')
+
+    def test_comment_changes_post_page(self):
+        url = self.urls['post']
+        response = self.client.get(url)
+        Comment.objects.create(
+            author=ConditionalPagesTest.author,
+            post=ConditionalPagesTest.post, text='comment')
+        response = self.revalidate(url, response)
+        self.assertEqual(response.status_code, 200)
+
+    def test_edit_is_not_hidden_by_if_modified_since(self):
+        url = self.urls['post']
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        since = http_date()
+        post = Post.objects.get(pk=ConditionalPagesTest.post.pk)
+        post.text = 'edited'
+        post.save()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertContains(response, 'edited')
+
+    def test_follow_changes_profile_for_reader(self):
+        reader = User.objects.create(username='condFollower')
+        client = Client()
+        client.force_login(reader)
+        url = self.urls['profile']
+        response = client.get(url)
+        Follow.objects.create(user=reader, author=ConditionalPagesTest.author)
+        response = self.revalidate(url, response, client)
+        self.assertContains(response, 'Отписаться')
+
+    def test_follow_state_changes_profile_etag(self):
+        first, second = (User.objects.create(username=f'condReader{n}')
+                         for n in (1, 2))
+        Follow.objects.create(user=second, author=ConditionalPagesTest.author)
+        client = Client()
+        client.force_login(first)
+        url = self.urls['profile']
+        response = client.get(url)
+        # Счётчик подписчиков автора остаётся прежним.
+        Follow.objects.create(user=first, author=ConditionalPagesTest.author)
+        Follow.objects.filter(user=second).delete()
+        response = self.revalidate(url, response, client)
+        self.assertContains(response, 'Отписаться')
+
+    def test_comment_changes_feed_pages(self):
+        for name in ('group', 'profile'):
+            with self.subTest(page=name):
+                url = self.urls[name]
+                response = self.client.get(url)
+                self.assertNotIn('Last-Modified', response)
+                Comment.objects.create(
+                    author=ConditionalPagesTest.author,
+                    post=ConditionalPagesTest.post, text='comment')
+                response = self.revalidate(url, response)
+                self.assertEqual(response.status_code, 200)
@@ -0,0 +1,94 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Post, UserStats
+
+User = get_user_model()
+
+TEST_AUTHOR = 'countedAuthor'
+TEST_READER = 'countedReader'
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username=TEST_AUTHOR)
+        cls.reader = User.objects.create(username=TEST_READER)
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_stats_created_for_new_user(self):
+        self.assertTrue(
+            UserStats.objects.filter(user=CountersTest.author).exists())
+
+    def test_post_and_comment_counters(self):
+        post = Post.objects.create(author=CountersTest.author, text='text')
+        self.assertEqual(self.stats(CountersTest.author).posts_count, 1)
+
+        comment = Comment.objects.create(
+            author=CountersTest.reader, post=post, text='comment')
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+        comment.text = 'edited comment'
+        comment.save()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1, 'Правка не меняет счётчик')
+
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+        post.delete()
+        self.assertEqual(self.stats(CountersTest.author).posts_count, 0)
+
+    def test_follow_counters(self):
+        follow = Follow.objects.create(
+            user=CountersTest.reader, author=CountersTest.author)
+        self.assertEqual(self.stats(CountersTest.author).followers_count, 1)
+        self.assertEqual(self.stats(CountersTest.reader).following_count, 1)
+
+        follow.delete()
+        self.assertEqual(self.stats(CountersTest.author).followers_count, 0)
+        self.assertEqual(self.stats(CountersTest.reader).following_count, 0)
+
+    def test_counter_never_goes_negative(self):
+        post = Post.objects.create(author=CountersTest.author, text='text')
+        UserStats.objects.filter(user=CountersTest.author).update(
+            posts_count=0)
+        post.delete()
+        self.assertEqual(self.stats(CountersTest.author).posts_count, 0)
+
+    def test_recount_repairs_drift(self):
+        post = Post.objects.create(author=CountersTest.author, text='text')
+        Comment.objects.create(
+            author=CountersTest.reader, post=post, text='comment')
+        Follow.objects.create(
+            user=CountersTest.reader, author=CountersTest.author)
+        Post.objects.update(comments_count=7)
+        UserStats.objects.update(
+            posts_count=5, followers_count=5, following_count=5)
+        UserStats.objects.filter(user=CountersTest.reader).delete()
+
+        out = StringIO()
+        call_command('recount', '--dry-run', stdout=out)
+        self.assertEqual(Post.objects.get().comments_count, 7)
+
+        call_command('recount', stdout=out)
+        post.refresh_from_db()
+        author = self.stats(CountersTest.author)
+        reader = self.stats(CountersTest.reader)
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(
+            (author.posts_count, author.followers_count,
+             author.following_count),
+            (1, 1, 0))
+        self.assertEqual(
+            (reader.posts_count, reader.followers_count,
+             reader.following_count),
+            (0, 0, 1))
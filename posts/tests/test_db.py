@@ -0,0 +1,58 @@
+import os
+import tempfile
+
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from yatube.db import database
+
+
+class DatabaseConfigTest(SimpleTestCase):
+    def test_sqlite_by_default(self):
+        config = database({}, 'db.sqlite3')
+        self.assertEqual(config, {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': 'db.sqlite3',
+            'CONN_MAX_AGE': 0,
+        })
+        config = database({'DB_CONN_MAX_AGE': '60'}, 'db.sqlite3', 600)
+        self.assertEqual(config['CONN_MAX_AGE'], 60)
+
+    def test_postgresql_behind_pgbouncer(self):
+        config = database({
+            'DB_ENGINE': 'postgresql',
+            'DB_NAME': 'yatube',
+            'DB_USER': 'yatube',
+            'DB_HOST': 'pgbouncer',
+            'DB_PORT': '6432',
+            'DB_PGBOUNCER': '1',
+        }, 'db.sqlite3', conn_max_age=600)
+        self.assertEqual(config['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(config['HOST'], 'pgbouncer')
+        self.assertEqual(config['CONN_MAX_AGE'], 600)
+        self.assertTrue(config['DISABLE_SERVER_SIDE_CURSORS'])
+
+
+# TestCase, а не SimpleTestCase: тест открывает соединение с базой.
+class SqlitePragmasTest(TestCase):
+    @override_settings(SQLITE_PRAGMAS={
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+    })
+    def test_pragmas_are_set_on_connect(self):
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = connections['default'].__class__(dict(
+                connections['default'].settings_dict,
+                NAME=os.path.join(directory, 'db.sqlite3')))
+            try:
+                with wrapper.cursor() as cursor:
+                    pragmas = [
+                        cursor.execute(f'PRAGMA {name}').fetchone()[0]
+                        for name in ('journal_mode', 'synchronous',
+                                     'busy_timeout')
+                    ]
+            finally:
+                wrapper.close()
+        # synchronous=NORMAL — это 1.
+        self.assertEqual(pragmas, ['wal', 1, 5000])
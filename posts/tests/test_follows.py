@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import follows
+from posts.models import Follow, Post, TimelineEntry, UserStats
+
+User = get_user_model()
+
+
+class FollowGraphTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='graphReader')
+        cls.authors = [User.objects.create(username=f'graphAuthor{i}')
+                       for i in range(3)]
+
+    def setUp(self):
+        cache.clear()
+
+    def counts(self, user):
+        stats = UserStats.objects.get(user=user)
+        return stats.following_count, stats.followers_count
+
+    def test_follow_is_idempotent(self):
+        reader, author = FollowGraphTest.reader, FollowGraphTest.authors[0]
+        self.assertTrue(follows.follow(reader, author))
+        with CaptureQueriesContext(connection) as context:
+            self.assertFalse(follows.follow(reader, author))
+        # Повтор — одна вставка без предварительной проверки.
+        statements = [query['sql'].split()[0] for query in context
+                      if 'posts_follow' in query['sql']]
+        self.assertEqual(statements, ['INSERT'])
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(self.counts(reader), (1, 0))
+        self.assertEqual(self.counts(author), (0, 1))
+        self.assertFalse(follows.follow(reader, reader))
+
+    def test_unfollow_is_idempotent(self):
+        reader, author = FollowGraphTest.reader, FollowGraphTest.authors[0]
+        follows.follow(reader, author)
+        self.assertTrue(follows.unfollow(reader, author))
+        self.assertFalse(follows.unfollow(reader, author))
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(self.counts(reader), (0, 0))
+        self.assertEqual(self.counts(author), (0, 0))
+
+    def test_bulk_follow_and_unfollow(self):
+        reader = FollowGraphTest.reader
+        first, second, third = [author.pk for author in self.authors]
+        Follow.objects.create(user=reader, author_id=first)
+        created = follows.follow_many([
+            (reader.pk, first), (reader.pk, second), (reader.pk, second),
+            (reader.pk, reader.pk), (third, second),
+        ])
+        self.assertEqual(created, 2)
+        self.assertEqual(self.counts(reader), (2, 0))
+        self.assertEqual(UserStats.objects.get(user=second).followers_count, 2)
+
+        deleted = follows.unfollow_many([(reader.pk, first), (third, first)])
+        self.assertEqual(deleted, 1)
+        self.assertEqual(self.counts(reader), (1, 0))
+        self.assertEqual(UserStats.objects.get(user=first).followers_count, 0)
+
+    def test_followed_authors_are_cached(self):
+        reader, author = FollowGraphTest.reader, FollowGraphTest.authors[0]
+        follows.follow(reader, author)
+        self.assertEqual(follows.followed_authors(reader), {author.pk})
+        # Другой запрос того же читателя берёт набор из кеша.
+        with self.assertNumQueries(0):
+            fresh = User(pk=reader.pk, username=reader.username)
+            self.assertTrue(follows.is_following(fresh, author))
+
+        follows.unfollow(reader, author)
+        self.assertFalse(follows.is_following(reader, author))
+
+    @override_settings(FOLLOW_TIMELINE=True)
+    def test_timeline_follows_graph(self):
+        reader, author = FollowGraphTest.reader, FollowGraphTest.authors[0]
+        Post.objects.create(author=author, text='text')
+        follows.follow(reader, author)
+        self.assertEqual(TimelineEntry.objects.filter(user=reader).count(), 1)
+        follows.unfollow(reader, author)
+        self.assertFalse(TimelineEntry.objects.filter(user=reader).exists())
+
+    def test_profile_buttons(self):
+        reader, author = FollowGraphTest.reader, FollowGraphTest.authors[0]
+        client = Client()
+        client.force_login(reader)
+        profile = reverse('profile', kwargs={'username': author.username})
+        client.get(reverse('profile_follow', kwargs={
+            'username': author.username}))
+        self.assertTrue(client.get(profile).context['following'])
+        client.get(reverse('profile_unfollow', kwargs={
+            'username': author.username}))
+        self.assertFalse(client.get(profile).context['following'])
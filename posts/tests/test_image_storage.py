@@ -0,0 +1,148 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts.models import ImageBlob, Post
+from posts.thumbnails import THUMBNAILS_DIR, stem
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+OLD = time.time() - 2 * 60 * 60
+
+
+def image_file(content=b'first image', name='photo.png'):
+    return SimpleUploadedFile(name, content, 'image/png')
+
+
+def references(name):
+    return ImageBlob.objects.get(name=name).references
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ImageStorageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='blobUser')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        os.makedirs(TEMP_MEDIA_ROOT)
+
+    def create(self, content=b'first image', name='photo.png'):
+        return Post.objects.create(
+            author=self.user, text='text', image=image_file(content, name))
+
+    def path(self, name):
+        return os.path.join(TEMP_MEDIA_ROOT, name)
+
+    def age(self, name):
+        os.utime(self.path(name), (OLD, OLD))
+
+    def collect(self, *options):
+        out = StringIO()
+        call_command('collect_images', *options, stdout=out)
+        return out.getvalue()
+
+    def test_same_content_stored_once(self):
+        first = self.create(name='first.PNG')
+        second = self.create(name='second.png')
+        digest = hashlib.sha256(b'first image').hexdigest()
+        expected = f'posts/{digest[:2]}/{digest[2:4]}/{digest}.png'
+        self.assertEqual(first.image.name, expected)
+        self.assertEqual(second.image.name, expected)
+        self.assertEqual(os.listdir(os.path.dirname(self.path(expected))),
+                         [f'{digest}.png'])
+        self.assertEqual(os.listdir(self.path('posts')), [digest[:2]])
+        self.assertEqual(references(expected), 2)
+
+    def test_references_follow_posts(self):
+        post = self.create()
+        first = post.image.name
+        post.image = image_file(b'second image')
+        post.save()
+        second = post.image.name
+        self.assertEqual((references(first), references(second)), (0, 1))
+        post.text = 'edited'
+        post.save()
+        self.assertEqual(references(second), 1)
+        post.delete()
+        self.assertEqual(references(second), 0)
+
+    def test_recount_repairs_references(self):
+        name = self.create().image.name
+        ImageBlob.objects.all().delete()
+        call_command('recount', stdout=StringIO())
+        self.assertEqual(references(name), 1)
+        ImageBlob.objects.update(references=5)
+        call_command('recount', stdout=StringIO())
+        self.assertEqual(references(name), 1)
+
+    def test_collect_removes_orphans(self):
+        kept = self.create().image.name
+        orphan = self.create(b'orphan').image.name
+        Post.objects.filter(image=orphan).delete()
+        unknown = 'posts/ab/cd/' + 'ab' * 32 + '.jpg'
+        os.makedirs(os.path.dirname(self.path(unknown)))
+        with open(self.path(unknown), 'wb') as file:
+            file.write(b'left by a failed request')
+        for name in (kept, orphan, unknown):
+            self.age(name)
+
+        self.assertIn('Будет удалено файлов: 2', self.collect('--dry-run'))
+        self.assertTrue(os.path.exists(self.path(orphan)))
+
+        self.assertIn('Удалено файлов: 2', self.collect())
+        self.assertFalse(os.path.exists(self.path(orphan)))
+        self.assertFalse(os.path.exists(self.path(unknown)))
+        self.assertTrue(os.path.exists(self.path(kept)))
+        self.assertFalse(ImageBlob.objects.filter(name=orphan).exists())
+
+    def test_collect_keeps_fresh_and_referenced_files(self):
+        fresh = self.create(b'fresh').image.name
+        Post.objects.filter(image=fresh).delete()
+        drifted = self.create(b'drifted').image.name
+        ImageBlob.objects.filter(name=drifted).update(references=0)
+        self.age(drifted)
+        self.assertIn('Удалено файлов: 0', self.collect())
+        self.assertTrue(os.path.exists(self.path(fresh)))
+        self.assertTrue(os.path.exists(self.path(drifted)))
+        self.assertIn('Удалено файлов: 1', self.collect('--min-age', '0'))
+        self.assertFalse(os.path.exists(self.path(fresh)))
+
+    def test_collect_removes_orphan_thumbnails(self):
+        kept = self.create().image.name
+        orphan = self.create(b'orphan').image.name
+        Post.objects.filter(image=orphan).delete()
+        thumbs = {}
+        for source in (kept, orphan):
+            for suffix in ('_900.jpg', '_450.webp'):
+                name = f'{THUMBNAILS_DIR}/{stem(source)}{suffix}'
+                default_storage.save(name, ContentFile(b'thumbnail'))
+                self.age(name)
+                thumbs.setdefault(source, []).append(name)
+        for name in (kept, orphan):
+            self.age(name)
+
+        self.assertIn('Удалено файлов: 3', self.collect())
+        for name in thumbs[orphan]:
+            self.assertFalse(os.path.exists(self.path(name)))
+        for name in thumbs[kept]:
+            self.assertTrue(os.path.exists(self.path(name)))
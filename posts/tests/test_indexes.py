@@ -0,0 +1,124 @@
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Comment, Follow, Group, Post
+from posts.paginator import CursorPaginator
+
+User = get_user_model()
+
+AUTHORS_COUNT = 5
+READERS_COUNT = 20
+GROUPS_COUNT = 10
+POSTS_PER_AUTHOR = 40
+PAGE_SIZE = 10
+
+
+def explain(queryset):
+    """Строки EXPLAIN QUERY PLAN для запроса, как его выполнит ORM."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'План запроса SQLite')
+class FeedIndexesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.authors = [
+            User.objects.create(username=f'indexAuthor{i}')
+            for i in range(AUTHORS_COUNT)
+        ]
+        readers = [
+            User.objects.create(username=f'indexReader{i}')
+            for i in range(READERS_COUNT)
+        ]
+        cls.reader = readers[0]
+        groups = [
+            Group.objects.create(title=f'Index Group {i}', slug=f'index{i}')
+            for i in range(GROUPS_COUNT)
+        ]
+        cls.group = groups[0]
+        Post.objects.bulk_create([
+            Post(author=author, text=f'post {i}',
+                 group=groups[i % GROUPS_COUNT] if i % 3 else None)
+            for author in cls.authors
+            for i in range(POSTS_PER_AUTHOR)
+        ])
+        cls.post = Post.objects.first()
+        Comment.objects.bulk_create([
+            Comment(author=cls.reader, post=post, text='comment')
+            for post in Post.objects.all()[:50]
+        ])
+        Follow.objects.bulk_create([
+            Follow(user=reader, author=author)
+            for reader in readers
+            for author in cls.authors[:2]
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertUsesIndex(self, queryset, index, sorted_by_index=True):
+        plan = explain(queryset)
+        self.assertTrue(
+            any(index in line for line in plan),
+            f'Запрос не использует {index}: {plan}')
+        for line in plan:
+            if 'posts_' in line:
+                self.assertIn('USING', line, f'Полный просмотр: {plan}')
+        if sorted_by_index:
+            self.assertFalse(
+                any('TEMP B-TREE' in line for line in plan),
+                f'Сортировка не по индексу: {plan}')
+
+    def test_index_feed(self):
+        self.assertUsesIndex(
+            Post.objects.feed()[:PAGE_SIZE], 'post_pub_date_idx')
+
+    def test_cursor_page(self):
+        """Страница по курсору тоже читается по индексу ленты."""
+        paginator = CursorPaginator(Post.objects.feed(), PAGE_SIZE)
+        with CaptureQueriesContext(connection) as context:
+            paginator.get_page(after=paginator.encode_cursor(self.post))
+        sql = context.captured_queries[0]['sql']
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            plan = [row[-1] for row in cursor.fetchall()]
+        self.assertTrue(
+            any('post_pub_date_idx' in line for line in plan), plan)
+        self.assertFalse(any('TEMP B-TREE' in line for line in plan), plan)
+
+    def test_group_feed(self):
+        self.assertUsesIndex(
+            self.group.posts.feed()[:PAGE_SIZE], 'post_group_pub_date_idx')
+
+    def test_profile_feed(self):
+        self.assertUsesIndex(
+            self.authors[0].posts.feed()[:PAGE_SIZE],
+            'post_author_pub_date_idx')
+
+    def test_follow_feed(self):
+        queryset = Post.objects.filter(
+            author__following__user=self.reader).feed()[:PAGE_SIZE]
+        self.assertUsesIndex(
+            queryset, 'post_author_pub_date_idx', sorted_by_index=False)
+
+    def test_post_comments(self):
+        self.assertUsesIndex(
+            self.post.comments.all(), 'comment_post_created_idx')
+
+    def test_follow_lookup(self):
+        queryset = Follow.objects.filter(
+            user=self.reader, author=self.authors[0])
+        # SQLite создаёт уникальное ограничение как автоиндекс таблицы.
+        self.assertUsesIndex(queryset, '(user_id=? AND author_id=?)')
+
+    def test_followers_lookup(self):
+        queryset = Follow.objects.filter(
+            author=self.authors[0]).values('user')
+        self.assertUsesIndex(queryset, 'follow_author_user_idx')
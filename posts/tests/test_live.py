@@ -0,0 +1,99 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.follows import follow
+from posts.models import Group, Post
+from posts.paginator import CursorPaginator
+
+User = get_user_model()
+
+
+class NewPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='liveAuthor')
+        cls.reader = User.objects.create(username='liveReader')
+        cls.group = Group.objects.create(title='Live', slug='live')
+        cls.post = Post.objects.create(author=cls.author, text='first')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(NewPostsTest.reader)
+        self.since = CursorPaginator.encode_cursor(NewPostsTest.post)
+
+    def poll(self, url, client=None, **headers):
+        client = client or self.client
+        return client.get(url, {'since': self.since}, **headers)
+
+    def test_without_cursor_returns_newest(self):
+        response = self.client.get(reverse('api_index_new'))
+        self.assertEqual(response.json(), {
+            'count': 0, 'more': False, 'cursor': self.since})
+        self.assertIn('Accept', response['Vary'])
+
+    def test_counts_newer_posts(self):
+        post = Post.objects.create(author=NewPostsTest.author, text='second')
+        data = self.poll(reverse('api_index_new')).json()
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['cursor'], CursorPaginator.encode_cursor(post))
+
+    @override_settings(NEW_POSTS_LIMIT=1)
+    def test_count_is_limited(self):
+        for text in ('second', 'third'):
+            Post.objects.create(author=NewPostsTest.author, text=text)
+        data = self.poll(reverse('api_index_new')).json()
+        self.assertEqual((data['count'], data['more']), (1, True))
+
+    def test_unchanged_feed_answers_304_without_queries(self):
+        url = reverse('api_index_new')
+        etag = self.poll(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.poll(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Post.objects.create(author=NewPostsTest.author, text='second')
+        response = self.poll(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+
+    def test_group_and_follow_feeds(self):
+        Post.objects.create(author=NewPostsTest.author, text='no group')
+        Post.objects.create(
+            author=NewPostsTest.reader, group=NewPostsTest.group, text='own')
+        group_url = reverse('api_group_new', kwargs={'slug': 'live'})
+        follow_url = reverse('api_follow_new')
+        self.assertEqual(self.poll(group_url).json()['count'], 1)
+        self.assertEqual(self.poll(follow_url).status_code, 401)
+
+        follow(NewPostsTest.reader, NewPostsTest.author)
+        response = self.poll(follow_url, self.reader_client)
+        self.assertEqual(response.json()['count'], 1)
+        self.assertIn('private', response['Cache-Control'])
+
+        response = self.client.get(
+            reverse('api_group_new', kwargs={'slug': 'missing'}))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(NEW_POSTS_STREAM_SECONDS=0)
+    def test_stream_sends_event(self):
+        Post.objects.create(author=NewPostsTest.author, text='second')
+        response = self.poll(
+            reverse('api_index_new'), HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertIn('Accept', response['Vary'])
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn('event: new-posts', body)
+        data = body.split('data: ', 1)[1].split('\n', 1)[0]
+        self.assertEqual(json.loads(data)['count'], 1)
+
+    def test_feed_page_has_cursor(self):
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, f'data-feed-cursor="{self.since}"')
+        self.assertContains(response, reverse('api_index_new'))
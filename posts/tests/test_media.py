@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+
+from django.core.signals import request_finished
+from django.db import close_old_connections
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils.http import http_date
+
+from yatube.media import serve
+
+CONTENT = bytes(range(256)) * 1024
+
+
+class MediaServeTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.root, 'posts'))
+        cls.path = os.path.join(cls.root, 'posts', 'image.jpg')
+        with open(cls.path, 'wb') as image:
+            image.write(CONTENT)
+        cls.settings = override_settings(MEDIA_ROOT=cls.root)
+        cls.settings.enable()
+        # response.close() шлёт request_finished; как и тестовый клиент,
+        # не трогаем при этом соединения с базой.
+        request_finished.disconnect(close_old_connections)
+
+    @classmethod
+    def tearDownClass(cls):
+        request_finished.connect(close_old_connections)
+        cls.settings.disable()
+        shutil.rmtree(cls.root)
+        super().tearDownClass()
+
+    def get(self, method='get', path='posts/image.jpg', **headers):
+        request = getattr(RequestFactory(), method)('/media/', **headers)
+        return serve(request, path)
+
+    def body(self, response):
+        content = b''.join(response.streaming_content)
+        response.close()
+        return content
+
+    def test_whole_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_ranges(self):
+        size = len(CONTENT)
+        cases = {
+            'bytes=10-19': (10, 19),
+            'bytes=100000-': (100000, size - 1),
+            'bytes=-5': (size - 5, size - 1),
+            'bytes=5-9999999': (5, size - 1),
+        }
+        for header, (start, end) in cases.items():
+            with self.subTest(header=header):
+                response = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(
+                    response['Content-Range'], f'bytes {start}-{end}/{size}')
+                self.assertEqual(self.body(response), CONTENT[start:end + 1])
+
+    def test_unsatisfiable_and_ignored_ranges(self):
+        response = self.get(HTTP_RANGE=f'bytes={len(CONTENT)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+        for header in ('bytes=0-1,5-6', 'lines=1-2'):
+            with self.subTest(header=header):
+                response = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 200)
+                response.close()
+
+    def test_conditional_requests(self):
+        response = self.get()
+        response.close()
+        etag = response['ETag']
+        self.assertEqual(
+            self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        modified = http_date(os.path.getmtime(self.path) + 1)
+        self.assertEqual(
+            self.get(HTTP_IF_MODIFIED_SINCE=modified).status_code, 304)
+
+        response = self.get(HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        response = self.get(HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        response.close()
+
+    def test_head(self):
+        response = self.get('head')
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+
+    def test_accel_headers(self):
+        with override_settings(MEDIA_ACCEL='x-accel-redirect',
+                               MEDIA_ACCEL_PREFIX='/protected/'):
+            response = self.get()
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected/posts/image.jpg')
+        self.assertEqual(response.content, b'')
+        with override_settings(MEDIA_ACCEL='x-sendfile'):
+            response = self.get()
+        self.assertEqual(response['X-Sendfile'], self.path)
+
+    def test_missing_and_outside_files(self):
+        for path in ('posts/missing.jpg', 'posts', '../secret.txt'):
+            with self.subTest(path=path):
+                with self.assertRaises(Http404):
+                    self.get(path=path)
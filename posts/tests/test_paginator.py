@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.paginator import CursorPage, CursorPaginator
+
+User = get_user_model()
+
+TEST_USERNAME = 'cursorUser'
+TEST_GROUP_SLUG = 'cursor_group'
+
+PAGE_INDEX = 'index'
+POSTS_COUNT = 25
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=TEST_USERNAME)
+        cls.group = Group.objects.create(
+            title='Cursor Group',
+            slug=TEST_GROUP_SLUG,
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                group=cls.group,
+                text=f'Test {i} Text',
+            )
+            for i in range(POSTS_COUNT)
+        ]
+        # Часть постов с одинаковой датой: порядок решает id.
+        Post.objects.filter(
+            pk__in=[post.pk for post in cls.posts[10:15]]
+        ).update(pub_date=cls.posts[10].pub_date)
+
+    def setUp(self):
+        self.client = Client()
+        self.paginator = CursorPaginator(Post.objects.feed(), 10)
+
+    def walk(self):
+        pages = [self.paginator.get_page()]
+        while pages[-1].has_next():
+            pages.append(
+                self.paginator.get_page(after=pages[-1].next_cursor()))
+        return pages
+
+    def test_walk_covers_feed_in_order(self):
+        """Курсоры обходят ленту целиком без пропусков и повторов."""
+        pages = self.walk()
+        walked = [post.pk for page in pages for post in page]
+        expected = list(Post.objects.order_by(
+            '-pub_date', '-pk').values_list('pk', flat=True))
+        self.assertEqual(walked, expected)
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertFalse(pages[0].has_previous())
+        self.assertTrue(pages[-1].has_previous())
+
+    def test_before_returns_previous_page(self):
+        """Курсор before возвращает предыдущую (более новую) страницу."""
+        first, second, third = self.walk()
+        back = self.paginator.get_page(before=third.previous_cursor())
+        self.assertEqual(list(back), list(second))
+        self.assertTrue(back.has_previous())
+        back = self.paginator.get_page(before=second.previous_cursor())
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_broken_cursor_returns_first_page(self):
+        for cursor in ('garbage', 'Zm9v', '!!!'):
+            with self.subTest(cursor=cursor):
+                page = self.paginator.get_page(after=cursor)
+                self.assertEqual(page[0], Post.objects.feed()[0])
+
+    def test_index_opts_into_cursor_mode(self):
+        """Параметр after переключает ленту в курсорный режим."""
+        response = self.client.get(reverse(PAGE_INDEX))
+        cursor = CursorPaginator.encode_cursor(
+            response.context['page'][9])
+        response = self.client.get(reverse(PAGE_INDEX), {'after': cursor})
+        page = response.context['page']
+        self.assertIsInstance(page, CursorPage)
+        self.assertEqual(len(page), 10)
+        self.assertContains(response, '?before=')
+        self.assertContains(response, '?after=')
+
+    @override_settings(FEED_PAGINATION='cursor')
+    def test_cursor_mode_setting(self):
+        """Курсорный режим можно включить для всех лент настройкой."""
+        response = self.client.get(
+            reverse('group', kwargs={'slug': TEST_GROUP_SLUG}))
+        self.assertIsInstance(response.context['page'], CursorPage)
+        self.assertNotContains(response, '?page=')
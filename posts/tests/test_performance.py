@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from yatube import performance
+
+User = get_user_model()
+
+
+@override_settings(PERFORMANCE_SAMPLE_RATE=1, PERFORMANCE_QUERY_BUDGET=20)
+class PerformanceMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='perfAuthor')
+        Post.objects.create(author=cls.author, text='text')
+
+    def setUp(self):
+        cache.clear()
+        performance._buffer.clear()
+
+    def last_record(self):
+        return performance.records()[-1]
+
+    def test_request_is_measured(self):
+        with self.assertLogs('yatube.performance', 'INFO'):
+            Client().get(reverse('index'))
+        record = self.last_record()
+        self.assertEqual(record['view'], 'index')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['template_ms'], 0)
+        self.assertGreater(record['cache_misses'], 0)
+        self.assertFalse(record['over_budget'])
+
+        Client().get(reverse('index'))
+        self.assertGreater(self.last_record()['cache_hits'], 0)
+
+    @override_settings(PERFORMANCE_QUERY_BUDGET=0)
+    def test_query_budget_is_flagged(self):
+        with self.assertLogs('yatube.performance', 'WARNING'):
+            Client().get(reverse('index'))
+        self.assertTrue(self.last_record()['over_budget'])
+
+    @override_settings(PERFORMANCE_SAMPLE_RATE=0)
+    def test_unsampled_request_is_skipped(self):
+        Client().get(reverse('index'))
+        self.assertEqual(performance.records(), [])
+
+    def test_endpoint_is_staff_only(self):
+        client = Client()
+        response = client.get(reverse('performance'))
+        self.assertEqual(response.status_code, 302)
+
+        client.force_login(User.objects.create(
+            username='perfStaff', is_staff=True))
+        client.get(reverse('index'))
+        data = client.get(reverse('performance')).json()
+        self.assertEqual(data['summary']['index']['requests'], 1)
+        self.assertEqual(data['requests'][0]['view'], 'index')
@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.cache import cached_groups
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+TEST_AUTHOR = 'feedAuthor'
+TEST_READER = 'feedReader'
+TEST_GROUP_SLUG = 'feed_group'
+
+FEW_POSTS = 2
+MANY_POSTS = 30
+
+
+class FeedQueryBudgetTest(TestCase):
+    """Число запросов ленты не зависит от количества постов на странице."""
+
+    # Ожидаемое число запросов для авторизованного читателя.
+    # У группы и профиля один из них — дата для Last-Modified.
+    # Сам читатель берётся из кеша (users/auth.py), в бюджет не входит.
+    budgets = {
+        'index': 4,
+        'group': 5,
+        'profile': 5,
+        'follow_index': 4,
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username=TEST_AUTHOR)
+        cls.reader = User.objects.create(username=TEST_READER)
+        cls.group = Group.objects.create(
+            title='Feed Group',
+            slug=TEST_GROUP_SLUG,
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        # Список групп живёт в кеше и в бюджет ленты не входит.
+        cache.clear()
+        cached_groups()
+        self.client = Client()
+        self.client.force_login(self.reader)
+        # Любой запрос кладёт читателя в кеш.
+        self.client.get(reverse('about:author'))
+
+    def create_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(
+                author=self.author,
+                group=self.group,
+                text=f'feed post {i}',
+            )
+            Comment.objects.create(
+                author=self.reader, post=post, text=f'comment {i}')
+
+    def urls(self):
+        return {
+            'index': reverse('index'),
+            'group': reverse('group', kwargs={'slug': TEST_GROUP_SLUG}),
+            'profile': reverse('profile', kwargs={'username': TEST_AUTHOR}),
+            'follow_index': reverse('follow_index'),
+        }
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_feed_query_budget(self):
+        """Лента укладывается в фиксированный бюджет запросов."""
+        self.create_posts(MANY_POSTS)
+        for name, url in self.urls().items():
+            with self.subTest(feed=name):
+                with self.assertNumQueries(self.budgets[name]):
+                    self.client.get(url)
+
+    def test_feed_queries_do_not_grow_with_posts(self):
+        """Запросов столько же, сколько и при паре постов на странице."""
+        self.create_posts(FEW_POSTS)
+        few = {name: self.count_queries(url)
+               for name, url in self.urls().items()}
+        self.create_posts(MANY_POSTS)
+        for name, url in self.urls().items():
+            with self.subTest(feed=name):
+                self.assertEqual(self.count_queries(url), few[name])
+
+    def test_feed_shows_comments_count(self):
+        """Число комментариев берётся из счётчика поста."""
+        self.create_posts(FEW_POSTS)
+        response = self.client.get(reverse('index'))
+        for post in response.context['page']:
+            with self.subTest(post=post.pk):
+                self.assertEqual(post.comments_count, 1)
@@ -0,0 +1,91 @@
+import unittest
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from posts.search import search
+from posts.tests.test_indexes import explain
+
+User = get_user_model()
+
+PAGE_SEARCH = 'search'
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='searchAuthor')
+        cls.first = Post.objects.create(
+            author=cls.author, text='Привет, мир! Первая запись')
+        cls.second = Post.objects.create(
+            author=cls.author, text='Вторая запись про котов')
+
+    def setUp(self):
+        cache.clear()
+
+    def found(self, query, queryset=None):
+        if queryset is None:
+            queryset = Post.objects.feed()
+        return list(search(queryset, query).values_list('text', flat=True))
+
+    def test_words_and_prefixes(self):
+        self.assertEqual(self.found('мир'), [SearchTest.first.text])
+        self.assertEqual(self.found('ЗАПИСЬ'),
+                         [SearchTest.second.text, SearchTest.first.text])
+        self.assertEqual(self.found('кот'), [SearchTest.second.text])
+        self.assertEqual(self.found('запись котов'), [SearchTest.second.text])
+        self.assertEqual(self.found('собак'), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.found('"мир" -(*'), [SearchTest.first.text])
+        self.assertEqual(self.found('  ,!  '), [])
+
+    def test_index_follows_changes(self):
+        post = Post.objects.create(author=SearchTest.author, text='синица')
+        self.assertEqual(self.found('синица'), ['синица'])
+        post.text = 'журавль'
+        post.save()
+        self.assertEqual(self.found('синица'), [])
+        self.assertEqual(self.found('журавль'), ['журавль'])
+        post.delete()
+        self.assertEqual(self.found('журавль'), [])
+
+    def test_rebuild_indexes_bulk_created_posts(self):
+        Post.objects.bulk_create([
+            Post(author=SearchTest.author, text='импорт')])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.found('импорт'), ['импорт'])
+
+    @override_settings(PAGE_ITEMS=1)
+    def test_search_page(self):
+        response = Client().get(reverse(PAGE_SEARCH), {'q': 'запись'})
+        self.assertEqual(response.context['query'], 'запись')
+        self.assertEqual(
+            list(response.context['page']), [SearchTest.second])
+        self.assertContains(response, '?q=%D0%B7%D0%B0%D0%BF%D0%B8%D1%81'
+                                      '%D1%8C&amp;page=2')
+
+    def test_admin_uses_search(self):
+        admin = User.objects.create_superuser(
+            'searchAdmin', 'admin@example.com', 'password')
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'котов'})
+        self.assertEqual(
+            list(response.context['cl'].queryset), [SearchTest.second])
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'План запроса SQLite')
+    def test_search_reads_fts_index(self):
+        plan = explain(search(Post.objects.feed(), 'запись')[:10])
+        self.assertTrue(any('posts_post_fts' in line for line in plan), plan)
+        self.assertTrue(
+            any('posts_post USING INTEGER PRIMARY KEY' in line
+                for line in plan), plan)
@@ -0,0 +1,121 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from wsgiref.util import setup_testing_defaults
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from yatube.staticfiles import StaticFiles, accepted_encodings
+
+STYLE = 'body { color: black; }\n' * 100
+
+
+class StaticFilesTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.source, 'css'))
+        with open(os.path.join(cls.source, 'css', 'site.css'), 'w') as css:
+            css.write(STYLE)
+        with open(os.path.join(cls.source, 'logo.png'), 'wb') as png:
+            png.write(b'\x89PNG' * 100)
+        with override_settings(
+                STATIC_ROOT=cls.root,
+                STATICFILES_DIRS=[cls.source],
+                STATICFILES_FINDERS=[
+                    'django.contrib.staticfiles.finders.FileSystemFinder'],
+                STATICFILES_STORAGE=(
+                    'yatube.staticfiles.'
+                    'CompressedManifestStaticFilesStorage')):
+            call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(cls.root, 'staticfiles.json')) as manifest:
+            cls.hashed = json.load(manifest)['paths']['css/site.css']
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.source)
+        shutil.rmtree(cls.root)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.app = StaticFiles(self.fallback, self.root, '/static/', 60)
+
+    def fallback(self, environ, start_response):
+        start_response('404 Not Found', [])
+        return [b'django']
+
+    def get(self, path, **extra):
+        environ = {'PATH_INFO': path, **extra}
+        setup_testing_defaults(environ)
+        result = {}
+
+        def start_response(status, headers):
+            result['status'] = status
+            result['headers'] = dict(headers)
+
+        body = b''.join(self.app(environ, start_response))
+        return result['status'], result['headers'], body
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        """Сжатые копии есть у текстовых файлов, но не у изображений."""
+        for name in ('css/site.css', self.hashed):
+            path = os.path.join(self.root, name)
+            with gzip.open(path + '.gz', 'rt') as compressed:
+                self.assertEqual(compressed.read(), STYLE)
+        self.assertFalse(
+            os.path.exists(os.path.join(self.root, 'logo.png.gz')))
+
+    def test_hashed_file_is_immutable(self):
+        status, headers, _ = self.get(f'/static/{self.hashed}')
+        self.assertEqual(status, '200 OK')
+        self.assertIn('immutable', headers['Cache-Control'])
+        _, headers, _ = self.get('/static/css/site.css')
+        self.assertEqual(headers['Cache-Control'], 'public, max-age=60')
+
+    def test_compressed_variant_by_accept_encoding(self):
+        url = f'/static/{self.hashed}'
+        _, headers, body = self.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(body).decode(), STYLE)
+        self.assertEqual(headers['Content-Length'], str(len(body)))
+
+        _, headers, body = self.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(body.decode(), STYLE)
+
+    def test_brotli_preferred_when_present(self):
+        path = os.path.join(self.root, 'css', 'site.css')
+        with open(path + '.br', 'wb') as output:
+            output.write(b'brotli')
+        try:
+            self.app = StaticFiles(self.fallback, self.root, '/static/')
+            _, headers, body = self.get(
+                '/static/css/site.css', HTTP_ACCEPT_ENCODING='gzip, br')
+        finally:
+            os.remove(path + '.br')
+        self.assertEqual(headers['Content-Encoding'], 'br')
+        self.assertEqual(body, b'brotli')
+
+    def test_not_modified_head_and_fallback(self):
+        url = f'/static/{self.hashed}'
+        _, headers, _ = self.get(url)
+        status, _, body = self.get(url, HTTP_IF_NONE_MATCH=headers['ETag'])
+        self.assertEqual((status, body), ('304 Not Modified', b''))
+
+        status, headers, body = self.get(url, REQUEST_METHOD='HEAD')
+        self.assertEqual((status, body), ('200 OK', b''))
+        self.assertEqual(headers['Content-Length'], str(len(STYLE)))
+
+        status, _, body = self.get('/static/missing.css')
+        self.assertEqual((status, body), ('404 Not Found', b'django'))
+
+    def test_accepted_encodings(self):
+        self.assertEqual(
+            accepted_encodings('gzip;q=1.0, br; q=0, identity'),
+            {'gzip', 'identity'})
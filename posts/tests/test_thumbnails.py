@@ -0,0 +1,121 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+from PIL import Image
+
+from posts import thumbnails
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_file(name='photo.png', size=(1200, 600)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color=(200, 10, 10)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0,
+                   POST_THUMBNAIL_WIDTHS=(900, 450))
+class ThumbnailsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='thumbUser')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_generate_stores_sizes_on_post(self):
+        post = Post.objects.create(
+            author=ThumbnailsTest.user, text='text', image=image_file())
+        thumbnails.generate(post.pk)
+        post.refresh_from_db()
+        self.assertEqual((post.thumbnail_width, post.thumbnail_height),
+                         (900, 450))
+        self.assertTrue(post.thumbnail.endswith('_900.jpg'))
+        self.assertIn('450w', post.thumbnail_srcset)
+        name = post.thumbnail[len(settings.MEDIA_URL):]
+        with Image.open(f'{TEMP_MEDIA_ROOT}/{name}') as image:
+            self.assertEqual(image.size, (900, 450))
+
+    def test_small_image_is_not_upscaled(self):
+        post = Post.objects.create(
+            author=ThumbnailsTest.user, text='text',
+            image=image_file(size=(300, 200)))
+        thumbnails.generate(post.pk)
+        post.refresh_from_db()
+        self.assertEqual((post.thumbnail_width, post.thumbnail_height),
+                         (300, 200))
+
+    def test_replaced_image_keeps_new_state(self):
+        """Миниатюры старого изображения не записываются в пост."""
+        post = Post.objects.create(
+            author=ThumbnailsTest.user, text='text', image=image_file())
+        save_variant = thumbnails.save_variant
+
+        def replace_image(*args):
+            Post.objects.filter(pk=post.pk).update(image='posts/other.png')
+            return save_variant(*args)
+
+        with mock.patch.object(thumbnails, 'save_variant', replace_image):
+            thumbnails.generate(post.pk)
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail, '')
+
+    def test_feed_renders_stored_thumbnail(self):
+        post = Post.objects.create(
+            author=ThumbnailsTest.user, text='text', image=image_file())
+        response = Client().get(reverse('index'))
+        self.assertContains(response, post.image.url)
+        thumbnails.generate(post.pk)
+        response = Client().get(reverse('index'))
+        post.refresh_from_db()
+        self.assertContains(response, f'src="{post.thumbnail}"')
+        self.assertContains(response, 'width="900" height="450"')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailsUploadTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='thumbUploader')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_upload_builds_thumbnails(self):
+        self.client.post(
+            reverse('new_post'), {'text': 'with image', 'image': image_file()})
+        post = Post.objects.get()
+        self.assertEqual(post.thumbnail_width, 900)
+
+    def test_edit_replaces_thumbnails(self):
+        self.client.post(
+            reverse('new_post'), {'text': 'with image', 'image': image_file()})
+        post = Post.objects.get()
+        self.client.post(
+            reverse('post_edit', kwargs={
+                'username': self.user.username, 'post_id': post.pk}),
+            {'text': 'edited', 'image': image_file('new.png', (600, 300))})
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail_width, 600)
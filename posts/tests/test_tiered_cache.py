@@ -0,0 +1,54 @@
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase
+
+from posts.cache import FEED_INDEX, feed_version, invalidate_feeds
+from yatube.cache import TieredCache
+
+
+def worker_cache(**options):
+    """Кеш ещё одного процесса поверх того же общего яруса."""
+    options = dict({'MAX_ENTRIES': 100, 'LOCAL_TIMEOUT': 10}, **options)
+    return TieredCache('shared', {'OPTIONS': options})
+
+
+class TieredCacheTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.shared = caches['shared']
+
+    def test_local_tier_expires(self):
+        local = worker_cache()
+        local.set('key', 'value')
+        self.shared.delete('key')
+        self.assertEqual(local.get('key'), 'value')
+        with mock.patch('yatube.cache.monotonic', return_value=10 ** 9):
+            self.assertIsNone(local.get('key'))
+
+    def test_local_tier_is_bounded(self):
+        local = worker_cache(MAX_ENTRIES=2)
+        local.set('a', 1)
+        local.set('b', 2)
+        local.get('a')
+        local.set('c', 3)
+        self.assertEqual(list(local._local), [
+            local.make_key('a'), local.make_key('c')])
+        # Вытесненная из памяти запись читается из общего яруса.
+        self.assertEqual(local.get('b'), 2)
+
+    def test_shared_tier_fills_local(self):
+        self.shared.set('key', 'value')
+        local = worker_cache()
+        self.assertEqual(local.get_many(['key', 'missing']), {'key': 'value'})
+        self.shared.delete('key')
+        self.assertEqual(local.get('key'), 'value')
+
+    def test_versions_invalidate_other_workers(self):
+        other = worker_cache()
+        old_key = f'page:{feed_version(FEED_INDEX)}'
+        other.set(old_key, 'old page')
+        invalidate_feeds(index=True)
+        new_key = f'page:{feed_version(FEED_INDEX)}'
+        self.assertNotEqual(new_key, old_key)
+        self.assertIsNone(other.get(new_key))
@@ -0,0 +1,163 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+
+from posts.follows import unfollow_many
+from posts.models import Follow, Post, TimelineEntry, UserStats
+from posts.paginator import CursorPage
+from posts.tests.test_indexes import explain
+from posts.timeline import follow_feed
+
+User = get_user_model()
+
+PAGE_FOLLOW = 'follow_index'
+
+
+@override_settings(FOLLOW_TIMELINE=True, TIMELINE_BATCH_SIZE=2,
+                   TIMELINE_FANOUT_LIMIT=3)
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='timelineAuthor')
+        cls.readers = [
+            User.objects.create(username=f'timelineReader{i}')
+            for i in range(3)
+        ]
+        cls.reader = cls.readers[0]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def follow(self, user, author):
+        return Follow.objects.create(user=user, author=author)
+
+    def feed(self, **params):
+        response = self.client.get(reverse(PAGE_FOLLOW), params)
+        return [post.text for post in response.context['page']]
+
+    def test_post_fans_out_to_followers(self):
+        for reader in self.readers:
+            self.follow(reader, TimelineTest.author)
+        post = Post.objects.create(author=TimelineTest.author, text='fan')
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(post=post).values_list(
+                'user', flat=True)),
+            {reader.pk for reader in self.readers})
+        self.assertEqual(self.feed(), ['fan'])
+
+    def test_follow_backfills_and_unfollow_cleans_up(self):
+        for i in range(3):
+            Post.objects.create(author=TimelineTest.author, text=f'old {i}')
+        self.follow(self.reader, TimelineTest.author)
+        self.assertEqual(self.feed(), ['old 2', 'old 1', 'old 0'])
+
+        Follow.objects.filter(
+            user=self.reader, author=TimelineTest.author).delete()
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.feed(), [])
+
+    def test_post_delete_removes_entries(self):
+        self.follow(self.reader, TimelineTest.author)
+        post = Post.objects.create(author=TimelineTest.author, text='gone')
+        post.delete()
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    def test_celebrity_posts_are_merged_on_read(self):
+        """Популярному автору рассылка не делается, посты видны в ленте."""
+        celebrity = User.objects.create(username='timelineCelebrity')
+        other = User.objects.create(username='timelineOther')
+        UserStats.objects.filter(user=celebrity).update(followers_count=10)
+        self.follow(self.reader, celebrity)
+        self.follow(self.reader, other)
+        Post.objects.create(author=other, text='regular')
+        Post.objects.create(author=celebrity, text='famous')
+        self.assertFalse(
+            TimelineEntry.objects.filter(author=celebrity).exists())
+        self.assertEqual(self.feed(), ['famous', 'regular'])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_catch_up_waits_for_commit(self):
+        self.follow(self.reader, TimelineTest.author)
+        self.follow(self.readers[1], TimelineTest.author)
+        Post.objects.create(author=TimelineTest.author, text='celebrity')
+        Follow.objects.filter(user=self.readers[1]).delete()
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    def test_cursor_pages_read_timeline(self):
+        self.follow(self.reader, TimelineTest.author)
+        for i in range(15):
+            Post.objects.create(author=TimelineTest.author, text=f'post {i}')
+        response = self.client.get(reverse(PAGE_FOLLOW), {'after': 'x'})
+        page = response.context['page']
+        self.assertIsInstance(page, CursorPage)
+        self.assertEqual(page.paginator.keys,
+                         ('timeline__pub_date', 'timeline__post_id'))
+        older = self.feed(after=page.next_cursor())
+        self.assertEqual(
+            older, [f'post {i}' for i in range(4, -1, -1)])
+
+    def test_rebuild_timeline(self):
+        self.follow(self.reader, TimelineTest.author)
+        Post.objects.bulk_create([
+            Post(author=TimelineTest.author, text='bulk')])
+        call_command('rebuild_timeline', self.reader.username,
+                     stdout=StringIO())
+        self.assertEqual(self.feed(), ['bulk'])
+
+    def test_timeline_read_is_index_range_scan(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('План запроса SQLite')
+        plan = explain(follow_feed(self.reader)[:10])
+        self.assertTrue(
+            any('timeline_user_pub_date_idx' in line for line in plan), plan)
+        self.assertFalse(any('TEMP B-TREE' in line for line in plan), plan)
+
+
+@override_settings(FOLLOW_TIMELINE=True, TIMELINE_FANOUT_LIMIT=1,
+                   THUMBNAIL_WORKERS=0)
+class TimelineCatchUpTest(TransactionTestCase):
+    """Ленты дополняются после коммита отписки."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='catchUpAuthor')
+        self.readers = [
+            User.objects.create(username=f'catchUpReader{i}')
+            for i in range(3)
+        ]
+        self.reader = self.readers[0]
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    follow = TimelineTest.follow
+    feed = TimelineTest.feed
+
+    def test_celebrity_posts_kept_when_followers_drop(self):
+        """Посты, написанные без рассылки, остаются в ленте и после
+        того, как автор перестал быть популярным."""
+        other = self.readers[1]
+        self.follow(self.reader, self.author)
+        self.follow(other, self.author)
+        Post.objects.create(author=self.author, text='celebrity')
+        self.assertEqual(self.feed(), ['celebrity'])
+        Follow.objects.filter(user=other).delete()
+        self.assertEqual(self.feed(), ['celebrity'])
+
+    def test_bulk_unfollow_catches_up(self):
+        for reader in self.readers:
+            self.follow(reader, self.author)
+        Post.objects.create(author=self.author, text='celebrity')
+        unfollow_many([(reader.pk, self.author.pk)
+                       for reader in self.readers[1:]])
+        self.assertEqual(self.feed(), ['celebrity'])
@@ -0,0 +1,131 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import transfer
+from posts.models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+class TransferTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='transferAuthor')
+        cls.reader = User.objects.create(username='transferReader')
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        group = Group.objects.create(title='Экспорт', description='d')
+        for i in range(3):
+            post = Post.objects.create(
+                author=TransferTest.author, group=group,
+                text=f'строка "{i}",\nвторая строка')
+            Comment.objects.create(
+                author=TransferTest.reader, post=post, text=f'comment {i}')
+        Follow.objects.create(
+            user=TransferTest.reader, author=TransferTest.author)
+
+    def snapshot(self):
+        return {
+            'groups': list(Group.objects.values_list(
+                'id', 'slug', 'title').order_by('id')),
+            'posts': list(Post.objects.values_list(
+                'id', 'author', 'group', 'text', 'pub_date',
+                'comments_count').order_by('id')),
+            'comments': list(Comment.objects.values_list(
+                'id', 'post', 'author', 'created').order_by('id')),
+            'follows': list(Follow.objects.values_list('user', 'author')),
+        }
+
+    def clear(self):
+        for model in (Follow, Comment, Post, Group):
+            model.objects.all().delete()
+
+    def call(self, name, *args):
+        call_command(name, self.directory.name, *args, stdout=StringIO())
+
+    def test_round_trip(self):
+        for data_format in transfer.FORMATS:
+            with self.subTest(format=data_format):
+                before = self.snapshot()
+                self.call('export_content', '--format', data_format)
+                self.clear()
+                self.call('import_content', '--format', data_format)
+                self.assertEqual(self.snapshot(), before)
+                stats = UserStats.objects.get(user=TransferTest.author)
+                self.assertEqual(
+                    (stats.posts_count, stats.followers_count), (3, 1))
+
+    def test_import_resets_sequences(self):
+        self.call('export_content')
+        self.clear()
+        with mock.patch.object(
+                transfer.connection.ops, 'sequence_reset_sql',
+                return_value=[]) as sequence_reset_sql:
+            self.call('import_content')
+        sequence_reset_sql.assert_called_once_with(
+            mock.ANY, [Group, Post, Comment, Follow])
+        post = Post.objects.create(author=TransferTest.author, text='new')
+        self.assertGreater(post.pk, max(Post.objects.exclude(
+            pk=post.pk).values_list('pk', flat=True)))
+
+    def test_import_resumes_from_checkpoint(self):
+        self.call('export_content')
+        before = self.snapshot()
+        self.clear()
+        save_batch = transfer.save_batch
+        calls = []
+
+        def interrupted(name, batch):
+            calls.append(name)
+            if name == 'post' and calls.count('post') == 2:
+                raise KeyboardInterrupt
+            save_batch(name, batch)
+
+        with mock.patch('posts.transfer.save_batch', interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                self.call('import_content', '--batch-size', '1')
+        self.assertEqual(Post.objects.count(), 1)
+
+        with mock.patch('posts.transfer.save_batch', interrupted):
+            self.call('import_content', '--batch-size', '1', '--resume')
+        self.assertEqual(self.snapshot(), before)
+        # Загруженные до сбоя группа и пост повторно не читаются.
+        self.assertEqual(calls.count('group'), 1)
+        self.assertEqual(calls.count('post'), 4)
+
+    def test_export_resumes_from_checkpoint(self):
+        write = json.dumps
+        written = []
+
+        def interrupted(*args, **kwargs):
+            written.append(args)
+            if len(written) == 2:
+                raise KeyboardInterrupt
+            return write(*args, **kwargs)
+
+        with mock.patch('posts.transfer.json.dumps', interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                self.call('export_content', '--models', 'post',
+                          '--chunk-size', '1')
+        self.call('export_content', '--models', 'post', '--resume')
+        with open(os.path.join(self.directory.name, 'post.jsonl')) as source:
+            ids = [json.loads(line)['id'] for line in source]
+        self.assertEqual(
+            ids, sorted(Post.objects.values_list('id', flat=True)))
+
+    def test_missing_slug_is_generated(self):
+        with open(os.path.join(self.directory.name, 'group.jsonl'), 'w') as f:
+            f.write(json.dumps({'id': 100, 'title': 'Новая группа',
+                                'slug': '', 'description': ''}) + '\n')
+        self.call('import_content', '--models', 'group')
+        self.assertEqual(Group.objects.get(pk=100).slug, 'novaya-gruppa')
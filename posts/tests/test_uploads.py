@@ -0,0 +1,108 @@
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.forms import PostForm
+from posts.models import Post
+from posts.uploads import LimitedUploadHandler
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+# Теги EXIF
+GPS_INFO = 0x8825
+ORIENTATION = 0x0112
+
+
+def jpeg_file(size=(400, 200), exif=None):
+    buffer = io.BytesIO()
+    image = Image.new('RGB', size, color=(10, 200, 10))
+    image.save(buffer, 'JPEG', exif=exif or b'')
+    return SimpleUploadedFile('photo.jpg', buffer.getvalue(), 'image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class UploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='uploadUser')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def upload(self, image):
+        return self.client.post(
+            reverse('new_post'), {'text': 'upload', 'image': image})
+
+    def stored_image(self):
+        post = Post.objects.get(text='upload')
+        with post.image.open('rb') as file, Image.open(file) as image:
+            image.load()
+            return image
+
+    def test_metadata_is_stripped(self):
+        exif = Image.Exif()
+        exif[GPS_INFO] = {1: 'N'}
+        self.upload(jpeg_file(exif=exif.tobytes()))
+        image = self.stored_image()
+        self.assertNotIn('exif', image.info)
+        self.assertEqual(image.size, (400, 200))
+
+    def test_orientation_is_applied(self):
+        exif = Image.Exif()
+        exif[ORIENTATION] = 6
+        self.upload(jpeg_file(exif=exif.tobytes()))
+        self.assertEqual(self.stored_image().size, (200, 400))
+
+    def test_request_files_are_not_replaced(self):
+        upload = jpeg_file()
+        files = {'image': upload}
+        form = PostForm({'text': 'upload'}, files)
+        self.assertTrue(form.is_valid())
+        self.assertIs(files['image'], upload)
+        self.assertIsNot(form.cleaned_data['image'], upload)
+
+    @override_settings(POST_IMAGE_MAX_SIDE=100)
+    def test_large_image_is_downscaled(self):
+        self.upload(jpeg_file())
+        self.assertEqual(self.stored_image().size, (100, 50))
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=1000)
+    def test_too_many_pixels_rejected(self):
+        response = self.upload(jpeg_file())
+        self.assertEqual(response.status_code, 200)
+        errors = response.context['form'].errors.as_data()
+        self.assertEqual(errors['image'][0].code, 'too_many_pixels')
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_BYTES=100)
+    def test_too_large_file_rejected(self):
+        form = PostForm({'text': 'upload'}, {'image': jpeg_file()})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors.as_data()['image'][0].code, 'too_large')
+
+    @override_settings(POST_IMAGE_MAX_BYTES=10)
+    def test_handler_stops_writing_over_limit(self):
+        handler = LimitedUploadHandler()
+        handler.new_file('image', 'photo.jpg', 'image/jpeg', 30)
+        for start in range(0, 30, 8):
+            handler.receive_data_chunk(b'x' * 8, start)
+        file = handler.file_complete(32)
+        self.assertTrue(file.too_large)
+        self.assertEqual(len(file.read()), 8)
+        file.close()
@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.cache import get_version
+from users.auth import version_key
+
+User = get_user_model()
+
+
+class CachedUserTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='cachedReader', password='old-password')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('about:author')
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertTrue(response.wsgi_request.user.is_authenticated)
+        return [query['sql'] for query in context.captured_queries
+                if 'FROM "auth_user"' in query['sql']]
+
+    def request_user(self):
+        return self.client.get(self.url).wsgi_request.user
+
+    def test_user_loaded_once(self):
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(self.user_queries(), [])
+        self.assertEqual(self.request_user().username, 'cachedReader')
+
+    def test_password_change_ends_other_sessions(self):
+        self.request_user()
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password')
+        user.save()
+        self.assertFalse(self.request_user().is_authenticated)
+
+    def test_deactivated_user_is_anonymous(self):
+        self.request_user()
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(self.request_user().is_authenticated)
+
+    def test_logout_resets_version(self):
+        self.request_user()
+        version = get_version(version_key(self.user.pk))
+        self.client.logout()
+        self.assertNotEqual(get_version(version_key(self.user.pk)), version)
+        self.assertFalse(self.request_user().is_authenticated)
@@ -0,0 +1,118 @@
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, features
+
+from .cache import invalidate_authors, invalidate_posts
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+THUMBNAILS_DIR = 'posts/thumbs'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+    return _executor
+
+
+def schedule(post):
+    """Поставить генерацию миниатюр в очередь после коммита поста.
+
+    При `THUMBNAIL_WORKERS = 0` миниатюры строятся сразу в том же потоке.
+    """
+    if not post.image:
+        return
+    pk = post.pk
+    if settings.THUMBNAIL_WORKERS:
+        transaction.on_commit(lambda: get_executor().submit(run, pk))
+    else:
+        transaction.on_commit(lambda: generate(pk))
+
+
+def run(pk):
+    close_old_connections()
+    try:
+        generate(pk)
+    except Exception:
+        logger.exception('Не удалось построить миниатюры поста %s', pk)
+    finally:
+        close_old_connections()
+
+
+def stem(source):
+    """Основа имён миниатюр исходника: `posts/ab/cd/<хеш>.png` → `<хеш>`."""
+    return os.path.splitext(os.path.basename(source))[0]
+
+
+def source_stem(name):
+    """Основа имени исходника по имени миниатюры `<основа>_<ширина>.jpg`."""
+    return os.path.splitext(os.path.basename(name))[0].rsplit('_', 1)[0]
+
+
+def save_variant(image, name, image_format):
+    # Исходники хранятся по хешу содержимого, поэтому миниатюра с тем же
+    # именем уже построена из тех же байтов для другого поста.
+    if default_storage.exists(name):
+        return default_storage.url(name)
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, quality=settings.THUMBNAIL_QUALITY)
+    name = default_storage.save(name, ContentFile(buffer.getvalue()))
+    return default_storage.url(name)
+
+
+def generate(pk):
+    """Построить миниатюры всех размеров и записать их адреса в пост."""
+    post = Post.objects.filter(pk=pk).only('image').first()
+    if post is None or not post.image:
+        return
+    source = post.image.name
+    base = stem(source)
+    webp = features.check('webp')
+
+    with post.image.open('rb') as file, Image.open(file) as original:
+        original = ImageOps.exif_transpose(original).convert('RGB')
+        main = None
+        jpeg_srcset, webp_srcset = [], []
+        for width in settings.POST_THUMBNAIL_WIDTHS:
+            image = original.copy()
+            # Маленькие изображения не увеличиваются.
+            image.thumbnail((width, image.height))
+            name = f'{THUMBNAILS_DIR}/{base}_{width}'
+            url = save_variant(image, f'{name}.jpg', 'JPEG')
+            jpeg_srcset.append(f'{url} {image.width}w')
+            if main is None:
+                main = (url, image.width, image.height)
+            if webp:
+                webp_url = save_variant(image, f'{name}.webp', 'WEBP')
+                webp_srcset.append(f'{webp_url} {image.width}w')
+
+    url, width, height = main
+    # Изображение могли заменить, пока строились миниатюры.
+    updated = Post.objects.filter(pk=pk, image=source).update(
+        thumbnail=url,
+        thumbnail_width=width,
+        thumbnail_height=height,
+        thumbnail_srcset=', '.join(jpeg_srcset),
+        thumbnail_webp_srcset=', '.join(webp_srcset),
+    )
+    if updated:
+        post = Post.objects.filter(pk=pk).values('author', 'group').first()
+        invalidate_authors([post['author']], groups=[post['group']])
+        invalidate_posts([pk])
@@ -0,0 +1,158 @@
+import logging
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+
+from .models import Follow, Post, TimelineEntry, UserStats
+from .thumbnails import get_executor
+
+logger = logging.getLogger(__name__)
+
+
+def is_celebrity(author_id):
+    """Автор с таким числом подписчиков, что рассылка ему не по карману."""
+    followers = UserStats.objects.filter(user=author_id).values_list(
+        'followers_count', flat=True).first() or 0
+    return followers > settings.TIMELINE_FANOUT_LIMIT
+
+
+def write_entries(entries):
+    """Сохранить записи ленты пачками, пропуская уже существующие."""
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= settings.TIMELINE_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out(post):
+    """Разослать новый пост в ленты подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    followers = Follow.objects.filter(author=post.author_id).values_list(
+        'user', flat=True)
+    write_entries(
+        TimelineEntry(user_id=user_id, post_id=post.pk,
+                      author_id=post.author_id, pub_date=post.pub_date)
+        for user_id in followers.iterator(
+            chunk_size=settings.TIMELINE_BATCH_SIZE)
+    )
+
+
+def celebrities(author_ids):
+    """Авторы из `author_ids`, которым рассылка сейчас не делается."""
+    return set(UserStats.objects.filter(
+        user__in=author_ids,
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).values_list('user', flat=True))
+
+
+def catch_up(author_id):
+    """Добавить последние посты автора в ленты всех его подписчиков.
+
+    Пока подписчиков больше TIMELINE_FANOUT_LIMIT, посты автора не
+    рассылаются и не добавляются новым подписчикам: лента читает их
+    из Post. Когда подписчиков становится меньше, чтение напрямую
+    прекращается, и ленты нужно дополнить; уже записанное пропускается.
+    """
+    posts = list(Post.objects.filter(author=author_id).values_list(
+        'pk', 'pub_date')[:settings.TIMELINE_BACKFILL])
+    followers = Follow.objects.filter(author=author_id).values_list(
+        'user', flat=True)
+    write_entries(
+        TimelineEntry(user_id=user_id, post_id=pk,
+                      author_id=author_id, pub_date=pub_date)
+        for user_id in followers.iterator(
+            chunk_size=settings.TIMELINE_BATCH_SIZE)
+        for pk, pub_date in posts
+    )
+
+
+def run_catch_up(author_id):
+    close_old_connections()
+    try:
+        catch_up(author_id)
+    except Exception:
+        logger.exception('Не удалось дополнить ленты подписчиков автора %s',
+                         author_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_catch_up(author_id):
+    """Дополнить ленты подписчиков автора после коммита, в фоновом пуле.
+
+    Записей может быть TIMELINE_BACKFILL на каждого подписчика, поэтому
+    запрос отписки их не ждёт. При `THUMBNAIL_WORKERS = 0` ленты
+    дополняются сразу после коммита.
+    """
+    if settings.THUMBNAIL_WORKERS:
+        transaction.on_commit(
+            lambda: get_executor().submit(run_catch_up, author_id))
+    else:
+        transaction.on_commit(lambda: catch_up(author_id))
+
+
+def backfill(user_id, author_id):
+    """Добавить в ленту нового подписчика последние посты автора."""
+    if is_celebrity(author_id):
+        return
+    posts = Post.objects.filter(author=author_id).values_list(
+        'pk', 'pub_date')[:settings.TIMELINE_BACKFILL]
+    write_entries(
+        TimelineEntry(user_id=user_id, post_id=pk,
+                      author_id=author_id, pub_date=pub_date)
+        for pk, pub_date in posts.iterator(
+            chunk_size=settings.TIMELINE_BATCH_SIZE)
+    )
+
+
+def drop(user_id, author_id):
+    """Убрать посты автора из ленты отписавшегося читателя."""
+    TimelineEntry.objects.filter(user=user_id, author=author_id).delete()
+
+
+def unfollowed(user_id, author_id, followers):
+    """Отписка одного читателя; `followers` — подписчиков автора после неё."""
+    drop(user_id, author_id)
+    if followers == settings.TIMELINE_FANOUT_LIMIT:
+        # Автор только что перестал быть популярным.
+        schedule_catch_up(author_id)
+
+
+def rebuild(user_id):
+    """Собрать ленту читателя заново по его текущим подпискам."""
+    TimelineEntry.objects.filter(user=user_id).delete()
+    authors = Follow.objects.filter(user=user_id).values_list(
+        'author', flat=True)
+    for author_id in authors:
+        backfill(user_id, author_id)
+
+
+def follow_feed(user):
+    """Посты авторов, на которых подписан пользователь.
+
+    Без `FOLLOW_TIMELINE` лента строится соединением с подписками.
+    С ним посты берутся из материализованной ленты в порядке её индекса,
+    а посты популярных авторов, которым рассылка не делается, читаются
+    из `Post` напрямую и добавляются к выборке.
+    """
+    posts = Post.objects.feed()
+    if not settings.FOLLOW_TIMELINE:
+        return posts.filter(author__following__user=user)
+
+    celebrities = list(Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).values_list('author', flat=True))
+    if not celebrities:
+        # Через F(), иначе Django 2.2 сортирует по timeline__post с
+        # подстановкой порядка модели Post и лишним соединением.
+        return posts.filter(timeline__user=user).order_by(
+            F('timeline__pub_date').desc(), F('timeline__post_id').desc())
+    timeline = TimelineEntry.objects.filter(user=user).values('post')
+    return posts.filter(Q(pk__in=timeline) | Q(author__in=celebrities))
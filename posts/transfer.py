@@ -0,0 +1,283 @@
+"""Потоковые выгрузка и загрузка содержимого в JSON Lines и CSV.
+
+Выгружаются группы, посты, комментарии и подписки — по файлу на модель
+(`group.jsonl`, `post.csv` и т. д.) в порядке первичного ключа через
+`iterator()`, поэтому память не зависит от объёма таблиц. Пользователи
+не выгружаются: ссылки на них пишутся именами и при загрузке ищутся
+одним запросом на пачку. Остальные записи сохраняют свои id.
+
+Загрузка идёт пачками через `bulk_create(ignore_conflicts=True)` в
+порядке зависимостей: группы, посты, комментарии, подписки. После
+каждой пачки в каталог пишется контрольная точка, и прерванную
+операцию можно продолжить с `--resume`; повторно записанные строки
+отбрасываются уникальными ключами.
+"""
+import csv
+import json
+import os
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+from pytils.translit import slugify
+
+from . import follows
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+FORMATS = ('jsonl', 'csv')
+# Порядок загрузки: модель читается после тех, на которые ссылается.
+MODELS = {
+    'group': Group,
+    'post': Post,
+    'comment': Comment,
+    'follow': Follow,
+}
+FIELDS = {
+    'group': ('id', 'title', 'slug', 'description'),
+    'post': ('id', 'author', 'group', 'text', 'pub_date', 'image'),
+    'comment': ('id', 'post', 'author', 'text', 'created'),
+    'follow': ('user', 'author'),
+}
+# Ссылки на пользователей, которые передаются именем.
+USER_FIELDS = ('author', 'user')
+FOREIGN_FIELDS = ('group', 'post')
+DATE_FIELDS = ('pub_date', 'created')
+CHECKPOINT = '.checkpoint.json'
+# Как часто печатать скорость, секунды
+REPORT_SECONDS = 2
+
+
+def path(directory, name, data_format):
+    return os.path.join(directory, f'{name}.{data_format}')
+
+
+def lookups(name):
+    """Поля values_list() для выгрузки модели."""
+    for field in FIELDS[name]:
+        if field in USER_FIELDS:
+            yield f'{field}__username'
+        elif field in FOREIGN_FIELDS:
+            yield f'{field}_id'
+        else:
+            yield field
+
+
+def encode(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+class Checkpoint:
+    """Состояние выгрузки или загрузки по моделям в файле каталога."""
+
+    def __init__(self, directory, resume):
+        self.path = os.path.join(directory, CHECKPOINT)
+        self.state = {}
+        if resume and os.path.exists(self.path):
+            with open(self.path) as checkpoint:
+                self.state = json.load(checkpoint)
+
+    def get(self, name):
+        return self.state.get(name)
+
+    def save(self, name, value):
+        self.state[name] = value
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w') as checkpoint:
+            json.dump(self.state, checkpoint)
+        os.replace(temporary, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Progress:
+    """Число обработанных строк и скорость, не чаще REPORT_SECONDS."""
+
+    def __init__(self, stdout, name, done=0):
+        self.stdout = stdout
+        self.name = name
+        self.done = done
+        self.count = 0
+        self.started = self.reported = time.monotonic()
+
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.count / elapsed if elapsed else 0
+
+    def update(self, count):
+        self.done += count
+        self.count += count
+        now = time.monotonic()
+        if now - self.reported >= REPORT_SECONDS:
+            self.reported = now
+            self.stdout.write(
+                f'{self.name}: {self.done} строк, {self.rate():.0f} строк/с')
+
+    def finish(self):
+        self.stdout.write(
+            f'{self.name}: готово, {self.done} строк '
+            f'({self.rate():.0f} строк/с)')
+
+
+def export_model(name, directory, data_format, checkpoint, chunk_size,
+                 stdout):
+    """Выгрузить модель в файл, продолжая с контрольной точки."""
+    state = checkpoint.get(name) or {'pk': 0, 'offset': 0, 'rows': 0}
+    fields = FIELDS[name]
+    rows = MODELS[name].objects.filter(pk__gt=state['pk']).order_by('pk')
+    rows = rows.values_list('pk', *lookups(name))
+    progress = Progress(stdout, name, state['rows'])
+
+    with open(path(directory, name, data_format), 'a+', newline='',
+              encoding='utf-8') as output:
+        # Хвост после контрольной точки записан не полностью.
+        output.truncate(state['offset'])
+        output.seek(state['offset'])
+        writer = csv.writer(output) if data_format == 'csv' else None
+        if writer and not state['offset']:
+            writer.writerow(fields)
+        chunk = 0
+        for pk, *values in rows.iterator(chunk_size=chunk_size):
+            values = [encode(value) for value in values]
+            if writer:
+                writer.writerow(values)
+            else:
+                output.write(json.dumps(
+                    dict(zip(fields, values)), ensure_ascii=False) + '\n')
+            chunk += 1
+            if chunk == chunk_size:
+                output.flush()
+                state = {'pk': pk, 'offset': output.tell(),
+                         'rows': progress.done + chunk}
+                checkpoint.save(name, state)
+                progress.update(chunk)
+                chunk = 0
+        output.flush()
+        if chunk:
+            state = {'pk': pk, 'offset': output.tell(),
+                     'rows': progress.done + chunk}
+            checkpoint.save(name, state)
+            progress.update(chunk)
+    progress.finish()
+    return progress.done
+
+
+def read_rows(file_path, data_format):
+    with open(file_path, newline='', encoding='utf-8') as source:
+        if data_format == 'csv':
+            yield from csv.DictReader(source)
+            return
+        for line in source:
+            if line.strip():
+                yield json.loads(line)
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def user_ids(batch):
+    """Словарь имя → id для пользователей, упомянутых в пачке."""
+    names = {row[field] for row in batch for field in USER_FIELDS
+             if row.get(field)}
+    found = dict(User.objects.filter(username__in=names).values_list(
+        'username', 'pk'))
+    missing = names - found.keys()
+    if missing:
+        raise CommandError(
+            f'Нет пользователей: {", ".join(sorted(missing)[:10])}')
+    return found
+
+
+def build(name, row, users):
+    """Экземпляр модели из строки файла."""
+    values = {}
+    for field in FIELDS[name]:
+        value = row.get(field)
+        if value in ('', None):
+            value = None
+        if field in USER_FIELDS:
+            values[f'{field}_id'] = users[value]
+        elif field in FOREIGN_FIELDS:
+            values[f'{field}_id'] = value and int(value)
+        elif field in DATE_FIELDS:
+            values[field] = parse_datetime(value)
+        elif field == 'id':
+            values[field] = int(value)
+        else:
+            values[field] = value or ''
+    if name == 'group' and not values['slug']:
+        values['slug'] = slugify(values['title'])[:50]
+    return MODELS[name](**values)
+
+
+@contextmanager
+def keep_dates(model):
+    """Не подменять даты из файла текущим временем (auto_now_add)."""
+    fields = [field for field in model._meta.fields
+              if getattr(field, 'auto_now_add', False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def save_batch(name, batch):
+    users = user_ids(batch)
+    if name == 'follow':
+        follows.follow_many(
+            (users[row['user']], users[row['author']]) for row in batch)
+        return
+    model = MODELS[name]
+    objects = [build(name, row, users) for row in batch]
+    with keep_dates(model), transaction.atomic():
+        model.objects.bulk_create(objects, ignore_conflicts=True)
+
+
+def reset_sequences(names):
+    """Сдвинуть последовательности первичных ключей за загруженные id.
+
+    Записи вставляются со своими id, и в PostgreSQL счётчик таблицы
+    остаётся прежним: следующий INSERT без id получил бы занятый ключ.
+    Так же поступает loaddata; в SQLite запросов нет.
+    """
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [MODELS[name] for name in names])
+    if not statements:
+        return
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def import_model(name, directory, data_format, checkpoint, batch_size,
+                 stdout):
+    """Загрузить модель из файла пачками, продолжая с контрольной точки."""
+    done = checkpoint.get(name) or 0
+    rows = islice(read_rows(path(directory, name, data_format), data_format),
+                  done, None)
+    progress = Progress(stdout, name, done)
+    for batch in batches(rows, batch_size):
+        save_batch(name, batch)
+        checkpoint.save(name, progress.done + len(batch))
+        progress.update(len(batch))
+    progress.finish()
+    return progress.count
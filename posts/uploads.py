@@ -0,0 +1,75 @@
+import os
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from PIL import Image, ImageOps
+
+# Форматы, в которых изображение сохраняется как было загружено;
+# остальные перекодируются в JPEG или PNG.
+KEPT_FORMATS = {'JPEG': '.jpg', 'PNG': '.png', 'GIF': '.gif', 'WEBP': '.webp'}
+# Режимы, которые можно записать в JPEG без преобразования.
+JPEG_MODES = ('RGB', 'L', 'CMYK')
+EXIF_ORIENTATION = 0x0112
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загружаемый файл на диск кусками, не больше лимита.
+
+    Всё, что сверх `POST_IMAGE_MAX_BYTES`, отбрасывается, а файл
+    помечается как `too_large`, чтобы форма вернула понятную ошибку.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received <= settings.POST_IMAGE_MAX_BYTES:
+            self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.too_large = file_size > settings.POST_IMAGE_MAX_BYTES
+        return file
+
+
+def normalize(upload):
+    """Перекодировать изображение без метаданных, уменьшив слишком большое.
+
+    JPEG сразу декодируется в уменьшенном масштабе (`draft`), так что
+    полноразмерный растр в памяти не строится.
+    """
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    upload.seek(0)
+    with Image.open(upload) as image:
+        image_format = image.format
+        scale = min(1, max_side / max(image.size))
+        image.draft('RGB', (round(image.width * scale),
+                            round(image.height * scale)))
+        icc_profile = image.info.get('icc_profile')
+        # exif_transpose копирует растр даже без поворота.
+        if image.getexif().get(EXIF_ORIENTATION, 1) != 1:
+            image = ImageOps.exif_transpose(image)
+        image.load()
+        image.thumbnail((max_side, max_side))
+
+    if image_format not in KEPT_FORMATS:
+        has_alpha = image.mode in ('RGBA', 'LA', 'P')
+        image_format = 'PNG' if has_alpha else 'JPEG'
+    options = {}
+    if image_format == 'JPEG':
+        if image.mode not in JPEG_MODES:
+            image = image.convert('RGB')
+        options['quality'] = settings.POST_IMAGE_QUALITY
+    if icc_profile and image_format != 'GIF':
+        options['icc_profile'] = icc_profile
+
+    name = os.path.splitext(upload.name)[0] + KEPT_FORMATS[image_format]
+    result = TemporaryUploadedFile(
+        name, Image.MIME[image_format], 0, None)
+    image.save(result, image_format, **options)
+    result.size = result.tell()
+    result.seek(0)
+    return result
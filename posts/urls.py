@@ -1,12 +1,23 @@
 from django.urls import path
 
-from . import views
+from . import api, views
 
 urlpatterns = [
+    path('api/v1/', api.index, name='api_index'),
+    path('api/v1/group/<slug:slug>/', api.group_posts, name='api_group'),
+    path('api/v1/follow/', api.follow_index, name='api_follow_index'),
+    path('api/v1/new/', api.index_new, name='api_index_new'),
+    path('api/v1/group/<slug:slug>/new/', api.group_new, name='api_group_new'),
+    path('api/v1/follow/new/', api.follow_new, name='api_follow_new'),
+    path('api/v1/<str:username>/', api.profile, name='api_profile'),
+    path('api/v1/<str:username>/<int:post_id>/',
+         api.post_view, name='api_post'),
+
     path('', views.index, name='index'),
 
     path('group/<slug:slug>/', views.group_posts, name='group'),
     path('new/', views.new_post, name='new_post'),
+    path('search/', views.search_posts, name='search'),
 
     path('follow/', views.follow_index, name='follow_index'),
     path('<str:username>/follow/',
@@ -21,4 +32,6 @@ urlpatterns = [
 
     path('<str:username>/<int:post_id>/comment/',
          views.add_comment, name='add_comment'),
+    path('<str:username>/<int:post_id>/comments/',
+         views.post_comments, name='post_comments'),
 ]
@@ -1,36 +1,56 @@
-from django.conf import settings as set
 from django.contrib import auth
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect, render
 
+from . import follows, thumbnails
+from .cache import (
+    FEED_FOLLOW, FEED_GROUP, FEED_INDEX, FEED_PROFILE, feed_version,
+    render_feed,
+)
+from .conditional import (
+    cacheable, latest_date, not_modified, page_etag, stats_key,
+)
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
+from .models import Group, Post
+from .paginator import paginate, paginate_comments
+from .search import search
+from .timeline import follow_feed
 
 User = get_user_model()
 
 
 def index(request):
-    posts = Post.objects.all()
-    paginator = Paginator(posts, set.PAGE_ITEMS)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    groups = Group.objects.all()
+    posts = Post.objects.feed()
+    page, feed = render_feed(request, posts, FEED_INDEX)
     return render(
-        request, 'index.html', {'page': page, 'groups': groups})
+        request, 'index.html',
+        {'page': page, 'feed': feed})
 
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, set.PAGE_ITEMS)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    groups = Group.objects.all()
-    return render(
-        request, 'group.html',
-        {'group': group, 'page': page, 'groups': groups})
+    posts = group.posts.feed()
+    # Счётчики читателя выводит user_card.html.
+    # Last-Modified не выставляется: правки постов и новые комментарии
+    # не сдвигают дат публикации, их учитывает только версия ленты в ETag.
+    etag = page_etag(request, group.title, group.description,
+                     stats_key(request.user),
+                     feed_version(FEED_GROUP, group.pk))
+    response = not_modified(request, etag)
+    if response is None:
+        page, feed = render_feed(request, posts, FEED_GROUP, group.pk)
+        response = render(
+            request, 'group.html',
+            {'group': group, 'page': page, 'feed': feed})
+    return cacheable(request, response, etag)
+
+
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    posts = search(Post.objects.feed(), query)
+    page = paginate(request, posts)
+    return render(request, 'search.html', {'page': page, 'query': query})
 
 
 @login_required
@@ -40,46 +60,70 @@ def new_post(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        thumbnails.schedule(post)
         return redirect('index')
 
     return render(request, 'new.html', {'form': form})
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    user = request.user
-    following = None
-    if user.is_active:
-        following = Follow.objects.filter(user=user, author=author)
-    # posts = Post.objects.filter(author=author)
-    posts = author.posts.all()
-    posts_count = posts.count()
-    paginator = Paginator(posts, set.PAGE_ITEMS)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    groups = Group.objects.all()
-    return render(request, 'profile.html', {
-        'author': author,
-        'page': page,
-        # 'posts_count': posts_count,
-        'following': following, 
-        'groups': groups,
-    })
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username)
+    following = follows.is_following(request.user, author)
+    posts = author.posts.feed()
+    # Кнопка «Подписаться»/«Отписаться» зависит от читателя; без
+    # Last-Modified по той же причине, что и у страницы группы.
+    etag = page_etag(request, author.username, author.get_full_name(),
+                     stats_key(author), feed_version(FEED_PROFILE, author.pk),
+                     following)
+    response = not_modified(request, etag)
+    if response is None:
+        page, feed = render_feed(request, posts, FEED_PROFILE, author.pk)
+        response = render(request, 'profile.html', {
+            'author': author,
+            'page': page,
+            'feed': feed,
+            # 'posts_count': posts_count,
+            'following': following,
+        })
+    return cacheable(request, response, etag)
 
 
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    posts_count = post.author.posts.count()
-    comments = post.comments.all()
-    form = CommentForm()
-    groups = Group.objects.all()
-    return render(request, 'post.html', {
-        'form': form,
+    post = get_object_or_404(
+        Post.objects.feed().select_related('author__stats'),
+        id=post_id, author__username=username)
+    author = post.author
+    # Без Last-Modified, как у лент: правка поста и удаление комментария
+    # не сдвигают дат.
+    etag = page_etag(
+        request, post.text, post.group_id, post.image.name, post.thumbnail,
+        post.comments_count, author.username, author.get_full_name(),
+        stats_key(author), latest_date(post.comments.all(), 'created'))
+    response = not_modified(request, etag)
+    if response is None:
+        form = CommentForm()
+        comment_page = paginate_comments(request, post)
+        response = render(request, 'post.html', {
+            'form': form,
+            'post': post,
+            'author': author,
+            'comments': comment_page.object_list,
+            'comment_page': comment_page,
+        })
+    return cacheable(request, response, etag)
+
+
+def post_comments(request, username, post_id):
+    """Следующая порция комментариев поста — фрагмент для «Показать ещё»."""
+    post = get_object_or_404(
+        Post.objects.select_related('author'),
+        id=post_id, author__username=username)
+    comment_page = paginate_comments(request, post)
+    return render(request, 'include/comment_list.html', {
         'post': post,
-        'posts_count': posts_count,
-        'author': post.author,
-        'comments': comments,
-        'groups': groups,
+        'comments': comment_page.object_list,
+        'comment_page': comment_page,
     })
 
 
@@ -93,7 +137,12 @@ def post_edit(request, username, post_id):
     form = PostForm(
         request.POST or None, files=request.FILES or None, instance=post)
     if form.is_valid():
-        form.save()
+        post = form.save(commit=False)
+        if 'image' in form.changed_data:
+            post.reset_thumbnail()
+        post.save()
+        if 'image' in form.changed_data:
+            thumbnails.schedule(post)
         return redirect('post', username=username, post_id=post_id)
 
     form = PostForm(instance=post)
@@ -125,40 +174,25 @@ def add_comment(request, username, post_id):
 @login_required
 def follow_index(request):
     user = request.user
-    posts = Post.objects.filter(author__following__user=user)
-    paginator = Paginator(posts, set.PAGE_ITEMS)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    groups = Group.objects.all()
+    posts = follow_feed(user)
+    page, feed = render_feed(request, posts, FEED_FOLLOW, user.pk)
     return render(
         request, 'follow.html', {
             'page': page,
-            'paginator': paginator,
-            'groups': groups,
-    })
+            'feed': feed,
+            'paginator': page.paginator,
+        })
 
 
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    user = request.user
-
-    follow = Follow.objects.filter(user=user, author=author).exists()
-
-    if author == user or follow:
-        return redirect('profile', username=username)
-
-    Follow.objects.create(
-        user=user,
-        author=author,
-    )
+    follows.follow(request.user, author)
     return redirect('profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    user = request.user
-    object = Follow.objects.filter(user=user, author__username=username)
-    if object.exists():
-        object.delete()
+    author = get_object_or_404(User, username=username)
+    follows.unfollow(request.user, author)
     return redirect('profile', username=username)
@@ -1,4 +1,14 @@
+import pytest
+
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    # Для тестов с загрузкой изображений: файлы — во временный каталог,
+    # миниатюры — сразу, без фоновой задачи, пережившей бы тест.
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.THUMBNAIL_WORKERS = 0
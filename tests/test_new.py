@@ -56,6 +56,7 @@ class TestNewView:
         file_obj.seek(0)
         return File(file_obj, name=name)
 
+    @pytest.mark.usefixtures('media_root')
     @pytest.mark.django_db(transaction=True)
     def test_new_view_post(self, user_client, user, group):
         text = 'Проверка нового поста!'
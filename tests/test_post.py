@@ -148,6 +148,7 @@ class TestPostEditView:
         file_obj.seek(0)
         return File(file_obj, name=name)
 
+    @pytest.mark.usefixtures('media_root')
     @pytest.mark.django_db(transaction=True)
     def test_post_edit_view_author_post(self, user_client, post_with_group):
         text = 'Проверка изменения поста!'
@@ -0,0 +1,64 @@
+"""Пользователь запроса из кеша вместо SELECT по auth_user.
+
+`CachedAuthenticationMiddleware` заменяет стандартную: пользователь,
+однажды прошедший проверку сессии, хранится в кеше под ключом из его id,
+версии и хеша аутентификации из сессии (`HASH_SESSION_KEY`). Хеш
+зависит от пароля, поэтому запись находится только для сессий, которые
+стандартная проверка признала бы действительными. Версия пользователя
+сбрасывается при любом сохранении или удалении пользователя (смена
+пароля, блокировка, вход) и при выходе (см. signals.py), так что
+закешированный объект не переживает изменений. Промах кеша проверяется
+штатным `django.contrib.auth.get_user`, в том числе со сбросом сессии
+при несовпадении хеша.
+
+Связанные объекты (счётчики `stats`) в кеш не попадают и читаются
+из базы как обычно.
+"""
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from posts.cache import get_version, shared_cache
+
+
+def version_key(user_id):
+    return f'user:{user_id}:version'
+
+
+def user_key(user_id, session_hash):
+    return f'user:{user_id}:{get_version(version_key(user_id))}:{session_hash}'
+
+
+def forget_user(user_id):
+    """Сделать недоступными все закешированные копии пользователя."""
+    shared_cache().delete(version_key(user_id))
+
+
+def get_user(request):
+    session = request.session
+    try:
+        user_id = auth._get_user_session_key(request)
+        backend_path = session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    session_hash = session.get(HASH_SESSION_KEY)
+    backends = settings.AUTHENTICATION_BACKENDS
+    if not session_hash or backend_path not in backends:
+        return auth.get_user(request)
+
+    key = user_key(user_id, session_hash)
+    user = cache.get(key)
+    if user is None:
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        request.user = SimpleLazyObject(lambda: get_user(request))
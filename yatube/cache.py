@@ -0,0 +1,156 @@
+"""Двухуровневый кеш: память процесса перед общим для процессов кешем.
+
+Каждый воркер держит небольшой ярус L1 в памяти: не больше MAX_ENTRIES
+записей, каждая живёт не дольше LOCAL_TIMEOUT секунд, при переполнении
+вытесняются давно не читавшиеся. Промах L1 читается из общего яруса L2 —
+кеша из CACHES с псевдонимом LOCATION (файлы, Memcached, Redis).
+
+Запись и удаление идут в оба яруса, но удаление видно другим процессам
+только в L2: их L1 может отдавать старое значение до LOCAL_TIMEOUT
+секунд. Поэтому изменяемые значения кешируются под версионными ключами,
+а сами версии читаются из общего яруса мимо L1 (`TieredCache.shared`).
+
+Переменные окружения для общего яруса:
+
+- `CACHE_BACKEND` — `locmem`, `file`, `memcached` или `redis`
+  (нужен пакет django-redis);
+- `CACHE_LOCATION` — каталог, адрес сервера или URL Redis.
+"""
+import pickle
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'memcached': 'django.core.cache.backends.memcached.MemcachedCache',
+    'redis': 'django_redis.cache.RedisCache',
+}
+
+
+def shared_cache(environ, default_backend='locmem', default_location=''):
+    """Настройки общего яруса по переменным окружения CACHE_*."""
+    backend = environ.get('CACHE_BACKEND', default_backend)
+    return {
+        'BACKEND': BACKENDS[backend],
+        'LOCATION': environ.get('CACHE_LOCATION', default_location),
+    }
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = location
+        self._local_timeout = options.get('LOCAL_TIMEOUT', 60)
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _shared_timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def _local_get(self, key):
+        with self._lock:
+            expires, pickled = self._local.get(key, (None, None))
+            if pickled is None:
+                return None
+            if expires <= monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+        return pickle.loads(pickled)
+
+    def _local_set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is not None and timeout <= 0:
+            self._local_delete(key)
+            return
+        if timeout is None or timeout > self._local_timeout:
+            timeout = self._local_timeout
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._local[key] = (monotonic() + timeout, pickled)
+            self._local.move_to_end(key)
+            while len(self._local) > self._max_entries:
+                self._local.popitem(last=False)
+
+    def _local_delete(self, key):
+        with self._lock:
+            self._local.pop(key, None)
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_key(key, version)
+        value = self._local_get(local_key)
+        if value is not None:
+            return value
+        value = self.shared.get(key, version=version)
+        if value is None:
+            return default
+        self._local_set(local_key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        found, missing = {}, []
+        for key in keys:
+            value = self._local_get(self.make_key(key, version))
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            shared = self.shared.get_many(missing, version=version)
+            for key, value in shared.items():
+                self._local_set(self.make_key(key, version), value)
+            found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(
+            key, value, self._shared_timeout(timeout), version=version)
+        self._local_set(self.make_key(key, version), value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(
+            data, self._shared_timeout(timeout), version=version)
+        for key, value in data.items():
+            if key not in failed:
+                self._local_set(self.make_key(key, version), value, timeout)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(
+            key, value, self._shared_timeout(timeout), version=version)
+        if added:
+            self._local_set(self.make_key(key, version), value, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._local_delete(self.make_key(key, version))
+        return self.shared.touch(
+            key, self._shared_timeout(timeout), version=version)
+
+    def delete(self, key, version=None):
+        self._local_delete(self.make_key(key, version))
+        self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self._local_delete(self.make_key(key, version))
+        self.shared.delete_many(keys, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._local_delete(self.make_key(key, version))
+        return self.shared.incr(key, delta, version=version)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        self.shared.clear()
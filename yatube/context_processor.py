@@ -1,8 +1,18 @@
 import datetime as dt
 
+from django.utils.functional import SimpleLazyObject
+
+from posts.cache import cached_groups
+
 
 def year(request):
     year = dt.datetime.now().year
     return {
         'year': year,
     }
+
+
+def groups(request):
+    return {
+        'groups': SimpleLazyObject(cached_groups),
+    }
@@ -0,0 +1,49 @@
+"""Подключение к базе данных: настройки из окружения и PRAGMA для SQLite.
+
+Переменные окружения:
+
+- `DB_ENGINE` — `sqlite3` (по умолчанию) или `postgresql`;
+- `DB_NAME`, `DB_USER`, `DB_PASSWORD`, `DB_HOST`, `DB_PORT`;
+- `DB_CONN_MAX_AGE` — сколько секунд держать соединение открытым между
+  запросами (0 — закрывать после каждого запроса);
+- `DB_PGBOUNCER` — непустое значение, если PostgreSQL доступен через
+  pgbouncer в режиме пула транзакций: серверные курсоры в этом режиме
+  не переживают транзакцию и отключаются.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def database(environ, default_name, conn_max_age=0):
+    """Настройки базы `default` по переменным окружения DB_*."""
+    engine = environ.get('DB_ENGINE', 'sqlite3')
+    config = {
+        'ENGINE': f'django.db.backends.{engine}',
+        'NAME': environ.get('DB_NAME', default_name),
+        'CONN_MAX_AGE': int(environ.get('DB_CONN_MAX_AGE', conn_max_age)),
+    }
+    if engine == 'sqlite3':
+        return config
+    config.update({
+        'USER': environ.get('DB_USER', ''),
+        'PASSWORD': environ.get('DB_PASSWORD', ''),
+        'HOST': environ.get('DB_HOST', ''),
+        'PORT': environ.get('DB_PORT', ''),
+    })
+    if environ.get('DB_PGBOUNCER'):
+        config['DISABLE_SERVER_SIDE_CURSORS'] = True
+    return config
+
+
+@receiver(connection_created)
+def sqlite_pragmas(sender, connection, **kwargs):
+    """Выполнить SQLITE_PRAGMAS на каждом новом соединении с SQLite.
+
+    journal_mode хранится в самом файле базы, остальные PRAGMA
+    действуют только на текущее соединение.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
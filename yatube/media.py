@@ -0,0 +1,156 @@
+"""Отдача загруженных файлов (MEDIA_ROOT) без чтения их через Python.
+
+Если перед приложением стоит веб-сервер, передачу байтов берёт на себя
+он: представление только проверяет путь и отвечает заголовком
+`X-Accel-Redirect` (nginx, MEDIA_ACCEL = 'x-accel-redirect', внутренний
+location по адресу MEDIA_ACCEL_PREFIX) или `X-Sendfile` (Apache
+mod_xsendfile, lighttpd; MEDIA_ACCEL = 'x-sendfile'). Условные запросы
+и диапазоны тогда обрабатывает веб-сервер.
+
+Без него файл целиком отдаётся `FileResponse`: сервер WSGI передаёт
+открытый файл через `wsgi.file_wrapper`, и gunicorn или uWSGI копируют
+его в сокет вызовом sendfile, не занимая поток чтением. Запрос с Range
+отдаёт один диапазон (206) из файла, отображённого в память. Ответы
+проверяются по ETag и If-Modified-Since (304), If-Range учитывается.
+"""
+import mimetypes
+import mmap
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse, Http404, HttpResponse, StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+ACCEL_HEADERS = {
+    'x-accel-redirect': 'X-Accel-Redirect',
+    'x-sendfile': 'X-Sendfile',
+}
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOCK_SIZE = 64 * 1024
+
+
+def file_path(path):
+    """Абсолютный путь файла внутри MEDIA_ROOT или Http404."""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, posixpath.normpath(path))
+    except SuspiciousFileOperation:
+        raise Http404('Файл не найден')
+    if not os.path.isfile(full_path):
+        raise Http404('Файл не найден')
+    return full_path
+
+
+def byte_range(header, size):
+    """Диапазон (start, end) из заголовка Range, включая end.
+
+    None — отдать файл целиком (нет заголовка, несколько диапазонов
+    или непонятная запись), ValueError — диапазон вне файла.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Последние `last` байт файла.
+        length = int(last)
+        if not length or not size:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def range_applies(request, etag, mtime):
+    """If-Range: диапазон только для той же версии файла."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    modified = parse_http_date_safe(if_range)
+    return modified is not None and int(mtime) <= modified
+
+
+def mapped_chunks(path, start, end):
+    """Байты файла с start по end включительно из отображения в память."""
+    with open(path, 'rb') as source:
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for offset in range(start, end + 1, BLOCK_SIZE):
+                yield data[offset:min(offset + BLOCK_SIZE, end + 1)]
+
+
+def accel_response(path, content_type):
+    response = HttpResponse(content_type=content_type)
+    header = ACCEL_HEADERS[settings.MEDIA_ACCEL]
+    if header == 'X-Accel-Redirect':
+        relative = os.path.relpath(path, settings.MEDIA_ROOT)
+        response[header] = quote(
+            settings.MEDIA_ACCEL_PREFIX + relative.replace(os.sep, '/'))
+    else:
+        response[header] = path
+    return response
+
+
+def file_response(request, path, stat, content_type, etag):
+    size = stat.st_size
+    try:
+        bounds = byte_range(request.META.get('HTTP_RANGE', ''), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if bounds and range_applies(request, etag, stat.st_mtime):
+        start, end = bounds
+        if request.method == 'HEAD':
+            response = HttpResponse(status=206, content_type=content_type)
+        else:
+            response = StreamingHttpResponse(
+                mapped_chunks(path, start, end), status=206,
+                content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    elif request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+        response['Content-Length'] = size
+    else:
+        response = FileResponse(
+            open(path, 'rb'), content_type=content_type)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+@require_safe
+def serve(request, path):
+    """Файл из MEDIA_ROOT по пути `path` относительно MEDIA_URL."""
+    full_path = file_path(path)
+    stat = os.stat(full_path)
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+    if settings.MEDIA_ACCEL:
+        response = accel_response(full_path, content_type)
+    else:
+        response = get_conditional_response(
+            request, etag=etag, last_modified=int(stat.st_mtime))
+        if response is None:
+            response = file_response(
+                request, full_path, stat, content_type, etag)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(stat.st_mtime)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_cache_control(response, public=True, max_age=settings.MEDIA_MAX_AGE)
+    return response
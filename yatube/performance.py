@@ -0,0 +1,209 @@
+"""Замеры производительности запросов.
+
+`PerformanceMiddleware` для доли запросов `PERFORMANCE_SAMPLE_RATE`
+собирает число и время SQL-запросов, время отрисовки шаблонов, попадания
+и промахи кеша и общее время ответа. Замер пишется в лог
+`yatube.performance` и в кольцевой буфер последних
+`PERFORMANCE_BUFFER_SIZE` замеров, который отдаёт представление
+`performance` (только для персонала). Запросы, сделавшие больше
+`PERFORMANCE_QUERY_BUDGET` обращений к базе, отмечаются `over_budget`
+и пишутся в лог с уровнем WARNING.
+"""
+import contextvars
+import logging
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.db import connections
+from django.http import JsonResponse
+from django.template.backends.django import Template
+
+logger = logging.getLogger('yatube.performance')
+
+# Замер текущего запроса; None — запрос не попал в выборку.
+current = contextvars.ContextVar('performance_stats', default=None)
+
+_buffer = deque(maxlen=settings.PERFORMANCE_BUFFER_SIZE)
+_buffer_lock = threading.Lock()
+_patch_lock = threading.Lock()
+_patched = set()
+_missing = object()
+
+
+class Stats:
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+def record_query(execute, sql, params, many, context):
+    stats = current.get()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_seconds += time.perf_counter() - started
+
+
+def timed_render(render):
+    def wrapper(self, *args, **kwargs):
+        stats = current.get()
+        # Вложенные render_to_string не считаются дважды.
+        if stats is None or stats.template_depth:
+            return render(self, *args, **kwargs)
+        stats.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            stats.template_seconds += time.perf_counter() - started
+            stats.template_depth -= 1
+    return wrapper
+
+
+def counted_get(get):
+    def wrapper(self, key, default=None, version=None):
+        stats = current.get()
+        if stats is None:
+            return get(self, key, default, version)
+        value = get(self, key, _missing, version)
+        if value is _missing:
+            stats.cache_misses += 1
+            return default
+        stats.cache_hits += 1
+        return value
+    return wrapper
+
+
+def counted_get_many(get_many):
+    def wrapper(self, keys, version=None):
+        keys = list(keys)
+        values = get_many(self, keys, version)
+        stats = current.get()
+        if stats is not None:
+            stats.cache_hits += len(values)
+            stats.cache_misses += len(keys) - len(values)
+        return values
+    return wrapper
+
+
+def patch(cls, name, wrap):
+    """Один раз обернуть метод класса; обёртка пассивна вне замера."""
+    with _patch_lock:
+        if (cls, name) in _patched:
+            return
+        setattr(cls, name, wrap(getattr(cls, name)))
+        _patched.add((cls, name))
+
+
+def install():
+    patch(Template, 'render', timed_render)
+    # Общий ярус TieredCache не считается: обращение к нему уже учтено
+    # попаданием или промахом внешнего кеша.
+    tiers = {getattr(caches[alias], 'shared_alias', None)
+             for alias in settings.CACHES}
+    for alias in settings.CACHES:
+        if alias in tiers:
+            continue
+        backend = type(caches[alias])
+        patch(backend, 'get', counted_get)
+        # BaseCache.get_many сводится к get, его ключи уже посчитаны.
+        if backend.get_many is not BaseCache.get_many:
+            patch(backend, 'get_many', counted_get_many)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else None
+
+
+def store(record):
+    with _buffer_lock:
+        _buffer.append(record)
+
+
+def records():
+    with _buffer_lock:
+        return list(_buffer)
+
+
+class PerformanceMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install()
+
+    def __call__(self, request):
+        if random.random() >= settings.PERFORMANCE_SAMPLE_RATE:
+            return self.get_response(request)
+
+        stats = Stats()
+        token = current.set(stats)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(record_query))
+                response = self.get_response(request)
+        finally:
+            wall_seconds = time.perf_counter() - started
+            current.reset(token)
+
+        record = {
+            'time': time.time(),
+            'method': request.method,
+            'path': request.path,
+            'view': view_name(request),
+            'status': response.status_code,
+            'wall_ms': round(wall_seconds * 1000, 3),
+            'queries': stats.queries,
+            'query_ms': round(stats.query_seconds * 1000, 3),
+            'template_ms': round(stats.template_seconds * 1000, 3),
+            'cache_hits': stats.cache_hits,
+            'cache_misses': stats.cache_misses,
+            'over_budget': stats.queries > settings.PERFORMANCE_QUERY_BUDGET,
+        }
+        store(record)
+        level = logging.WARNING if record['over_budget'] else logging.INFO
+        logger.log(level, 'request %(view)s %(wall_ms)sms %(queries)s queries',
+                   record, extra={'performance': record})
+        return response
+
+
+def summary(items):
+    """Сводка по представлениям: число замеров и средние значения."""
+    views = defaultdict(list)
+    for record in items:
+        views[record['view']].append(record)
+    return {
+        str(view): {
+            'requests': len(rows),
+            'wall_ms': round(sum(r['wall_ms'] for r in rows) / len(rows), 3),
+            'queries': round(sum(r['queries'] for r in rows) / len(rows), 2),
+            'over_budget': sum(r['over_budget'] for r in rows),
+        }
+        for view, rows in views.items()
+    }
+
+
+@staff_member_required
+def performance(request):
+    items = records()
+    return JsonResponse({
+        'sample_rate': settings.PERFORMANCE_SAMPLE_RATE,
+        'query_budget': settings.PERFORMANCE_QUERY_BUDGET,
+        'summary': summary(items),
+        'requests': items[::-1],
+    })
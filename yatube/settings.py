@@ -12,6 +12,9 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 
 import os
 
+from .cache import shared_cache
+from .db import database
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -51,11 +54,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.performance.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # AuthenticationMiddleware с пользователем из кеша (users/auth.py)
+    'users.auth.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     # 'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -81,6 +86,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'yatube.context_processor.year',
+                'yatube.context_processor.groups',
             ],
         },
     },
@@ -92,18 +98,29 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Параметры подключения можно задать переменными окружения DB_*
+# (см. yatube/db.py); без них используется файл db.sqlite3.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    'default': database(os.environ, os.path.join(BASE_DIR, 'db.sqlite3')),
 }
 
+# PRAGMA, выполняемые на каждом новом соединении с SQLite
+SQLITE_PRAGMAS = {}
 
+
+# Кеш двухуровневый (yatube/cache.py): до MAX_ENTRIES записей в памяти
+# процесса на LOCAL_TIMEOUT секунд перед общим кешем `shared`. Общий кеш
+# задаётся переменными окружения CACHE_*; без них он тоже в памяти.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'yatube.cache.TieredCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+            'LOCAL_TIMEOUT': 60,
+        },
+    },
+    'shared': shared_cache(os.environ),
 }
 
 # Password validation
@@ -144,9 +161,29 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+# Отдавать STATIC_ROOT из WSGI-приложения (yatube/staticfiles.py);
+# файлы без хеша в имени кешируются на STATIC_MAX_AGE секунд
+STATIC_SERVE = False
+STATIC_MAX_AGE = 60
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Отдавать MEDIA_ROOT представлением yatube.media.serve (при DEBUG —
+# всегда). MEDIA_ACCEL: '' — байты отдаёт сервер WSGI (sendfile, mmap),
+# 'x-accel-redirect' — nginx из внутреннего location MEDIA_ACCEL_PREFIX,
+# 'x-sendfile' — Apache или lighttpd. Файлы кешируются MEDIA_MAX_AGE секунд
+MEDIA_SERVE = False
+MEDIA_ACCEL = ''
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+MEDIA_MAX_AGE = 60 * 60 * 24
+
+# Файлы до FILE_UPLOAD_MAX_MEMORY_SIZE принимаются в память, крупнее —
+# пишутся во временный файл кусками и обрезаются по POST_IMAGE_MAX_BYTES.
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'posts.uploads.LimitedUploadHandler',
+]
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024
 
 # Login
 
@@ -160,3 +197,74 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 # Project patams
 
 PAGE_ITEMS = 10
+
+# Сколько комментариев показывать на странице поста и подгружать
+# кнопкой «Показать ещё»
+COMMENT_PAGE_ITEMS = 20
+
+# Режим постраничного вывода лент: 'pages' (номера страниц, COUNT/OFFSET)
+# или 'cursor' (ключ (pub_date, id), ссылки «новее/старше»)
+FEED_PAGINATION = 'pages'
+
+# Время жизни закешированных страниц лент, секунды
+FEED_CACHE_TIMEOUT = 60 * 5
+
+# Сколько секунд обратный прокси может отдавать анонимным читателям
+# страницы группы, профиля и поста без перепроверки (Cache-Control)
+PAGE_CACHE_MAX_AGE = 60
+
+# Опрос новых записей лент (posts/live.py): сколько новых постов
+# считать не больше, сколько секунд обратный прокси может отдавать
+# анонимный ответ без перепроверки, как часто поток событий сверяет
+# версию ленты и через сколько секунд закрывается
+NEW_POSTS_LIMIT = 100
+NEW_POSTS_MAX_AGE = 5
+NEW_POSTS_POLL_SECONDS = 5
+NEW_POSTS_STREAM_SECONDS = 60 * 5
+
+# Сколько секунд хранить в кеше пользователя запроса (users/auth.py)
+USER_CACHE_TIMEOUT = 60 * 15
+
+# Материализованная лента подписок (TimelineEntry). После включения
+# на существующей базе выполните `manage.py rebuild_timeline`.
+FOLLOW_TIMELINE = False
+# Размер пачки при рассылке поста подписчикам
+TIMELINE_BATCH_SIZE = 500
+# Посты авторов с большим числом подписчиков не рассылаются,
+# а подмешиваются в ленту при чтении
+TIMELINE_FANOUT_LIMIT = 10000
+# Сколько последних постов автора добавлять в ленту при подписке
+TIMELINE_BACKFILL = 1000
+
+# Миниатюры изображений постов строятся при загрузке в пуле потоков.
+# Ширины миниатюр; первая выводится в ленте
+POST_THUMBNAIL_WIDTHS = (900, 450)
+THUMBNAIL_QUALITY = 85
+# Размер пула (в нём же дополняются ленты подписок, posts/timeline.py);
+# 0 — выполнять задачи сразу после коммита
+THUMBNAIL_WORKERS = 2
+
+# Ограничения загружаемых изображений постов. Число пикселей проверяется
+# по заголовку файла до декодирования (защита от «бомб» распаковки);
+# изображения больше POST_IMAGE_MAX_SIDE уменьшаются, метаданные удаляются.
+POST_IMAGE_MAX_BYTES = 30 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 40 * 10**6
+POST_IMAGE_MAX_SIDE = 2560
+POST_IMAGE_QUALITY = 90
+
+# Изображения постов хранятся по хешу содержимого (posts/storage.py).
+# `manage.py collect_images` удаляет файлы без ссылок, изменённые
+# раньше чем IMAGE_GC_MIN_AGE секунд назад: на свежий файл пост мог
+# ещё не успеть сослаться.
+IMAGE_GC_MIN_AGE = 60 * 60
+
+# Конфигурация полнотекстового поиска PostgreSQL; при смене нужно
+# пересоздать индекс post_text_search_idx (миграция 0017).
+SEARCH_CONFIG = 'russian'
+
+# Замеры запросов (yatube.performance): доля замеряемых запросов,
+# сколько последних замеров хранить для /admin/performance/ и сколько
+# обращений к базе допустимо на запрос без предупреждения в логе.
+PERFORMANCE_SAMPLE_RATE = 0.1
+PERFORMANCE_BUFFER_SIZE = 500
+PERFORMANCE_QUERY_BUDGET = 20
@@ -0,0 +1,83 @@
+"""Настройки для боевого развёртывания.
+
+    DJANGO_SETTINGS_MODULE=yatube.settings_production
+
+Секретный ключ и допустимые хосты задаются переменными окружения
+DJANGO_SECRET_KEY и DJANGO_ALLOWED_HOSTS (через запятую), база — DB_*
+(см. yatube/db.py), общий кеш — CACHE_* (см. yatube/cache.py).
+Перед запуском выполните `manage.py collectstatic`.
+Соединения с базой живут между запросами, шаблоны компилируются один раз.
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, CACHES, SECRET_KEY, TEMPLATES
+from .cache import shared_cache
+from .db import database
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', SECRET_KEY)
+
+ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost').split(',')
+
+# Постоянные соединения: каждый поток сервера держит своё соединение
+# до CONN_MAX_AGE секунд и не открывает новое на каждый запрос.
+# Перед PostgreSQL с pgbouncer задайте DB_PGBOUNCER=1.
+DATABASES = {
+    'default': database(
+        os.environ, os.path.join(BASE_DIR, 'db.sqlite3'), conn_max_age=600),
+}
+
+# WAL: читатели не блокируют писателя и друг друга, запись в журнал
+# без fsync на каждую транзакцию (synchronous=NORMAL). Файл базы
+# читается через mmap; писатель, заставший базу занятой, ждёт до
+# busy_timeout миллисекунд вместо немедленной ошибки «database is locked».
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+}
+
+# Общий ярус кеша должен быть виден всем воркерам сервера: по умолчанию
+# это файлы в каталоге cache/, без внешних служб.
+CACHES = dict(CACHES, shared=shared_cache(
+    os.environ, 'file', os.path.join(BASE_DIR, 'cache')))
+
+# Скомпилированные шаблоны хранятся в памяти процесса: файлы ищутся
+# и разбираются один раз, а не на каждый {% include %} каждого запроса.
+# Изменённые шаблоны подхватываются только после перезапуска.
+TEMPLATES = [dict(
+    TEMPLATES[0],
+    APP_DIRS=False,
+    OPTIONS=dict(TEMPLATES[0]['OPTIONS'], debug=False, loaders=[
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]),
+)]
+
+# Статика с хешем содержимого в именах и сжатыми копиями (.gz, .br)
+# собирается `manage.py collectstatic` при выкладке и отдаётся самим
+# WSGI-приложением. Без собранного манифеста {% static %} падает.
+STATICFILES_STORAGE = (
+    'yatube.staticfiles.CompressedManifestStaticFilesStorage')
+STATIC_SERVE = True
+
+# Загруженные файлы проверяет Django, а передаёт веб-сервер, если
+# задана переменная MEDIA_ACCEL (см. yatube/media.py).
+MEDIA_SERVE = True
+MEDIA_ACCEL = os.environ.get('MEDIA_ACCEL', '')
+
+# Сессии читаются из общего яруса кеша (в L1 воркера завершённая сессия
+# жила бы ещё до LOCAL_TIMEOUT секунд), а в базу пишутся только при
+# изменении. SESSION_BACKEND=signed_cookies хранит сессию в подписанной
+# cookie без базы и кеша; такую сессию нельзя отозвать на сервере,
+# кроме как сменой пароля или SECRET_KEY.
+SESSION_ENGINE = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[os.environ.get('SESSION_BACKEND', 'cached_db')]
+SESSION_CACHE_ALIAS = 'shared'
@@ -0,0 +1,217 @@
+"""Статика для развёртывания без отдельного веб-сервера.
+
+`collectstatic` с `CompressedManifestStaticFilesStorage` пишет копии
+файлов с хешем содержимого в имени (`style.3f1c2a9b8e7d.css`, манифест
+`staticfiles.json`) и рядом с текстовыми файлами — сжатые заранее
+`.gz` и, если установлен пакет Brotli, `.br`. Сжатие делается один раз
+при сборке с максимальной степенью, а не на каждый запрос.
+
+`StaticFiles` — WSGI-обёртка над приложением Django: при запуске
+перечисляет файлы STATIC_ROOT и отдаёт их сама, выбирая сжатую копию
+по Accept-Encoding. Файлы с хешем в имени не меняются никогда и
+кешируются браузером на год (`immutable`); обычные имена — на
+STATIC_MAX_AGE секунд с перепроверкой по ETag. Список файлов
+читается один раз, поэтому после collectstatic процесс перезапускают.
+"""
+import gzip
+import json
+import mimetypes
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Расширения файлов, которые имеет смысл сжимать.
+COMPRESSIBLE = (
+    '.css', '.js', '.map', '.json', '.svg', '.txt', '.html', '.xml',
+    '.ico', '.ttf', '.otf', '.eot',
+)
+# Файлы меньше этого размера не сжимаются, байты
+COMPRESS_MIN_SIZE = 256
+# Сжатая копия сохраняется, если она меньше исходного файла хотя бы на 5 %.
+COMPRESS_MAX_RATIO = 0.95
+# Суффикс сжатой копии и значение Content-Encoding, в порядке предпочтения.
+ENCODINGS = (('.br', 'br'), ('.gz', 'gzip'))
+IMMUTABLE = 'public, max-age=31536000, immutable'
+BLOCK_SIZE = 64 * 1024
+
+
+def compressors():
+    if brotli is not None:
+        yield '.br', lambda data: brotli.compress(data, quality=11)
+    yield '.gz', lambda data: gzip.compress(data, 9, mtime=0)
+
+
+def compress_file(path):
+    """Записать рядом с файлом его сжатые копии; вернуть их суффиксы."""
+    if not path.endswith(COMPRESSIBLE):
+        return []
+    modified = os.path.getmtime(path)
+    with open(path, 'rb') as source:
+        data = source.read()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return []
+    written = []
+    for suffix, compress in compressors():
+        target = path + suffix
+        if (os.path.exists(target)
+                and os.path.getmtime(target) >= modified):
+            continue
+        compressed = compress(data)
+        if len(compressed) > len(data) * COMPRESS_MAX_RATIO:
+            continue
+        temporary = f'{target}.tmp'
+        with open(temporary, 'wb') as output:
+            output.write(compressed)
+        os.replace(temporary, target)
+        written.append(suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хешированные имена и сжатые копии файлов при collectstatic."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | {
+            self.hashed_files[self.hash_key(self.clean_name(name))]
+            for name in paths
+            if self.hash_key(self.clean_name(name)) in self.hashed_files}
+        for name in sorted(names):
+            compress_file(self.path(name))
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding с ненулевым весом."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        weight = params.strip()
+        if weight.startswith('q='):
+            try:
+                if float(weight[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class Asset:
+    """Файл статики и его сжатые копии."""
+
+    def __init__(self, path, immutable, max_age):
+        self.path = path
+        content_type, _ = mimetypes.guess_type(path)
+        content_type = content_type or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in (
+                'application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+        self.content_type = content_type
+        self.cache_control = (
+            IMMUTABLE if immutable else f'public, max-age={max_age}')
+        stat = os.stat(path)
+        self.last_modified = http_date(stat.st_mtime)
+        self.variants = [(None, path, stat.st_size)]
+        for suffix, encoding in ENCODINGS:
+            if os.path.exists(path + suffix):
+                self.variants.insert(
+                    -1, (encoding, path + suffix,
+                         os.path.getsize(path + suffix)))
+        self.tag = f'{int(stat.st_mtime):x}-{stat.st_size:x}'
+
+    def variant(self, accept_encoding):
+        accepted = accepted_encodings(accept_encoding)
+        for encoding, path, size in self.variants:
+            if encoding is None or encoding in accepted or '*' in accepted:
+                return encoding, path, size
+
+    def headers(self, encoding, size):
+        etag = f'"{self.tag}-{encoding}"' if encoding else f'"{self.tag}"'
+        headers = [
+            ('Content-Type', self.content_type),
+            ('Content-Length', str(size)),
+            ('Cache-Control', self.cache_control),
+            ('Last-Modified', self.last_modified),
+            ('ETag', etag),
+        ]
+        if len(self.variants) > 1:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        return etag, headers
+
+
+def hashed_names(root, manifest_name):
+    path = os.path.join(root, manifest_name)
+    if not os.path.exists(path):
+        return set()
+    with open(path) as manifest:
+        return set(json.load(manifest).get('paths', {}).values())
+
+
+def scan(root, prefix, max_age, manifest_name='staticfiles.json'):
+    """Словарь «адрес → Asset» для файлов каталога статики."""
+    hashed = hashed_names(root, manifest_name)
+    compressed = tuple(suffix for suffix, _ in ENCODINGS)
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.endswith(compressed) or name == manifest_name:
+                continue
+            path = os.path.join(directory, name)
+            relative = os.path.relpath(path, root).replace(os.sep, '/')
+            files[prefix + relative] = Asset(
+                path, relative in hashed, max_age)
+    return files
+
+
+def read_blocks(path):
+    with open(path, 'rb') as source:
+        while True:
+            block = source.read(BLOCK_SIZE)
+            if not block:
+                return
+            yield block
+
+
+class StaticFiles:
+    """WSGI-приложение: статика из `root` по адресам `prefix`,
+    остальные запросы передаются `application`."""
+
+    def __init__(self, application, root, prefix, max_age=60):
+        self.application = application
+        self.files = scan(root, prefix, max_age) if root else {}
+
+    def __call__(self, environ, start_response):
+        asset = self.files.get(environ.get('PATH_INFO', ''))
+        if asset is None:
+            return self.application(environ, start_response)
+        method = environ['REQUEST_METHOD']
+        if method not in ('GET', 'HEAD'):
+            start_response('405 Method Not Allowed', [('Allow', 'GET, HEAD')])
+            return []
+
+        encoding, path, size = asset.variant(
+            environ.get('HTTP_ACCEPT_ENCODING', ''))
+        etag, headers = asset.headers(encoding, size)
+        if etag in environ.get('HTTP_IF_NONE_MATCH', ''):
+            start_response('304 Not Modified', [
+                (name, value) for name, value in headers
+                if name in ('Cache-Control', 'ETag', 'Vary')])
+            return []
+        start_response('200 OK', headers)
+        if method == 'HEAD':
+            return []
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            return file_wrapper(open(path, 'rb'), BLOCK_SIZE)
+        return read_blocks(path)
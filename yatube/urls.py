@@ -4,20 +4,27 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from . import media
+from .performance import performance
+
 handler404 = 'posts.views.page_not_found'   # noqa
 handler500 = 'posts.views.server_error'     # noqa
 
 urlpatterns = [
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
+    path('admin/performance/', performance, name='performance'),
     path('admin/', admin.site.urls),
     path('about/', include('about.urls', namespace='about')),
     path('', include('posts.urls')),
 ]
 
+if settings.DEBUG or settings.MEDIA_SERVE:
+    urlpatterns.append(path(
+        f'{settings.MEDIA_URL.lstrip("/")}<path:path>', media.serve,
+        name='media'))
+
 if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(
         settings.STATIC_URL, document_root=settings.STATIC_ROOT)
     